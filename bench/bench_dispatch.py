@@ -0,0 +1,75 @@
+"""
+Show that parse cost per line stays flat as syntax rules are registered.
+
+	python3 bench/bench_dispatch.py [--pages N] [--rules 0,4,16,64] [--repeat N]
+
+Parses a synthetic corpus with the default rules (tables, strikethrough)
+plus N extra block and N extra inline rules that never match. Dispatched
+rules have their own trigger characters, as real extensions do, and are
+never tried on this corpus. For contrast, the same rules registered
+without useful triggers (block rules for every block, inline rules at
+every space) are tried everywhere, so their cost grows with N.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import DEFAULT_MIX, generate_pages
+from markdown_blocks import markdown_to_html_node
+from syntax import STRIKETHROUGH, TABLES, BlockRule, InlineRule, SyntaxRegistry
+
+
+def registry_with(n, dispatched):
+	registry = SyntaxRegistry()
+	registry.add_block(TABLES)
+	registry.add_inline(STRIKETHROUGH)
+	for k in range(n):
+		# arrows: characters no page of the corpus contains
+		trigger = chr(0x2190 + k) if dispatched else ""
+		registry.add_block(BlockRule(f"block{k}", trigger, lambda block: False, None))
+		registry.add_inline(InlineRule(f"inline{k}", trigger or " ", lambda text, i, hi, find, span: None))
+	return registry
+
+
+def best_of(fn, repeat):
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--pages", type=int, default=200)
+	parser.add_argument("--blocks", type=int, default=40)
+	parser.add_argument("--rules", default="0,4,16,64")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--seed", type=int, default=1)
+	args = parser.parse_args()
+
+	texts = list(generate_pages(args.pages, args.blocks, DEFAULT_MIX, args.seed).values())
+	lines = sum(t.count("\n") + 1 for t in texts)
+	print(f"{len(texts)} pages, {lines} lines")
+	print(f"  {'rules':>5}  {'dispatched':>16}  {'tried everywhere':>22}")
+
+	base = None
+	for n in (int(x) for x in args.rules.split(",")):
+		row = []
+		for dispatched in (True, False):
+			registry = registry_with(n, dispatched)
+			seconds = best_of(lambda: [markdown_to_html_node(t, registry=registry) for t in texts], args.repeat)
+			per_line = seconds / lines * 1e6
+			if base is None:
+				base = per_line
+			row.append(f"{per_line:7.2f} us/line ({per_line / base:4.2f}x)")
+		print(f"  {n:>5}  {row[0]:>16}  {row[1]:>22}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,135 @@
+"""
+Measure AST memory per node with tracemalloc, before and after slotted
+nodes.
+
+	python3 bench/bench_memory.py [--megabytes 10] [--blocks 40] [--seed 1]
+
+Generates a synthetic corpus of the requested size with bench/corpus.py,
+parses every page and keeps all the trees alive at once (as cross-page
+features would), then copies them into each node layout and reports the
+traced bytes per node each copy retains:
+
+	before  attributes in a per-instance __dict__, heading tags built per
+	        node rather than interned, a new props dict for every link and
+	        image
+	after   the slotted HTMLNode classes, with the tags interned and props
+	        objects shared the way the parser shares them
+
+Both copies allocate their own text values, so the difference is the
+node layout alone.
+"""
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import DEFAULT_MIX, make_page
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+
+
+class DictNode:
+	# HTMLNode as it was: no __slots__, so every instance carries a __dict__
+	def __init__(self, tag, value, children, props):
+		self.tag = tag
+		self.value = value
+		self.children = children
+		self.props = props
+
+
+def own_value(value):
+	# a string of its own, as the parser allocates one for each node
+	return value.encode("utf-8").decode("utf-8") if value else value
+
+
+def unslotted_copy(node):
+	tag = node.tag
+	if tag is not None and len(tag) == 2 and tag[0] == "h" and tag[1].isdigit():
+		# the parser used to build these with f"h{level}" for every heading
+		tag = f"h{int(tag[1])}"
+	children = [unslotted_copy(child) for child in node.children] if node.children else None
+	props = dict(node.props) if node.props else None
+	return DictNode(tag, own_value(node.value), children, props)
+
+
+def slotted_copy(node, shared):
+	# shared maps id(props) -> its copy, so props the parser shares stay shared
+	props = node.props
+	if props:
+		props = shared.get(id(props)) or shared.setdefault(id(props), type(props)(dict(props)))
+	if node.children:
+		return ParentNode(node.tag, [slotted_copy(child, shared) for child in node.children], props)
+	return LeafNode(node.tag, own_value(node.value), props)
+
+
+def make_corpus(megabytes, blocks, seed):
+	# the same pages corpus.generate_pages yields for seed, as many as it
+	# takes to reach the requested size
+	rng = random.Random(seed)
+	pages = []
+	size = 0
+	while size < megabytes * 1_000_000:
+		page = make_page(rng, len(pages), blocks, DEFAULT_MIX)
+		pages.append(page)
+		size += len(page)
+	return pages, size
+
+
+def count_nodes(root):
+	count = 0
+	stack = [root]
+	while stack:
+		node = stack.pop()
+		count += 1
+		if node.children:
+			stack.extend(node.children)
+	return count
+
+
+def traced(build):
+	"""
+	(result of build(), bytes it left allocated, peak bytes while it ran)
+	"""
+	gc.collect()
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	result = build()
+	gc.collect()
+	_, peak = tracemalloc.get_traced_memory()
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+	retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+	return result, retained, peak
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--megabytes", type=float, default=10)
+	parser.add_argument("--blocks", type=int, default=40)
+	parser.add_argument("--seed", type=int, default=1)
+	args = parser.parse_args()
+
+	pages, size = make_corpus(args.megabytes, args.blocks, args.seed)
+	trees, _, peak = traced(lambda: [markdown_to_html_node(page) for page in pages])
+	nodes = sum(count_nodes(t) for t in trees)
+	copies, before, _ = traced(lambda: [unslotted_copy(tree) for tree in trees])
+	assert nodes == sum(count_nodes(t) for t in copies)
+	del copies
+	shared = {}
+	copies, after, _ = traced(lambda: [slotted_copy(tree, shared) for tree in trees])
+	assert nodes == sum(count_nodes(t) for t in copies)
+
+	print(f"corpus:   {size / 1e6:.1f} MB markdown, {len(pages)} pages")
+	print(f"nodes:    {nodes}")
+	print(f"before:   {before / 1e6:.1f} MB retained ({before / nodes:.0f} bytes/node)")
+	print(f"after:    {after / 1e6:.1f} MB retained ({after / nodes:.0f} bytes/node)")
+	print(f"peak:     {peak / 1e6:.1f} MB while parsing")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,90 @@
+"""
+Compare the iterative serializer with the old recursive to_html.
+
+	python3 bench/bench_serializer.py [--paragraphs N] [--depth D]
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+
+
+def recursive_to_html(node):
+	# the pre-iterative implementation, without escaping
+	if isinstance(node, LeafNode):
+		if node.tag is None:
+			return node.value
+		props = "".join([f' {k}="{v}"' for k, v in (node.props or {}).items()])
+		return f"<{node.tag}{props}>{node.value}</{node.tag}>"
+	children_html = "".join([recursive_to_html(child) for child in node.children])
+	props = "".join([f' {k}="{v}"' for k, v in (node.props or {}).items()])
+	return f"<{node.tag}{props}>{children_html}</{node.tag}>"
+
+
+def make_document(paragraphs):
+	para = (
+		"Some **bold** text, some _italic_ text, a `code span`, "
+		"a [link](https://example.com/page) and an ![image](/images/x.png).\n"
+		"A second line of plain prose that goes on for a while to pad it out."
+	)
+	items = "\n".join(f"- item {i} with [a link](/p/{i})" for i in range(10))
+	blocks = []
+	for i in range(paragraphs):
+		blocks.append(f"## Section {i}")
+		blocks.append(para)
+		blocks.append(items)
+	return "\n\n".join(blocks)
+
+
+def make_deep(depth):
+	node = LeafNode("span", "leaf")
+	for _ in range(depth):
+		node = ParentNode("div", [node])
+	return node
+
+
+def best_of(fn, repeat):
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--paragraphs", type=int, default=5000)
+	parser.add_argument("--depth", type=int, default=2000)
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args()
+
+	root = markdown_to_html_node(make_document(args.paragraphs))
+	size = len(root.to_html())
+	print(f"document: {size / 1e6:.1f} MB of HTML")
+
+	t_old = best_of(lambda: recursive_to_html(root), args.repeat)
+	t_new = best_of(root.to_html, args.repeat)
+	t_io = best_of(lambda: root.write_html(io.StringIO()), args.repeat)
+	print(f"recursive to_html:     {t_old * 1000:8.1f} ms")
+	print(f"iterative to_html:     {t_new * 1000:8.1f} ms  ({t_old / t_new:.2f}x)")
+	print(f"write_html(StringIO):  {t_io * 1000:8.1f} ms  ({t_old / t_io:.2f}x)")
+
+	deep = make_deep(args.depth)
+	try:
+		recursive_to_html(deep)
+		print(f"depth {args.depth}: recursive ok")
+	except RecursionError:
+		print(f"depth {args.depth}: recursive hits RecursionError")
+	deep.to_html()
+	print(f"depth {args.depth}: iterative ok")
+
+
+if __name__ == "__main__":
+	main()
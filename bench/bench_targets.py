@@ -0,0 +1,69 @@
+"""
+Compare rendering a corpus for N basepaths as N separate builds against
+one multi-target pass that parses each page once.
+
+	python3 bench/bench_targets.py [--pages N] [--targets 1,2,3,5] [--repeat N]
+
+Separate builds each start with an empty block cache, as separate
+processes (build.sh run once per target) do.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from block_cache import BlockCache
+from corpus import DEFAULT_MIX, generate_pages
+from page_template import Template
+from render import render_page, render_targets
+
+TEMPLATE = '<html><head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet"></head><body>{{ Content }}</body></html>'
+
+
+def best_of(fn, repeat):
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--pages", type=int, default=200)
+	parser.add_argument("--blocks", type=int, default=40)
+	parser.add_argument("--targets", default="1,2,3,5")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--seed", type=int, default=1)
+	args = parser.parse_args()
+
+	texts = [f"# Page {i}\n\n{md}" for i, md in enumerate(generate_pages(args.pages, args.blocks, DEFAULT_MIX, args.seed).values())]
+	template = Template.compile(TEMPLATE)
+	print(f"{len(texts)} pages")
+	print(f"  {'targets':>7}  {'separate':>10}  {'one parse':>10}  {'speedup':>7}")
+
+	for n in (int(x) for x in args.targets.split(",")):
+		basepaths = ["/"] + [f"/t{k}/" for k in range(1, n)]
+
+		def separate():
+			for basepath in basepaths:
+				blocks = BlockCache()
+				for md in texts:
+					render_page(md, template, basepath, block_cache=blocks)
+
+		def together():
+			blocks = BlockCache()
+			for md in texts:
+				render_targets(md, template, basepaths, block_cache=blocks)
+
+		a = best_of(separate, args.repeat)
+		b = best_of(together, args.repeat)
+		print(f"  {n:>7}  {a * 1000:8.1f}ms  {b * 1000:8.1f}ms  {a / b:6.2f}x")
+
+
+if __name__ == "__main__":
+	main()
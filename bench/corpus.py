@@ -0,0 +1,140 @@
+"""
+Synthetic markdown site generator for benchmarks.
+
+	python3 bench/corpus.py OUT_DIR [--pages N] [--blocks N] [--mix lists=1,code=2,...]
+
+Pages are deterministic for a given seed, so two benchmark runs over the
+same arguments parse exactly the same input.
+"""
+import argparse
+import random
+from pathlib import Path
+
+FEATURES = ("paragraphs", "lists", "quotes", "code", "links", "images", "emphasis")
+
+DEFAULT_MIX = {
+	"paragraphs": 4,
+	"lists": 2,
+	"quotes": 1,
+	"code": 1,
+	"links": 2,
+	"images": 1,
+	"emphasis": 2,
+}
+
+WORDS = (
+	"elf ring hobbit shire mountain river road wizard tower forest song "
+	"king stone light shadow sword horse valley gate bridge lamp"
+).split()
+
+
+def parse_mix(spec):
+	"""
+	Parse 'lists=1,code=2' into a weight dict on top of DEFAULT_MIX.
+	"""
+	mix = dict(DEFAULT_MIX)
+	if not spec:
+		return mix
+	for part in spec.split(","):
+		name, _, weight = part.partition("=")
+		name = name.strip()
+		if name not in FEATURES:
+			raise ValueError(f"unknown feature: {name}")
+		mix[name] = float(weight)
+	return mix
+
+
+def _words(rng, n):
+	return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _inline(rng, mix, n_words):
+	"""
+	A run of prose; links, images and emphasis appear in proportion to
+	their weight relative to plain text.
+	"""
+	inline_weights = {
+		"plain": mix["paragraphs"] * 3,
+		"links": mix["links"],
+		"images": mix["images"],
+		"emphasis": mix["emphasis"],
+	}
+	kinds = [k for k, w in inline_weights.items() if w > 0]
+	weights = [inline_weights[k] for k in kinds]
+	parts = []
+	while n_words > 0:
+		kind = rng.choices(kinds, weights)[0]
+		if kind == "links":
+			parts.append(f"[{_words(rng, 2)}](/{rng.choice(WORDS)}/{rng.randrange(1000)})")
+		elif kind == "images":
+			parts.append(f"![{_words(rng, 2)}](/images/{rng.choice(WORDS)}.png)")
+		elif kind == "emphasis":
+			style = rng.choice(("**{}**", "_{}_", "`{}`"))
+			parts.append(style.format(_words(rng, 2)))
+		else:
+			parts.append(_words(rng, 5))
+		n_words -= 5
+	return " ".join(parts)
+
+
+def make_page(rng, n, blocks, mix):
+	out = [f"# Page {n}"]
+	kinds = [k for k in ("paragraphs", "lists", "quotes", "code") if mix[k] > 0] or ["paragraphs"]
+	weights = [mix[k] for k in kinds]
+	for i in range(blocks):
+		kind = rng.choices(kinds, weights)[0]
+		if i % 8 == 0:
+			out.append(f"## {_words(rng, 3)}")
+		if kind == "lists":
+			if rng.random() < 0.5:
+				out.append("\n".join(f"- {_inline(rng, mix, 8)}" for _ in range(rng.randint(2, 6))))
+			else:
+				out.append("\n".join(f"{j}. {_inline(rng, mix, 8)}" for j in range(1, rng.randint(3, 7))))
+		elif kind == "quotes":
+			out.append("\n".join(f"> {_inline(rng, mix, 10)}" for _ in range(rng.randint(1, 3))))
+		elif kind == "code":
+			body = "\n".join(f"    {rng.choice(WORDS)}({rng.randrange(100)})" for _ in range(rng.randint(2, 8)))
+			out.append(f"```\n{body}\n```")
+		else:
+			out.append(_inline(rng, mix, rng.randint(20, 80)))
+	return "\n\n".join(out) + "\n"
+
+
+def generate_pages(pages=100, blocks=40, mix=None, seed=0):
+	"""
+	Return {relative path: markdown} for a synthetic site.
+	"""
+	mix = mix or dict(DEFAULT_MIX)
+	rng = random.Random(seed)
+	site = {}
+	for n in range(pages):
+		rel = "index.md" if n == 0 else f"posts/{n // 100:03d}/post{n}/index.md"
+		site[rel] = make_page(rng, n, blocks, mix)
+	return site
+
+
+def write_site(out_dir, site):
+	out = Path(out_dir)
+	for rel, text in site.items():
+		path = out / rel
+		path.parent.mkdir(parents=True, exist_ok=True)
+		path.write_text(text, encoding="utf-8")
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Write a synthetic markdown site.")
+	parser.add_argument("out_dir")
+	parser.add_argument("--pages", type=int, default=100)
+	parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+	parser.add_argument("--mix", default="", help="feature weights, e.g. lists=1,code=3,emphasis=5")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	site = generate_pages(args.pages, args.blocks, parse_mix(args.mix), args.seed)
+	write_site(args.out_dir, site)
+	size = sum(len(text) for text in site.values())
+	print(f"wrote {len(site)} pages ({size / 1e6:.1f} MB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,189 @@
+"""
+Time each stage of the pipeline on a synthetic site and track regressions.
+
+	python3 bench/run.py run [--pages N] [--blocks N] [--mix ...] [-o results.json]
+	python3 bench/run.py compare OLD.json NEW.json [--threshold 0.10]
+
+Stages are timed separately over the whole corpus, best of --repeat:
+markdown_to_blocks, block_to_block_type, text_to_textnodes,
+markdown_to_html_node (the full parse), to_html, template_fill and
+file_write. compare exits with status 1 if any stage got slower than
+the threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import generate_pages, parse_mix
+from htmlnode import escape_text
+from inline_markdown import text_to_textnodes
+from manifest import GENERATOR_VERSION
+from markdown_blocks import (
+	BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node,
+	_heading_level, _strip_ol_markers, _strip_quote_markers, _strip_ul_markers,
+)
+from metadata import page_meta
+from page_template import load_template
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def inline_texts(blocks):
+	"""
+	The strings markdown_to_html_node hands to text_to_textnodes.
+	"""
+	texts = []
+	for block, btype in blocks:
+		if btype == BlockType.HEADING:
+			texts.append(block[_heading_level(block) + 1:])
+		elif btype == BlockType.QUOTE:
+			texts.append(_strip_quote_markers(block))
+		elif btype == BlockType.UNORDERED_LIST:
+			texts.extend(_strip_ul_markers(block).split("\n"))
+		elif btype == BlockType.ORDERED_LIST:
+			texts.extend(_strip_ol_markers(block).split("\n"))
+		elif btype == BlockType.PARAGRAPH:
+			texts.append(block)
+	return texts
+
+
+def best_of(fn, repeat):
+	best = float("inf")
+	result = None
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = fn()
+		best = min(best, time.perf_counter() - start)
+	return best, result
+
+
+def run_stages(pages, template_path, repeat):
+	texts = list(pages.values())
+	stages = {}
+
+	def timed(name, fn):
+		seconds, result = best_of(fn, repeat)
+		stages[name] = seconds
+		return result
+
+	block_lists = timed("markdown_to_blocks", lambda: [markdown_to_blocks(md) for md in texts])
+	typed = timed("block_to_block_type", lambda: [
+		[(b, block_to_block_type(b)) for b in blocks] for blocks in block_lists
+	])
+	inputs = [inline_texts(blocks) for blocks in typed]
+	timed("text_to_textnodes", lambda: [[text_to_textnodes(t) for t in page] for page in inputs])
+	trees = timed("markdown_to_html_node", lambda: [markdown_to_html_node(md) for md in texts])
+	contents = timed("to_html", lambda: [tree.to_html("/") for tree in trees])
+
+	template = load_template(template_path).for_basepath("/")
+	titles = [escape_text(page_meta(tree)["title"]) for tree in trees]
+	htmls = timed("template_fill", lambda: [
+		template.render({"Title": title, "Content": content})
+		for title, content in zip(titles, contents)
+	])
+
+	with tempfile.TemporaryDirectory() as tmp:
+		out = Path(tmp)
+		paths = [out / rel.replace(".md", ".html") for rel in pages]
+		for p in paths:
+			p.parent.mkdir(parents=True, exist_ok=True)
+		timed("file_write", lambda: [p.write_text(h, encoding="utf-8") for p, h in zip(paths, htmls)])
+
+	return stages
+
+
+def cmd_run(args):
+	mix = parse_mix(args.mix)
+	pages = generate_pages(args.pages, args.blocks, mix, args.seed)
+	size = sum(len(t) for t in pages.values())
+	stages = run_stages(pages, args.template, args.repeat)
+	result = {
+		"meta": {
+			"pages": args.pages,
+			"blocks": args.blocks,
+			"mix": mix,
+			"seed": args.seed,
+			"bytes": size,
+			"repeat": args.repeat,
+			"generator_version": GENERATOR_VERSION,
+			"python": platform.python_version(),
+			"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		},
+		"stages": {
+			name: {"seconds": sec, "us_per_page": sec / args.pages * 1e6, "mb_per_s": size / sec / 1e6}
+			for name, sec in stages.items()
+		},
+	}
+	print(f"{args.pages} pages, {size / 1e6:.1f} MB markdown")
+	for name, stat in result["stages"].items():
+		print(f"  {name:<22} {stat['seconds'] * 1000:9.1f} ms {stat['us_per_page']:9.1f} us/page")
+	if args.output:
+		Path(args.output).write_text(json.dumps(result, indent=1), encoding="utf-8")
+		print(f"results written to {args.output}")
+
+
+def compare(old, new, threshold):
+	"""
+	Return [(stage, old_s, new_s, ratio)] for stages slower than threshold.
+	"""
+	regressions = []
+	for name, stat in new["stages"].items():
+		if name not in old["stages"]:
+			continue
+		before = old["stages"][name]["seconds"]
+		after = stat["seconds"]
+		ratio = after / before if before else float("inf")
+		if ratio > 1 + threshold:
+			regressions.append((name, before, after, ratio))
+	return regressions
+
+
+def cmd_compare(args):
+	old = json.loads(Path(args.old).read_text(encoding="utf-8"))
+	new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+	if old["meta"].get("bytes") != new["meta"].get("bytes"):
+		print("warning: runs used different corpora; comparing anyway")
+	for name, stat in new["stages"].items():
+		if name in old["stages"]:
+			before = old["stages"][name]["seconds"]
+			print(f"  {name:<22} {before * 1000:9.1f} -> {stat['seconds'] * 1000:9.1f} ms ({stat['seconds'] / before:5.2f}x)")
+	regressions = compare(old, new, args.threshold)
+	for name, _, _, ratio in regressions:
+		print(f"REGRESSION: {name} is {ratio:.2f}x slower (threshold {1 + args.threshold:.2f}x)")
+	return 1 if regressions else 0
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	sub = parser.add_subparsers(dest="command", required=True)
+
+	run = sub.add_parser("run", help="time every stage on a synthetic site")
+	run.add_argument("--pages", type=int, default=200)
+	run.add_argument("--blocks", type=int, default=40, help="blocks per page")
+	run.add_argument("--mix", default="", help="feature weights, e.g. lists=1,code=3,emphasis=5")
+	run.add_argument("--seed", type=int, default=0)
+	run.add_argument("--repeat", type=int, default=3)
+	run.add_argument("--template", default=str(ROOT / "template.html"))
+	run.add_argument("-o", "--output", help="write results JSON here")
+
+	cmp = sub.add_parser("compare", help="flag stages that regressed between two runs")
+	cmp.add_argument("old")
+	cmp.add_argument("new")
+	cmp.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+
+	args = parser.parse_args()
+	if args.command == "run":
+		cmd_run(args)
+	else:
+		sys.exit(cmd_compare(args))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,198 @@
+import hashlib
+import io
+import json
+import struct
+from pathlib import Path
+
+from manifest import hash_bytes, hash_file
+
+# hex digits of the content hash kept in a fingerprinted name
+HASH_CHARS = 10
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# JPEG start-of-frame markers carry the image size; C4 (DHT), C8 (JPG)
+# and CC (DAC) share the range but are not frames
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def fingerprinted_name(rel: str, digest: str) -> str:
+	"""
+	images/tolkien.png -> images/tolkien.<hash>.png
+	"""
+	path = Path(rel)
+	stamped = f"{path.stem}.{digest[:HASH_CHARS]}{path.suffix}"
+	return path.with_name(stamped).as_posix()
+
+
+def _png_size(f):
+	head = f.read(24)
+	if len(head) < 24 or head[:8] != _PNG_SIGNATURE or head[12:16] != b"IHDR":
+		return None
+	return struct.unpack(">II", head[16:24])
+
+
+def _jpeg_size(f):
+	if f.read(2) != b"\xff\xd8":
+		return None
+	while True:
+		byte = f.read(1)
+		while byte and byte != b"\xff":
+			byte = f.read(1)
+		while byte == b"\xff":
+			byte = f.read(1)
+		if not byte:
+			return None
+		marker = byte[0]
+		if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+			# standalone markers have no length field
+			continue
+		length = f.read(2)
+		if len(length) < 2:
+			return None
+		(size,) = struct.unpack(">H", length)
+		if marker in _JPEG_SOF:
+			frame = f.read(5)
+			if len(frame) < 5:
+				return None
+			height, width = struct.unpack(">xHH", frame)
+			return width, height
+		f.seek(size - 2, 1)
+
+
+def image_size(path, data=None):
+	"""
+	(width, height) read from a PNG or JPEG header, or None for other
+	files. Only the header (up to the first frame marker) is read, from
+	data (the file's bytes) if given, else from the file at path.
+	"""
+	suffix = Path(path).suffix.lower()
+	if suffix == ".png":
+		reader = _png_size
+	elif suffix in (".jpg", ".jpeg"):
+		reader = _jpeg_size
+	else:
+		return None
+	try:
+		if data is not None:
+			return reader(io.BytesIO(data))
+		with open(path, "rb") as f:
+			return reader(f)
+	except (OSError, struct.error):
+		return None
+
+
+class AssetManifest:
+	"""
+	Maps each static file (path relative to the static dir) to the
+	content-fingerprinted name it is published under, plus its pixel size
+	for images:
+
+		{"images/tolkien.png": {"path": "images/tolkien.3f2a1b9c0d.png",
+		                        "hash": ..., "size": ..., "mtime": ...,
+		                        "width": 1026, "height": 388}}
+
+	Fingerprinted files never change content, so they can be served with
+	Cache-Control: immutable. size and mtime let the next build reuse an
+	entry without hashing the file again.
+	"""
+
+	# unlike an Inliner, leaves <link rel=stylesheet> in templates alone
+	inlines_styles = False
+
+	def __init__(self, assets=None):
+		self.assets = assets if assets is not None else {}
+		self._digest = None
+
+	@classmethod
+	def load(cls, path):
+		try:
+			data = json.loads(Path(path).read_text(encoding="utf-8"))
+		except (FileNotFoundError, ValueError):
+			return cls()
+		return cls(data.get("assets", {}))
+
+	@classmethod
+	def build(cls, src_dir, previous=None):
+		"""
+		Fingerprint every file under src_dir, reusing previous (an earlier
+		AssetManifest) for files whose size and mtime are unchanged.
+		"""
+		src = Path(src_dir)
+		old = previous.assets if previous is not None else {}
+		assets = {}
+		for item in sorted(src.rglob("*")):
+			if item.is_dir():
+				continue
+			rel = item.relative_to(src).as_posix()
+			st = item.stat()
+			entry = old.get(rel)
+			if entry is None or entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime_ns:
+				digest = hash_file(item)
+				entry = {"path": fingerprinted_name(rel, digest), "hash": digest, "size": st.st_size, "mtime": st.st_mtime_ns}
+				dims = image_size(item)
+				if dims is not None:
+					entry["width"], entry["height"] = dims
+			assets[rel] = entry
+		return cls(assets)
+
+	def add(self, rel, data):
+		"""
+		Fingerprint one static file from its bytes (for sources that are
+		not on disk) and return its entry.
+		"""
+		digest = hash_bytes(data)
+		entry = {"path": fingerprinted_name(rel, digest), "hash": digest, "size": len(data)}
+		dims = image_size(rel, data)
+		if dims is not None:
+			entry["width"], entry["height"] = dims
+		self.assets[rel] = entry
+		self._digest = None
+		return entry
+
+	def to_json(self) -> str:
+		return json.dumps({"assets": dict(sorted(self.assets.items()))}, indent=1)
+
+	def output_for(self, rel: str) -> str:
+		"""
+		Published path for a static file, relative to the output dir.
+		"""
+		entry = self.assets.get(rel)
+		return entry["path"] if entry is not None else rel
+
+	def lookup(self, url):
+		"""
+		Entry for a root-relative URL ('/images/a.png', optionally with a
+		query or fragment), or None if it is not a known asset.
+		"""
+		if url.__class__ is not str or not url.startswith("/") or url.startswith("//"):
+			return None
+		path = url[1:]
+		for sep in "?#":
+			path = path.partition(sep)[0]
+		return self.assets.get(path)
+
+	def rewrite(self, url):
+		"""
+		Root-relative url with the asset path swapped for its fingerprinted
+		name; any other url is returned unchanged.
+		"""
+		entry = self.lookup(url)
+		if entry is None:
+			return url
+		path = url[1:]
+		cut = min((i for i in (path.find("?"), path.find("#")) if i != -1), default=len(path))
+		return "/" + entry["path"] + path[cut:]
+
+	def digest(self) -> str:
+		"""
+		Hash of every published name; changes whenever any asset's does.
+		"""
+		if self._digest is None:
+			h = hashlib.sha256()
+			for rel, entry in sorted(self.assets.items()):
+				h.update(f"{rel}\0{entry['path']}\0".encode("utf-8"))
+			self._digest = h.hexdigest()
+		return self._digest
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+
+from htmlnode import LeafNode, ParentNode
+
+# Blocks shorter than this are cheaper to re-parse than to read back from
+# disk, so only longer ones are written to the on-disk tier.
+DISK_MIN_CHARS = 1024
+
+
+def node_to_data(node):
+	"""
+	JSON-friendly form of an HTML subtree:
+	leaf -> ["L", tag, value, props], parent -> ["P", tag, props, [children]].
+	"""
+	props = dict(node.props) if node.props else None
+	if isinstance(node, LeafNode):
+		return ["L", node.tag, node.value, props]
+	return ["P", node.tag, props, [node_to_data(child) for child in node.children]]
+
+
+def node_from_data(data):
+	if data[0] == "L":
+		return LeafNode(data[1], data[2], data[3])
+	return ParentNode(data[1], [node_from_data(child) for child in data[3]], data[2])
+
+
+class BlockCache:
+	"""
+	Memoizes the HTML subtree built for each markdown block.
+
+	Keyed by (block type, block text), so after an edit only the blocks
+	that actually changed are parsed again. The in-process tier is an LRU
+	of at most max_entries subtrees; cached subtrees are shared between
+	page trees and must not be mutated. With a RenderCache as disk, blocks
+	of at least DISK_MIN_CHARS are also persisted across processes.
+	"""
+
+	def __init__(self, max_entries=20000, disk=None):
+		self.max_entries = max_entries
+		self.disk = disk
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, btype, block):
+		key = (btype, block)
+		node = self.entries.get(key)
+		if node is not None:
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return node
+		if self.disk is not None and len(block) >= DISK_MIN_CHARS:
+			data = self.disk.get(self.disk.key(block, btype.value, namespace="block"))
+			if data is not None:
+				node = node_from_data(data)
+				self._remember(key, node)
+				self.hits += 1
+				return node
+		self.misses += 1
+		return None
+
+	def put(self, btype, block, node):
+		self._remember((btype, block), node)
+		if self.disk is not None and len(block) >= DISK_MIN_CHARS:
+			self.disk.put(self.disk.key(block, btype.value, namespace="block"), node_to_data(node))
+
+	def _remember(self, key, node):
+		self.entries[key] = node
+		self.entries.move_to_end(key)
+		if len(self.entries) > self.max_entries:
+			self.entries.popitem(last=False)
+
+	def clear(self):
+		self.entries.clear()
+
+
+_process_cache = None
+
+
+def process_block_cache():
+	"""
+	The BlockCache shared by every render in this process (watch mode,
+	preview servers, worker processes).
+	"""
+	global _process_cache
+	if _process_cache is None:
+		_process_cache = BlockCache()
+	return _process_cache
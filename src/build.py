@@ -0,0 +1,116 @@
+import posixpath
+from collections.abc import Mapping
+from pathlib import Path, PurePosixPath
+
+from assets import AssetManifest, ASSET_MANIFEST_NAME
+from minify import minify_css
+from output import MemorySink
+from page_template import Template, load_template
+from render import render_page, RenderError
+
+
+class SiteSource:
+	"""
+	Read-only view of a site's inputs: a directory on disk, or a mapping
+	of posix paths to str/bytes contents laid out the same way
+	({"content/index.md": "# Hi", "template.html": ..., "static/a.css": ...}).
+	"""
+
+	def __init__(self, source):
+		if isinstance(source, Mapping):
+			self.root = None
+			self._files = {posixpath.normpath(name): data for name, data in source.items()}
+		else:
+			self.root = Path(source)
+			self._files = None
+
+	def files(self, prefix):
+		"""
+		Sorted paths of the files under the directory prefix, relative to it.
+		"""
+		if self._files is None:
+			base = self.root / prefix
+			if not base.is_dir():
+				return []
+			return sorted(p.relative_to(base).as_posix() for p in base.rglob("*") if p.is_file())
+		lead = posixpath.normpath(prefix) + "/"
+		return sorted(name[len(lead):] for name in self._files if name.startswith(lead))
+
+	def read_bytes(self, name) -> bytes:
+		if self._files is None:
+			return (self.root / name).read_bytes()
+		data = self._files[posixpath.normpath(str(name))]
+		return data.encode("utf-8") if isinstance(data, str) else data
+
+	def read_text(self, name) -> str:
+		if self._files is None:
+			return (self.root / name).read_text(encoding="utf-8")
+		data = self._files[posixpath.normpath(str(name))]
+		return data if isinstance(data, str) else data.decode("utf-8")
+
+	def template(self, name) -> Template:
+		if self._files is None:
+			return load_template(self.root / name)
+		base_dir = PurePosixPath(name).parent
+		return Template.compile(self.read_text(name), base_dir, read=self.read_text)
+
+
+def iter_site(source=".", basepath="/", content_dir="content", template="template.html", static_dir="static", minify=False, fingerprint=False, cache=None):
+	"""
+	Build a site from source (a directory, or a mapping as SiteSource
+	takes) without touching the output side: yields (path, bytes) for
+	every output file, static files first and then pages in path order.
+
+	Static files are passed through (CSS minified with minify, published
+	under fingerprinted names with an asset-manifest.json when
+	fingerprint). Each content/**/*.md becomes the matching .html page,
+	rendered with render_page (and a RenderCache, if given). Pages that
+	fail do not stop the others; RenderError listing every failure is
+	raised after the last page.
+
+	Nothing here depends on the working directory or on previous builds,
+	so many sites can be built in one process, sharing its block cache.
+	"""
+	site = source if isinstance(source, SiteSource) else SiteSource(source)
+	compiled = site.template(template)
+
+	assets = AssetManifest() if fingerprint else None
+	for rel in site.files(static_dir):
+		data = site.read_bytes(f"{static_dir}/{rel}")
+		if assets is not None:
+			# fingerprinted names follow the source bytes, as sync_static's do
+			assets.add(rel, data)
+		if minify and rel.endswith(".css"):
+			data = minify_css(data.decode("utf-8")).encode("utf-8")
+		yield (assets.output_for(rel) if assets is not None else rel), data
+	if assets is not None:
+		yield ASSET_MANIFEST_NAME, assets.to_json().encode("utf-8")
+
+	failures = []
+	for rel in site.files(content_dir):
+		if not rel.endswith(".md"):
+			continue
+		try:
+			md_text = site.read_text(f"{content_dir}/{rel}")
+			html = render_page(md_text, compiled, basepath, cache=cache, assets=assets, minify=minify)
+		except Exception as e:
+			failures.append((f"{content_dir}/{rel}", f"{type(e).__name__}: {e}"))
+			continue
+		yield rel[:-len(".md")] + ".html", html.encode("utf-8")
+	if failures:
+		raise RenderError(failures)
+
+
+def build_site(source=".", sink=None, basepath="/", **options):
+	"""
+	Build a site into sink (a DirectorySink, MemorySink, ZipSink or
+	TarSink; a new MemorySink by default) and return the sink. options
+	are those of iter_site. The sink is not closed: the caller owns it.
+
+		pages = build_site({"content/index.md": "# Hi", "template.html": t}).files
+	"""
+	if sink is None:
+		sink = MemorySink()
+	for path, data in iter_site(source, basepath, **options):
+		sink.write(path, data)
+	return sink
@@ -0,0 +1,160 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from output import write_if_changed
+
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt")
+
+# Below this size the compressed body plus its headers is rarely smaller
+# than the original, so no sibling is written.
+MIN_SIZE = 256
+
+
+def _gzip(data: bytes) -> bytes:
+	# mtime=0 and no file name in the header: identical input, identical bytes
+	return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli_codec():
+	try:
+		import brotli
+	except ImportError:
+		return None
+	return lambda data: brotli.compress(data, quality=11)
+
+
+def _zstd_codec():
+	try:
+		from compression import zstd
+		return lambda data: zstd.compress(data, level=19)
+	except ImportError:
+		pass
+	try:
+		import zstandard
+	except ImportError:
+		return None
+	return lambda data: zstandard.ZstdCompressor(level=19).compress(data)
+
+
+def available_encodings():
+	"""
+	Sibling suffix -> compress function for every codec importable here.
+	gzip is always present; brotli and zstd are used when installed.
+	"""
+	codecs = {".gz": _gzip}
+	for suffix, codec in ((".br", _brotli_codec()), (".zst", _zstd_codec())):
+		if codec is not None:
+			codecs[suffix] = codec
+	return codecs
+
+
+def is_compressible(path: Path) -> bool:
+	return path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+
+
+def _sibling(path: Path, suffix: str) -> Path:
+	return path.with_name(path.name + suffix)
+
+
+def _is_stale(path: Path, suffixes, st) -> bool:
+	# siblings carry their source's mtime, so a differing (or missing)
+	# mtime means the source was written since it was last compressed
+	for suffix in suffixes:
+		try:
+			if _sibling(path, suffix).stat().st_mtime_ns != st.st_mtime_ns:
+				return True
+		except FileNotFoundError:
+			return True
+	return False
+
+
+def compress_file(path, suffixes=None):
+	"""
+	Write max-level compressed siblings (index.html -> index.html.gz, ...)
+	of path for each encoding suffix, atomically. Each sibling gets the
+	source's mtime, which is how later builds tell it is current.
+	Returns [(sibling, status)] with write_if_changed statuses.
+	"""
+	path = Path(path)
+	codecs = available_encodings()
+	if suffixes is not None:
+		codecs = {s: codecs[s] for s in suffixes if s in codecs}
+	data = path.read_bytes()
+	st = path.stat()
+	results = []
+	for suffix, codec in codecs.items():
+		sibling = _sibling(path, suffix)
+		results.append((sibling, write_if_changed(sibling, codec(data))))
+		os.utime(sibling, ns=(st.st_atime_ns, st.st_mtime_ns))
+	return results
+
+
+def _compress_in_worker(task):
+	path, suffixes = task
+	return compress_file(path, suffixes)
+
+
+def compress_outputs(root, jobs=1, changes=None, keep=()):
+	"""
+	Pre-compress every compressible file under root into siblings that a
+	web server can send as-is (nginx gzip_static, Caddy precompressed).
+
+	Files of at least MIN_SIZE bytes whose siblings are missing or do not
+	carry the file's mtime are compressed, on a process pool when jobs > 1.
+	Siblings whose source is gone (or became too small) are deleted,
+	except paths relative to root listed in keep (e.g. static files that
+	ship pre-compressed). Writes and deletions are recorded in changes.
+
+	Returns (compressed, skipped, removed) counts of source files.
+	"""
+	root = Path(root)
+	suffixes = tuple(available_encodings())
+	keep = set(keep)
+
+	stale = []
+	skipped = 0
+	orphans = []
+	for path in sorted(root.rglob("*")):
+		if path.suffix in suffixes:
+			source = path.with_name(path.stem)
+			if not is_compressible(source) or path.relative_to(root).as_posix() in keep:
+				continue
+			try:
+				too_small = source.stat().st_size < MIN_SIZE
+			except FileNotFoundError:
+				too_small = True
+			if too_small:
+				orphans.append(path)
+			continue
+		if not is_compressible(path) or not path.is_file():
+			continue
+		st = path.stat()
+		if st.st_size < MIN_SIZE:
+			continue
+		if _is_stale(path, suffixes, st):
+			stale.append(path)
+		else:
+			skipped += 1
+
+	tasks = [(path, suffixes) for path in stale]
+	if jobs > 1 and len(tasks) > 1:
+		with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+			results = list(pool.map(_compress_in_worker, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+	else:
+		results = [_compress_in_worker(task) for task in tasks]
+
+	if changes is not None:
+		for written in results:
+			for sibling, status in written:
+				changes.record(sibling, status)
+
+	removed_sources = set()
+	for path in orphans:
+		path.unlink()
+		removed_sources.add(path.with_name(path.stem))
+		if changes is not None:
+			changes.record(path, "deleted")
+
+	return len(stale), skipped, len(removed_sources)
@@ -0,0 +1,207 @@
+import re
+from collections import OrderedDict
+from types import MappingProxyType
+
+from htmlnode import LeafNode, ParentNode
+
+# Token classes, written as <span class="hl-...">:
+#   kw keyword, bi builtin, str string, num number, com comment,
+#   lit true/false/null, key JSON object key, var shell variable,
+#   fn name being defined, deco decorator
+CLASS_PREFIX = "hl-"
+
+_INFO_RE = re.compile(r"[\w+#.-]+")
+
+_PY_KEYWORDS = (
+	"False None True and as assert async await break class continue def del elif else except finally "
+	"for from global if import in is lambda nonlocal not or pass raise return try while with yield"
+).split()
+_PY_BUILTINS = (
+	"abs all any bool bytes dict enumerate filter float format getattr hasattr int isinstance iter len list "
+	"map max min next object open print range repr reversed set sorted str sum super tuple type zip self cls"
+).split()
+_SH_KEYWORDS = "if then else elif fi for while until do done case esac in function return local export".split()
+_SH_BUILTINS = "echo cd printf read set unset source alias exit test pwd eval exec trap shift".split()
+_JS_KEYWORDS = (
+	"async await break case catch class const continue debugger default delete do else export extends "
+	"finally for from function if import in instanceof let new of return static super switch this throw "
+	"try typeof var void while yield"
+).split()
+_JS_LITERALS = "true false null undefined NaN Infinity".split()
+_JS_BUILTINS = "console document window Math JSON Promise Object Array String Number Date Map Set Error".split()
+
+
+def _words(words):
+	return r"\b(?:" + "|".join(sorted(words, key=len, reverse=True)) + r")\b"
+
+
+class Lexer:
+	"""
+	A regex lexer: rules are (class, pattern) pairs tried in order at each
+	position (leftmost match wins, then the earliest rule); text between
+	matches is plain.
+	"""
+
+	def __init__(self, rules):
+		self.classes = [cls for cls, _ in rules]
+		self.regex = re.compile("|".join(f"(?P<t{i}>{pattern})" for i, (_, pattern) in enumerate(rules)), re.M)
+
+	def tokens(self, code):
+		"""
+		[(class or None, text)] covering code exactly.
+		"""
+		out = []
+		pos = 0
+		for m in self.regex.finditer(code):
+			if not m.group(0):
+				continue
+			if m.start() > pos:
+				out.append((None, code[pos:m.start()]))
+			out.append((self.classes[int(m.lastgroup[1:])], m.group(0)))
+			pos = m.end()
+		if pos < len(code):
+			out.append((None, code[pos:]))
+		return out
+
+
+PYTHON = Lexer([
+	("com", r"#[^\n]*"),
+	("str", r"(?i:[rbfu]{0,2})(?:\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?'''|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*')"),
+	("deco", r"(?<!\S)@[\w.]+"),
+	("fn", r"(?<=\bdef )\w+|(?<=\bclass )\w+"),
+	("kw", _words(_PY_KEYWORDS)),
+	("bi", _words(_PY_BUILTINS)),
+	("num", r"\b(?:0[xob][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b"),
+])
+
+SHELL = Lexer([
+	("com", r"(?<!\S)#[^\n]*"),
+	("str", r"\"(?:\\.|[^\"\\])*\"|'[^']*'"),
+	("var", r"\$(?:\{[^}\n]*\}|\w+|[@*#?$!0-9])"),
+	("kw", _words(_SH_KEYWORDS)),
+	("bi", _words(_SH_BUILTINS)),
+	("num", r"\b\d+\b"),
+])
+
+JSON = Lexer([
+	("key", r"\"(?:\\.|[^\"\\])*\"(?=\s*:)"),
+	("str", r"\"(?:\\.|[^\"\\])*\""),
+	("lit", r"\b(?:true|false|null)\b"),
+	("num", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+])
+
+JAVASCRIPT = Lexer([
+	("com", r"//[^\n]*|/\*[\s\S]*?\*/"),
+	("str", r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`"),
+	("fn", r"(?<=\bfunction )\w+|(?<=\bclass )\w+"),
+	("kw", _words(_JS_KEYWORDS)),
+	("lit", _words(_JS_LITERALS)),
+	("bi", _words(_JS_BUILTINS)),
+	("num", r"\b(?:0[xob][\da-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?n?)\b"),
+])
+
+LEXERS = {
+	"python": PYTHON, "py": PYTHON, "python3": PYTHON,
+	"shell": SHELL, "sh": SHELL, "bash": SHELL, "zsh": SHELL, "console": SHELL,
+	"json": JSON,
+	"javascript": JAVASCRIPT, "js": JAVASCRIPT, "mjs": JAVASCRIPT, "node": JAVASCRIPT,
+}
+
+
+def split_info(inner):
+	"""
+	Split the text between the fences into (language, code). The info
+	string is the opening fence line, its first word the language; without
+	one (or for a one-line fence) language is None and code is inner.
+	Code keeps its leading newline either way, so a fence renders the
+	same with or without a language.
+	"""
+	nl = inner.find("\n")
+	info = inner[:nl].strip() if nl > 0 else ""
+	if not info:
+		return None, inner
+	word = info.split()[0]
+	return (word.lower() if _INFO_RE.fullmatch(word) else None), inner[nl:]
+
+
+# read-only and shared, like textnode's link props: one mapping per class
+_PROPS = {}
+
+
+def _span_props(cls):
+	props = _PROPS.get(cls)
+	if props is None:
+		props = _PROPS[cls] = MappingProxyType({"class": CLASS_PREFIX + cls})
+	return props
+
+
+class HighlightCache:
+	"""
+	Memoizes token lists by (language, code): an LRU of at most
+	max_entries in memory and, with a RenderCache as disk, entries shared
+	across processes and builds, since the same snippets recur on many
+	pages.
+	"""
+
+	def __init__(self, max_entries=4096, disk=None):
+		self.max_entries = max_entries
+		self.disk = disk
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def tokens(self, lang, code):
+		key = (lang, code)
+		tokens = self.entries.get(key)
+		if tokens is not None:
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return tokens
+		disk_key = self.disk.key(code, lang, namespace="highlight") if self.disk is not None else None
+		if disk_key is not None:
+			data = self.disk.get(disk_key)
+			if data is not None:
+				tokens = [tuple(t) for t in data]
+		if tokens is None:
+			self.misses += 1
+			tokens = LEXERS[lang].tokens(code)
+			if disk_key is not None:
+				self.disk.put(disk_key, tokens)
+		else:
+			self.hits += 1
+		self.entries[key] = tokens
+		if len(self.entries) > self.max_entries:
+			self.entries.popitem(last=False)
+		return tokens
+
+
+_process_cache = None
+
+
+def process_highlight_cache():
+	"""
+	The HighlightCache shared by every render in this process.
+	"""
+	global _process_cache
+	if _process_cache is None:
+		_process_cache = HighlightCache()
+	return _process_cache
+
+
+def code_node(code, lang=None, cache=None):
+	"""
+	The <code> element for a fenced block: class="language-<lang>" when
+	the fence names one, with the code split into <span class="hl-...">
+	tokens if a built-in lexer knows the language.
+	"""
+	if lang is None:
+		return LeafNode("code", code)
+	props = {"class": f"language-{lang}"}
+	if lang not in LEXERS or not code:
+		return LeafNode("code", code, props)
+	cache = cache if cache is not None else process_highlight_cache()
+	children = [
+		LeafNode(None, text) if cls is None else LeafNode("span", text, _span_props(cls))
+		for cls, text in cache.tokens(lang, code)
+	]
+	return ParentNode("code", children, props)
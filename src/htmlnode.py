@@ -1,43 +1,162 @@
+import re
+import sys
+
+# Elements whose content must keep its whitespace byte for byte.
+PRESERVE_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+
+VOID_TAGS = frozenset((
+	"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+))
+
+# an attribute value needs no quotes unless it is empty or contains one of these
+_UNSAFE_UNQUOTED_RE = re.compile(r"[\s\"'=<>`]")
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def can_unquote(value: str) -> bool:
+	return bool(value) and not _UNSAFE_UNQUOTED_RE.search(value)
+
+
+def escape_text(text):
+	"""
+	Escape &, < and > for element content. The membership tests make the
+	common case (nothing to escape) a few C-level scans with no copies.
+	"""
+	if "&" in text:
+		text = text.replace("&", "&amp;")
+	if "<" in text:
+		text = text.replace("<", "&lt;")
+	if ">" in text:
+		text = text.replace(">", "&gt;")
+	return text
+
+
+def escape_attr(value):
+	"""
+	Escape an attribute value for use inside double quotes.
+	"""
+	value = escape_text(str(value))
+	if '"' in value:
+		value = value.replace('"', "&quot;")
+	return value
+
+
+# attributes holding URLs that a basepath applies to
+URL_ATTRS = ("href", "src")
+
+
+def prefix_url(url, basepath):
+	"""
+	Prefix a root-relative URL ('/x', not '//host/x') with basepath, which
+	must already be normalized to '/prefix/'.
+	"""
+	if basepath is None or basepath == "/":
+		return url
+	if url.__class__ is str and url.startswith("/") and not url.startswith("//"):
+		return basepath + url[1:]
+	return url
 
 
 class HTMLNode:
+	# slotted: no per-instance __dict__, which dominates the size of small nodes
+	__slots__ = ("tag", "value", "children", "props", "_props_html")
+
 	def __init__(self, tag=None, value=None, children=None, props=None):
-		self.tag = tag
+		# interned so every "p"/"li"/"a" in every tree shares one string
+		self.tag = sys.intern(tag) if tag.__class__ is str else tag
 		self.value = value
 		self.children = children
 		self.props = props
+		# (props dict, basepath, assets, minify, (rendered, saved)); see _attrs
+		self._props_html = None
 
-	def to_html(self):
+	def to_html(self, basepath=None, assets=None, minify=False):
 		raise NotImplementedError("Subclasses should implement this!")
 
-	def props_to_html(self):
+	def write_html(self, fp, basepath=None, assets=None):
+		"""
+		Serialize this node into fp (anything with a write(str) method).
+		"""
+		_serialize(self, fp.write, basepath, assets)
+
+	def props_to_html(self, basepath=None, assets=None, minify=False):
+		"""
+		Render props as attributes. With a basepath ('/prefix/'), root-relative
+		href/src values are prefixed with it as they are written. With an
+		AssetManifest, href/src of known assets point at their fingerprinted
+		names, and an img gets the asset's width/height unless it has its own;
+		with an Inliner, small images' src is their data: URI.
+		With minify, values that do not need quotes are written without.
+		"""
+		return self._attrs(basepath, assets, minify)[0]
+
+	def _attrs(self, basepath, assets, minify):
+		# (rendered, bytes saved by minify)
 		if not self.props:
-			return ""
+			return "", 0
 
-		return "".join([f' {key}="{value}"' for key, value in self.props.items()])
+		# cached per props object, basepath, asset manifest and minify; assigning
+		# a new dict invalidates it, mutating the dict in place after rendering does not
+		cached = self._props_html
+		if (
+			cached is not None and cached[0] is self.props and cached[1] == basepath and
+			cached[2] is assets and cached[3] == minify
+		):
+			return cached[4]
+		parts = []
+		size = None
+		saved = 0
+		for key, value in self.props.items():
+			if key in URL_ATTRS:
+				if assets is not None:
+					entry = assets.lookup(value)
+					if entry is not None:
+						inline = entry.get("inline") if self.tag == "img" and key == "src" else None
+						value = inline if inline is not None else assets.rewrite(value)
+						if self.tag == "img" and "width" in entry and "width" not in self.props and "height" not in self.props:
+							size = entry
+				if basepath is not None:
+					value = prefix_url(value, basepath)
+			value = escape_attr(value)
+			if minify and can_unquote(value):
+				parts.append(f" {key}={value}")
+				saved += 2
+			else:
+				parts.append(f' {key}="{value}"')
+		if size is not None:
+			if minify:
+				parts.append(f' width={size["width"]} height={size["height"]}')
+				saved += 4
+			else:
+				parts.append(f' width="{size["width"]}" height="{size["height"]}"')
+		result = ("".join(parts), saved)
+		self._props_html = (self.props, basepath, assets, minify, result)
+		return result
 
 	def __repr__(self):
 		return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
 
 
 class LeafNode(HTMLNode):
+	__slots__ = ()
+
 	def __init__(self, tag, value, props=None):
 		if value is None:
 			raise ValueError("LeafNode must have a value")
 		super().__init__(tag, value, None, props)
 
-	def to_html(self):
-		if self.value is None:
-			raise ValueError("LeafNode must have a value")
-
-		if self.tag is None:
-			return self.value
-
-		props_str = self.props_to_html()
-		return f"<{self.tag}{props_str}>{self.value}</{self.tag}>"
+	def to_html(self, basepath=None, assets=None, minify=False):
+		if minify:
+			return serialize_minified(self, basepath, assets)[0]
+		parts = []
+		_serialize(self, parts.append, basepath, assets)
+		return "".join(parts)
 
 
 class ParentNode(HTMLNode):
+	__slots__ = ()
+
 	def __init__(self, tag, children, props=None):
 		if not tag:
 			raise ValueError("ParentNode must have a tag")
@@ -45,12 +164,171 @@ class ParentNode(HTMLNode):
 			raise ValueError("ParentNode must have children")
 		super().__init__(tag, None, children, props)
 
-	def to_html(self):
-		if not self.tag:
-			raise ValueError("ParentNode must have a tag")
-		if not self.children:
-			raise ValueError("ParentNode must have children")
+	def to_html(self, basepath=None, assets=None, minify=False):
+		if minify:
+			return serialize_minified(self, basepath, assets)[0]
+		parts = []
+		_serialize(self, parts.append, basepath, assets)
+		return "".join(parts)
+
+
+def _serialize(root, write, basepath=None, assets=None):
+	"""
+	Write root as HTML through write() without recursion.
+
+	The stack holds nodes still to open and closing-tag strings still to
+	emit, so every byte goes straight to the output once and nesting depth
+	is bounded by memory rather than the interpreter's recursion limit.
+	"""
+	stack = [root]
+	pop = stack.pop
+	push = stack.append
+	extend = stack.extend
+	while stack:
+		node = pop()
+		cls = node.__class__
+		if cls is str:
+			write(node)
+			continue
+
+		if cls is LeafNode or isinstance(node, LeafNode):
+			value = node.value
+			if value is None:
+				raise ValueError("LeafNode must have a value")
+			if "&" in value or "<" in value or ">" in value:
+				value = escape_text(value)
+			tag = node.tag
+			if tag is None:
+				write(value)
+			elif node.props:
+				write(f"<{tag}{node.props_to_html(basepath, assets)}>{value}</{tag}>")
+			else:
+				write(f"<{tag}>{value}</{tag}>")
+
+		elif cls is ParentNode or isinstance(node, ParentNode):
+			tag = node.tag
+			if not tag:
+				raise ValueError("ParentNode must have a tag")
+			children = node.children
+			if not children:
+				raise ValueError("ParentNode must have children")
+			write(f"<{tag}{node.props_to_html(basepath, assets)}>" if node.props else f"<{tag}>")
+			push(f"</{tag}>")
+			extend(reversed(children))
+
+		else:
+			write(node.to_html(basepath, assets))
+
+
+# A </p> may be left out when the next sibling starts with one of these...
+_CLOSES_P = frozenset((
+	"address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figcaption",
+	"figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr", "main",
+	"menu", "nav", "ol", "p", "pre", "section", "table", "ul",
+))
+# ...or when it is the last child, unless the parent is one of these.
+_P_KEEP_PARENTS = frozenset(("a", "audio", "del", "ins", "map", "noscript", "video"))
+_TABLE_CELLS = frozenset(("td", "th"))
+_TABLE_BODIES = frozenset(("tbody", "tfoot"))
+
+
+class _End:
+	# closing tag still to emit in _serialize_minified
+	__slots__ = ("tag", "preserve")
+
+	def __init__(self, tag, preserve):
+		self.tag = tag
+		self.preserve = preserve
+
+
+def _may_omit_end(tag, nxt):
+	"""
+	Whether </tag> is optional given what is written next: nxt is the
+	next sibling node, the parent's _End, or None (end of the tree).
+	"""
+	if nxt is None:
+		return False
+	if tag == "li":
+		return nxt.__class__ is _End or nxt.tag == "li"
+	if tag in _TABLE_CELLS:
+		return nxt.__class__ is _End or nxt.tag in _TABLE_CELLS
+	if tag == "tr":
+		return nxt.__class__ is _End or nxt.tag == "tr"
+	if tag == "thead":
+		return nxt.__class__ is not _End and nxt.tag in _TABLE_BODIES
+	if tag == "tbody":
+		return nxt.__class__ is _End or nxt.tag in _TABLE_BODIES
+	if tag == "p":
+		if nxt.__class__ is _End:
+			return nxt.tag not in _P_KEEP_PARENTS
+		return nxt.tag in _CLOSES_P
+	return False
+
+
+def serialize_minified(root, basepath=None, assets=None):
+	"""
+	Serialize root like to_html, minified: unneeded attribute quotes and
+	optional </p>, </li>, table and void-element end tags are left out, and
+	whitespace runs in text collapse to one space except inside
+	pre/code/textarea/script/style. Returns (html, bytes saved) so callers
+	can report the savings without serializing twice.
+	"""
+	out = []
+	write = out.append
+	saved = 0
+	preserve = 0
+	stack = [root]
+	pop = stack.pop
+	push = stack.append
+	while stack:
+		node = pop()
+		if node.__class__ is _End:
+			tag = node.tag
+			if node.preserve:
+				preserve -= 1
+			if _may_omit_end(tag, stack[-1] if stack else None):
+				saved += len(tag) + 3
+			else:
+				write(f"</{tag}>")
+			continue
+
+		tag = node.tag
+		if isinstance(node, LeafNode):
+			value = node.value
+			if value is None:
+				raise ValueError("LeafNode must have a value")
+			if not preserve and tag not in PRESERVE_TAGS and ("\n" in value or "  " in value or "\t" in value):
+				collapsed = WHITESPACE_RE.sub(" ", value)
+				# in bytes: the runs may hold non-ASCII whitespace
+				saved += len(value.encode("utf-8")) - len(collapsed.encode("utf-8"))
+				value = collapsed
+			if "&" in value or "<" in value or ">" in value:
+				value = escape_text(value)
+			if tag is None:
+				write(value)
+				continue
+			attrs, attr_saved = node._attrs(basepath, assets, True)
+			saved += attr_saved
+			if tag in VOID_TAGS and not value:
+				write(f"<{tag}{attrs}>")
+				saved += len(tag) + 3
+			else:
+				write(f"<{tag}{attrs}>{value}</{tag}>")
+
+		elif isinstance(node, ParentNode):
+			if not tag:
+				raise ValueError("ParentNode must have a tag")
+			if not node.children:
+				raise ValueError("ParentNode must have children")
+			attrs, attr_saved = node._attrs(basepath, assets, True)
+			saved += attr_saved
+			write(f"<{tag}{attrs}>")
+			keep = tag in PRESERVE_TAGS
+			if keep:
+				preserve += 1
+			push(_End(tag, keep))
+			stack.extend(reversed(node.children))
 
-		children_html = "".join([child.to_html() for child in self.children])
-		props_str = self.props_to_html()
-		return f"<{self.tag}{props_str}>{children_html}</{self.tag}>"
+		else:
+			write(node.to_html(basepath, assets))
+	return "".join(out), saved
@@ -0,0 +1,215 @@
+import base64
+import hashlib
+import re
+from pathlib import Path
+
+from assets import image_size
+from htmlnode import can_unquote
+from manifest import hash_file
+from minify import minify_css
+
+DEFAULT_CSS_MAX = 8 * 1024
+DEFAULT_IMAGE_MAX = 4 * 1024
+
+IMAGE_TYPES = {
+	".png": "image/png",
+	".jpg": "image/jpeg",
+	".jpeg": "image/jpeg",
+	".gif": "image/gif",
+	".webp": "image/webp",
+	".svg": "image/svg+xml",
+}
+
+_TYPE_SELECTOR_RE = re.compile(r"(?:^|[\s>+~(,])([a-zA-Z][\w-]*)")
+_STRING_OR_BRACE_RE = re.compile(r""""(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[{}]""")
+
+# at-rules whose blocks hold rules to filter; any other at-rule
+# (@font-face, @keyframes, ...) is kept whole
+_NESTED_AT_RULES = ("@media", "@supports", "@layer")
+
+
+def tree_tags(root):
+	"""
+	Names of every element in an HTML tree.
+	"""
+	tags = set()
+	stack = [root]
+	while stack:
+		node = stack.pop()
+		if node.tag is not None:
+			tags.add(node.tag)
+		if node.children:
+			stack.extend(node.children)
+	return tags
+
+
+def split_rules(css: str):
+	"""
+	Top-level (prelude, body) pairs of a stylesheet; body is None for
+	block-less statements such as @import. Braces in strings are skipped.
+	"""
+	rules = []
+	depth = 0
+	start = 0
+	body_start = 0
+	for m in _STRING_OR_BRACE_RE.finditer(css):
+		token = m.group(0)
+		if token == "{":
+			if depth == 0:
+				prelude_end = m.start()
+				body_start = m.end()
+			depth += 1
+		elif token == "}":
+			depth -= 1
+			if depth == 0:
+				prelude = css[start:prelude_end]
+				# block-less statements (@import ...;) before the prelude
+				while ";" in prelude:
+					statement, prelude = prelude.split(";", 1)
+					if statement.strip():
+						rules.append((statement.strip(), None))
+				rules.append((prelude.strip(), css[body_start:m.start()]))
+				start = m.end()
+	for statement in css[start:].split(";"):
+		if statement.strip():
+			rules.append((statement.strip(), None))
+	return rules
+
+
+def selector_matches(selector: str, tags) -> bool:
+	"""
+	Whether every type selector in selector names a tag in tags (so it
+	may match on this page). Attribute values and pseudo-class arguments
+	are ignored; selectors without type names ('.x', '*') always match.
+	"""
+	bare = re.sub(r"\[[^\]]*\]|::?[\w-]+(\([^)]*\))?", "", selector)
+	return all(name.lower() in tags for name in _TYPE_SELECTOR_RE.findall(bare))
+
+
+def critical_css(css: str, tags) -> str:
+	"""
+	The rules of css that can apply to a page using only tags: each rule
+	keeps the selectors that may match, and rules with none are dropped.
+	@media/@supports/@layer blocks are filtered the same way.
+	"""
+	out = []
+	for prelude, body in split_rules(css):
+		if body is None:
+			out.append(prelude + ";")
+		elif prelude.startswith("@"):
+			if prelude.split(None, 1)[0].lower() in _NESTED_AT_RULES:
+				inner = critical_css(body, tags)
+				if inner:
+					out.append(f"{prelude}{{{inner}}}")
+			else:
+				out.append(f"{prelude}{{{body}}}")
+		else:
+			selectors = [s for s in prelude.split(",") if selector_matches(s.strip(), tags)]
+			if selectors:
+				out.append(f"{','.join(s.strip() for s in selectors)}{{{body}}}")
+	return "".join(out)
+
+
+class Inliner:
+	"""
+	Inlines small static assets into pages.
+
+	Used in place of (and wrapping) the AssetManifest handed to the
+	serializer and templates: image src of static images of at most
+	image_max bytes become data: URIs, and each <link rel=stylesheet> to a
+	static stylesheet in the template becomes a <style> with the whole
+	stylesheet if it is at most css_max bytes, or else only the rules the
+	page's tags can use, with the full stylesheet loaded without blocking
+	rendering.
+
+	Everything is read and encoded once when the Inliner is built and
+	keyed by content hash, so identical files share one encoding; the
+	per-page critical CSS is cached per stylesheet hash and tag set.
+	"""
+
+	inlines_styles = True
+
+	def __init__(self, static_dir, assets=None, css_max=DEFAULT_CSS_MAX, image_max=DEFAULT_IMAGE_MAX):
+		self.assets = assets
+		self.css_max = css_max
+		self.image_max = image_max
+		self.images = {}
+		self.styles = {}
+		self._critical = {}
+		encoded = {}
+		h = hashlib.sha256(f"{assets.digest() if assets is not None else ''}\0{css_max}\0{image_max}".encode("utf-8"))
+
+		static = Path(static_dir)
+		for item in sorted(static.rglob("*")) if static.is_dir() else ():
+			suffix = item.suffix.lower()
+			if item.is_dir() or (suffix != ".css" and suffix not in IMAGE_TYPES):
+				continue
+			rel = item.relative_to(static).as_posix()
+			if suffix in IMAGE_TYPES and item.stat().st_size > image_max:
+				continue
+			entry = assets.assets.get(rel) if assets is not None else None
+			digest = entry["hash"] if entry is not None else hash_file(item)
+			h.update(f"\0{rel}\0{digest}".encode("utf-8"))
+			if digest not in encoded:
+				if suffix == ".css":
+					encoded[digest] = minify_css(item.read_text(encoding="utf-8"))
+				else:
+					data = base64.b64encode(item.read_bytes()).decode("ascii")
+					encoded[digest] = f"data:{IMAGE_TYPES[suffix]};base64,{data}"
+			if suffix == ".css":
+				self.styles[rel] = (digest, encoded[digest])
+			else:
+				image = {"inline": encoded[digest]}
+				dims = image_size(item)
+				if dims is not None:
+					image["width"], image["height"] = dims
+				self.images[rel] = image
+		self._digest = h.hexdigest()
+
+	def digest(self) -> str:
+		return self._digest
+
+	def lookup(self, url):
+		"""
+		Asset entry for a root-relative URL, as AssetManifest.lookup; small
+		images carry their data: URI under "inline".
+		"""
+		if url.__class__ is str and url.startswith("/") and not url.startswith("//"):
+			image = self.images.get(url[1:].split("?", 1)[0].split("#", 1)[0])
+			if image is not None:
+				return image
+		return self.assets.lookup(url) if self.assets is not None else None
+
+	def rewrite(self, url):
+		return self.assets.rewrite(url) if self.assets is not None else url
+
+	def style_html(self, url, tags, basepath="/", minify=False) -> str:
+		"""
+		What replaces <link rel=stylesheet href=url> on a page using tags.
+		"""
+		rel = url[1:].split("?", 1)[0].split("#", 1)[0]
+		digest, css = self.styles[rel]
+		if len(css.encode("utf-8")) <= self.css_max:
+			return f"<style>{css}</style>"
+		key = (digest, tags)
+		critical = self._critical.get(key)
+		if critical is None:
+			critical = self._critical[key] = critical_css(css, tags)
+		href = self.rewrite(url)
+		if basepath != "/":
+			href = basepath + href[1:]
+		if minify and can_unquote(href):
+			link = f"<link href={href} rel=stylesheet"
+		else:
+			link = f'<link href="{href}" rel="stylesheet"'
+		return (
+			f"<style>{critical}</style>"
+			f"{link} media=\"print\" onload=\"this.media='all'\">"
+			f"<noscript>{link}></noscript>"
+		)
+
+	def inlines(self, url) -> bool:
+		"""
+		Whether url is a static stylesheet this Inliner replaces.
+		"""
+		return url[1:].split("?", 1)[0].split("#", 1)[0] in self.styles
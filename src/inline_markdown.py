@@ -1,16 +1,17 @@
 import re
+from syntax import default_registry
 from textnode import TextNode, TextType
-from splitnodes import split_nodes_delimiter
+
+# ![alt](url)
+_IMAGE_RE = re.compile(r'!\[(.*?)\]\((.*?)\)')
+# [text](url) but NOT images (exclude leading '!')
+_LINK_RE = re.compile(r'(?<!!)\[(.*?)\]\((.*?)\)')
 
 def extract_markdown_images(text):
-	# ![alt](url)
-	pattern = r'!\[(.*?)\]\((.*?)\)'
-	return re.findall(pattern, text)
+	return _IMAGE_RE.findall(text)
 
 def extract_markdown_links(text):
-	# [text](url) but NOT images (exclude leading '!')
-	pattern = r'(?<!!)\[(.*?)\]\((.*?)\)'
-	return re.findall(pattern, text)
+	return _LINK_RE.findall(text)
 
 
 def split_nodes_image(old_nodes):
@@ -53,11 +54,151 @@ def split_nodes_link(old_nodes):
 			new_nodes.append(TextNode(node.text[pos:], TextType.TEXT))
 	return new_nodes
 
-def text_to_textnodes(text):
-	nodes = [TextNode(text, TextType.TEXT)]
-	nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-	nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-	nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-	nodes = split_nodes_image(nodes)
-	nodes = split_nodes_link(nodes)
+class _Finder:
+	"""
+	str.find over text[lo:hi] that remembers the last hit per marker.
+
+	The scanner only ever moves forward, so a remembered hit at or after
+	the new start is still the first occurrence, and a remembered miss
+	stays a miss. That makes repeated searches (e.g. many '[' with no ']')
+	amortized linear instead of quadratic.
+	"""
+
+	def __init__(self, text, hi):
+		self.text = text
+		self.hi = hi
+		self.hits = {}
+
+	def find(self, marker, start):
+		hit = self.hits.get(marker)
+		if hit is not None and (hit == -1 or hit >= start):
+			return hit
+		hit = self.text.find(marker, start, self.hi)
+		self.hits[marker] = hit
+		return hit
+
+
+# delimiter -> node type for paired inline spans; code spans are not nested
+_DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC}
+
+# characters that can start core inline markup; with those triggering
+# registered rules they make up the only positions the scanner stops at,
+# everything else is skipped by the regex engine instead of one Python
+# loop iteration per character
+_CORE_SPECIAL = "`_*!["
+
+
+def _span_node(text_type, nodes, raw, url=None):
+	# a span whose content is plain text stays a leaf, as before
+	if not nodes:
+		return TextNode(raw, text_type, url)
+	if len(nodes) == 1 and nodes[0].text_type == TextType.TEXT:
+		return TextNode(nodes[0].text, text_type, url)
+	plain = "".join(n.text for n in nodes)
+	return TextNode(plain, text_type, url, children=nodes)
+
+
+def _scan(text, lo, hi, strict, registry):
+	"""
+	Tokenize text[lo:hi] into TextNodes in a single forward pass.
+
+	Bold, italic and link content is scanned again as a nested span, which
+	bounds the total work at a small constant times the input: a span of
+	one kind cannot contain another of the same kind, since its closer is
+	the first one found. In strict mode an unmatched delimiter raises
+	ValueError (the top-level behaviour of the old split passes); inside
+	nested spans it is kept as literal text.
+
+	Registered inline rules are tried, in priority order, only at their
+	trigger characters, before the core markup starting there.
+	"""
+	nodes = []
+	finder = _Finder(text, hi)
+	next_special = registry.special_re(_CORE_SPECIAL).search
+	rule_table = registry.inline_table()
+	pending = lo
+	i = lo
+
+	def flush(end):
+		if end > pending:
+			nodes.append(TextNode(text[pending:end], TextType.TEXT))
+
+	def span(text_type, start, end, url=None):
+		return _span_node(text_type, _scan(text, start, end, False, registry), text[start:end], url)
+
+	while i < hi:
+		m = next_special(text, i, hi)
+		if m is None:
+			break
+		i = m.start()
+		c = text[i]
+
+		rules = rule_table.get(c)
+		if rules is not None:
+			found = None
+			for rule in rules:
+				found = rule.parse(text, i, hi, finder.find, span)
+				if found is not None:
+					break
+			if found is not None:
+				flush(i)
+				nodes.append(found[0])
+				i = pending = found[1]
+				continue
+			if c not in _CORE_SPECIAL:
+				i += 1
+				continue
+
+		if c == "`" or c == "_" or (c == "*" and text.startswith("**", i, hi)):
+			delim = "**" if c == "*" else c
+			start = i + len(delim)
+			close = finder.find(delim, start)
+			if close == -1:
+				if strict:
+					raise ValueError(f"Unmatched delimiter {delim} in: {text[lo:hi]}")
+				i = start
+				continue
+			flush(i)
+			if close > start:
+				if delim == "`":
+					nodes.append(TextNode(text[start:close], TextType.CODE))
+				else:
+					nodes.append(span(_DELIMITERS[delim], start, close))
+			i = pending = close + len(delim)
+			continue
+
+		if c == "[" or (c == "!" and text.startswith("[", i + 1, hi)):
+			is_image = c == "!"
+			label_start = i + 2 if is_image else i + 1
+			label_end = finder.find("]", label_start)
+			if label_end != -1 and text.startswith("(", label_end + 1, hi):
+				url_end = finder.find(")", label_end + 2)
+				if url_end != -1:
+					flush(i)
+					url = text[label_end + 2:url_end]
+					if is_image:
+						nodes.append(TextNode(text[label_start:label_end], TextType.IMAGE, url))
+					else:
+						nodes.append(span(TextType.LINK, label_start, label_end, url))
+					i = pending = url_end + 1
+					continue
+			i += 1
+			continue
+
+		i += 1
+
+	flush(hi)
 	return nodes
+
+
+def text_to_textnodes(text, registry=None):
+	"""
+	Convert inline markdown into TextNodes with one linear-time scan.
+
+	Produces the same nodes as the chained split_nodes_* passes for flat
+	markup, and additionally nests emphasis inside links and emphasis (see
+	TextNode.children) instead of leaving the inner markers as text.
+	Inline rules come from registry (a SyntaxRegistry, the default one
+	with strikethrough if None).
+	"""
+	return _scan(text, 0, len(text), True, registry if registry is not None else default_registry())
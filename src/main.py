@@ -1,6 +1,21 @@
-from textnode import TextNode, TextType
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node, extract_title
+from render import render_pages, render_targets, RenderError
+from manifest import BuildManifest, hash_bytes, manifest_path_for
+from page_template import load_template, normalize_basepath, page_url, template_hash
+from sync import link_files, sync_dir, COPY_METHODS
+from watch import LiveReload, start_server, watch
+from profiler import BuildProfiler, clock, lap
+from render_cache import RenderCache, DEFAULT_CACHE_DIR
+from block_cache import process_block_cache
+from highlight import process_highlight_cache
+from output import OutputWriter, read_umask, remove_output, write_if_changed, write_reports
+from compress import available_encodings, compress_outputs
+from assets import AssetManifest, ASSET_MANIFEST_NAME
+from search_index import SearchIndex, INDEX_DIR, search_state_path_for
+from page_index import DEFAULT_PER_PAGE, PageIndex, page_index_state_path_for
+from minify import MinifyReport, minify_css
+from inline import DEFAULT_CSS_MAX, DEFAULT_IMAGE_MAX, Inliner
+import argparse
 import shutil
 import sys
 
@@ -15,89 +30,593 @@ def empty_dir(dst: Path):
 		else:
 			child.unlink()
 
-def copy_dir(src: Path, dst: Path):
-	# recursively copy src -> dst
-	for item in src.iterdir():
-		target = dst / item.name
-		if item.is_dir():
-			target.mkdir(exist_ok=True)
-			copy_dir(item, target)
-		else:
-			shutil.copy2(item, target)
-			print(f"copied: {item} -> {target}")
+def read_markdown(path):
+	# the text read_text() would give (universal newlines) and the hash of
+	# the very bytes it was decoded from
+	data = Path(path).read_bytes()
+	return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"), hash_bytes(data)
+
+def generate_page(from_path, template_path, out_rel, build, text=None, meta=None):
+	# render from_path once and write it to out_rel in every target of
+	# build, serialized per basepath. Returns the hash of the markdown rendered.
+	for target in build.targets:
+		print(f"Generating page from {from_path} to {target.dest / out_rel} using {template_path}")
+
+	profiler = build.profiler
+	minify = build.minify
+	timings = [] if profiler is not None else None
+	t = clock() if profiler is not None else 0.0
+	md_text, src_hash = read_markdown(from_path)
+	template = load_template(template_path)
+	lap(timings, "read", t)
+
+	saved = [] if minify is not None else None
+	pages = render_targets(
+		md_text, template, [target.basepath for target in build.targets], timings=timings, cache=build.cache,
+		assets=build.assets, text=text, minify=minify is not None, saved=saved, meta=meta
+	)
+	t = clock() if profiler is not None else 0.0
+	for i, (target, full_html) in enumerate(zip(build.targets, pages)):
+		write_page(target.dest / out_rel, full_html, target.writer)
+		if minify is not None:
+			report_minified(minify, target.dest / out_rel, full_html, saved[i])
+	lap(timings, "write", t)
+	if profiler is not None:
+		profiler.add(from_path, timings)
+	return src_hash
+
+def report_minified(report, dest_path, full_html, saved):
+	after = len(full_html.encode("utf-8"))
+	report.add(dest_path, after + saved, after)
+
+def write_page(dest_path, full_html, writer=None):
+	# atomic and skipped when the bytes on disk are already identical;
+	# with an OutputWriter the write is queued on its thread pool
+	if writer is not None:
+		writer.write(Path(dest_path), full_html)
+	else:
+		write_if_changed(dest_path, full_html)
+
+def site_inputs_hash(template_path, assets=None, minify=None) -> str:
+	# everything besides its markdown that a page's output depends on
+	t_hash = template_hash(template_path)
+	if assets is not None or minify is not None:
+		digest = assets.digest() if assets is not None else ""
+		t_hash = hash_bytes(f"{t_hash}\0{digest}\0{minify is not None}".encode("utf-8"))
+	return t_hash
 
-def copy_static_to_public(src_dir="static", dst_dir="docs"):
-	src = Path(src_dir)
-	dst = Path(dst_dir)
+class BuildTarget:
+	"""
+	One output of a build: the directory pages are written to, the
+	basepath they are served under, and that directory's own manifest,
+	OutputWriter, SearchIndex and PageIndex (each optional).
+	"""
 
-	if not src.exists() or not src.is_dir():
-		raise FileNotFoundError(f"source directory not found: {src}")
+	def __init__(self, dest, basepath="/", manifest=None, writer=None, search=None, pages=None):
+		self.dest = Path(dest)
+		self.basepath = basepath
+		self.manifest = manifest
+		self.writer = writer
+		self.search = search
+		self.pages = pages
 
-	dst.mkdir(parents=True, exist_ok=True)
-	empty_dir(dst)
-	copy_dir(src, dst)
+	@property
+	def changes(self):
+		return self.writer.changes if self.writer is not None else None
 
-def generate_page(from_path, template_path, dest_path, basepath):
-	print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+	def is_fresh(self, src_rel, src_hash, out_rel):
+		return (
+			self.manifest is not None and self.manifest.is_fresh(src_rel, src_hash, self.dest / out_rel) and
+			(self.search is None or src_rel in self.search) and (self.pages is None or src_rel in self.pages)
+		)
 
-	md_text = Path(from_path).read_text(encoding="utf-8")
-	template = Path(template_path).read_text(encoding="utf-8")
+	def record(self, src_rel, src_hash, out_rel, text, meta):
+		if self.manifest is not None:
+			self.manifest.record(src_rel, src_hash, out_rel)
+		if self.search is not None:
+			self.search.update(src_rel, page_url(self.basepath, out_rel), text)
+		if self.pages is not None:
+			self.pages.update(src_rel, out_rel, meta)
 
-	html_root = markdown_to_html_node(md_text)
-	content_html = html_root.to_html()
-	title = extract_title(md_text)
+	def forget(self, src_rel):
+		# src_rel was deleted: drop its output and index entries
+		if self.manifest is None or src_rel not in self.manifest.pages:
+			return
+		remove_output(self.dest, self.manifest.pages.pop(src_rel)["output"], self.changes)
+		if self.search is not None:
+			self.search.remove(src_rel)
+		if self.pages is not None:
+			self.pages.remove(src_rel)
 
-	full_html = template.replace("{{ Title }}", title).replace("{{ Content }}", content_html)
+	def save(self, template, site_key, build):
+		# flush queued writes, then publish the indexes and save the manifest
+		if self.writer is not None:
+			self.writer.flush()
+		if self.search is not None:
+			shards = self.search.save(self.writer)
+			print(f"search index: {shards} shard(s) updated")
+		if self.pages is not None:
+			generated = self.pages.save(template, self.basepath, site_key, build.assets, build.minify is not None, self.changes)
+			print(f"page index: {generated} listing/feed/sitemap file(s) generated")
+		if self.manifest is not None:
+			self.manifest.save()
+
+class BuildOptions:
+	"""
+	What one build shares across its pages: the BuildTargets it writes
+	(several when the same content is published under different
+	basepaths) and the optional machinery they all use.
 
-	if basepath != "/":
-		if not basepath.endswith("/"):
-			basepath = basepath + "/"
-		if not basepath.startswith("/"):
-			basepath = "/" + basepath
+	With jobs > 1 pages are rendered on a process pool. A BuildProfiler
+	records per-page stage timings. With a RenderCache, pages rendered
+	before (by any build sharing the cache) skip parsing and serializing.
+	assets is an AssetManifest, so links to static files point at their
+	fingerprinted names, or an Inliner (wrapping one, if any) that inlines
+	small images and stylesheets. With a MinifyReport, pages are written
+	minified and the bytes saved on each are added to it.
 
-	full_html = full_html.replace('href="/', f'href="{basepath}')
-	full_html = full_html.replace('src="/', f'scr="{basepath}')
+	static_dir, checksum, method, fingerprint and inline ((css_max,
+	image_max) or None) say how static files are published.
+	"""
 
-	dest = Path(dest_path)
-	dest.parent.mkdir(parents=True, exist_ok=True)
-	dest.write_text(full_html, encoding="utf-8")
+	def __init__(self, targets, jobs=1, profiler=None, cache=None, assets=None, minify=None, static_dir="static", checksum=False, method="copy", fingerprint=False, inline=None):
+		self.targets = list(targets)
+		self.jobs = jobs
+		self.profiler = profiler
+		self.cache = cache
+		self.assets = assets
+		self.minify = minify
+		self.static_dir = static_dir
+		self.checksum = checksum
+		self.method = method
+		self.fingerprint = fingerprint
+		self.inline = inline
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
+def generate_pages_recursive(dir_path_content, template_path, build):
 	"""
-	Crawl dir_path_content recursively.
-	For each .md file, render using template_path and write an .html file
-	into dest_dir_path, preserving the relative folder structure.
+	Crawl dir_path_content recursively. For each .md file, render using
+	template_path and write an .html file into every target of build (a
+	BuildOptions), preserving the relative folder structure.
+
+	A page is skipped only if it is fresh in every target: its markdown,
+	the template, the basepath, the generator version and the build's
+	assets and minify setting are unchanged since that target's manifest
+	was saved, and the target's indexes already know it. Otherwise it is
+	read and parsed once and serialized for each target's basepath, so N
+	targets cost one parse plus N serializations per page. Outputs whose
+	markdown was deleted are removed.
+
+	With jobs > 1 pages are only written once every page has rendered, so
+	a failure leaves the targets untouched. Output bytes and log order do
+	not depend on jobs. Outputs are only rewritten when their bytes
+	change. Each target's writes are flushed, then the text and metadata
+	of every rendered page go into its SearchIndex and PageIndex (whose
+	listings, feed and sitemap are regenerated where pages changed), and
+	its manifest is saved.
 	"""
 	root = Path(dir_path_content)
-	dest_root = Path(dest_dir_path)
+	targets = build.targets
+	profiler = build.profiler
+	want_text = any(target.search is not None for target in targets)
+	want_meta = any(target.pages is not None for target in targets)
+	hashed = any(target.manifest is not None for target in targets)
+
+	t_hash = None
+	if hashed or want_meta:
+		t_hash = site_inputs_hash(template_path, build.assets, build.minify)
+	for target in targets:
+		if target.manifest is not None and not target.manifest.site_inputs_match(t_hash, target.basepath):
+			target.manifest.reset(t_hash, target.basepath)
 
-	for md_file in root.rglob("*.md"):
+	seen = []
+	pending = []
+	skipped = 0
+	for md_file in sorted(root.rglob("*.md")):
 		# Compute destination path while preserving structure
 		rel = md_file.relative_to(root)               # e.g. blog/post.md
-		html_rel = rel.with_suffix(".html")           # -> blog/post.html
-		dest_path = dest_root / html_rel              # public/blog/post.html
+		out_rel = rel.with_suffix(".html").as_posix() # -> blog/post.html
 
-		# Reuse your single-file generator (it mkdirs parents)
-		generate_page(md_file, template_path, dest_path, basepath)
+		src_rel = rel.as_posix()
+		src_hash = None
+		seen.append(src_rel)
+		if hashed:
+			t = clock() if profiler is not None else 0.0
+			src_hash = hash_bytes(md_file.read_bytes())
+			if profiler is not None:
+				profiler.add(md_file, [("hash", t, clock() - t)])
+			if all(target.is_fresh(src_rel, src_hash, out_rel) for target in targets):
+				skipped += 1
+				continue
+		pending.append((md_file, src_rel, src_hash, out_rel))
 
+	minify = build.minify
+	if build.jobs > 1 and len(pending) > 1:
+		texts = [] if want_text else None
+		saved = [] if minify is not None else None
+		metas = [] if want_meta else None
+		rendered = render_pages(
+			[p[0] for p in pending], template_path, [target.basepath for target in targets], build.jobs,
+			profiler=profiler, cache=build.cache, assets=build.assets, texts=texts,
+			minify=minify is not None, saved=saved, metas=metas
+		)
+		for i, ((md_file, src_rel, src_hash, out_rel), htmls) in enumerate(zip(pending, rendered)):
+			for k, (target, full_html) in enumerate(zip(targets, htmls)):
+				dest_path = target.dest / out_rel
+				print(f"Generating page from {md_file} to {dest_path} using {template_path}")
+				t = clock() if profiler is not None else 0.0
+				write_page(dest_path, full_html, target.writer)
+				if profiler is not None:
+					profiler.add(md_file, [("write", t, clock() - t)])
+				if minify is not None:
+					report_minified(minify, dest_path, full_html, saved[i][k])
+				target.record(src_rel, src_hash, out_rel, texts[i] if want_text else None, metas[i] if want_meta else None)
+	else:
+		for md_file, src_rel, src_hash, out_rel in pending:
+			text = {} if want_text else None
+			meta = {} if want_meta else None
+			generate_page(md_file, template_path, out_rel, build, text, meta)
+			for target in targets:
+				target.record(src_rel, src_hash, out_rel, text, meta)
 
-def main():
-	basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+	for target in targets:
+		if target.writer is not None:
+			target.writer.flush()
 
-	#1. Delete anything in the public directory
-	public_dir = Path("docs")
-	empty_dir(public_dir)
+	template = load_template(template_path) if want_meta else None
+	for target in targets:
+		if target.search is not None:
+			target.search.forget_missing(seen)
+		if target.pages is not None:
+			target.pages.forget_missing(seen)
+		if target.manifest is not None:
+			for out_rel in target.manifest.forget_missing(seen):
+				remove_output(target.dest, out_rel, target.changes)
+		target.save(template, t_hash, build)
+	if hashed:
+		# a page is skipped only if fresh in every target: one count per build
+		print(f"{skipped} unchanged page(s) skipped")
 
-	#2. copy all static files from static to public
-	copy_static_to_public()
+def sync_static(static_dir, dest_dir, manifest, checksum=False, method="copy", profiler=None, changes=None, fingerprint=False, minify=None):
+	"""
+	Mirror static_dir into dest_dir and record the synced files in manifest.
+	With a MinifyReport, CSS files are published minified.
 
-	#3. Generate a page from content/index.md using template.html and write to public/index.html
-	generate_pages_recursive(
-		"content",
-		"template.html",
-		"docs",
-		basepath=basepath
+	With fingerprint, files are published as name.<hash>.ext and listed in
+	dest_dir/asset-manifest.json; that AssetManifest is returned as the
+	last item of (synced, copied, removed, assets), else assets is None.
+	"""
+	dest = Path(dest_dir)
+	assets_path = dest / ASSET_MANIFEST_NAME
+	assets = None
+	if fingerprint:
+		assets = AssetManifest.build(static_dir, previous=AssetManifest.load(assets_path))
+	synced, copied, removed = sync_dir(
+		static_dir,
+		dest,
+		previous=manifest.static,
+		checksum=checksum,
+		method=method,
+		profiler=profiler,
+		changes=changes,
+		rename=assets.output_for if assets is not None else None,
+		transform=(lambda path: minify_static(path, minify)) if minify is not None else None
 	)
+	manifest.static = synced
+
+	if assets is not None:
+		status = write_if_changed(assets_path, assets.to_json())
+	elif assets_path.exists():
+		assets_path.unlink()
+		status = "deleted"
+	else:
+		status = "unchanged"
+	if changes is not None:
+		changes.record(assets_path, status)
+	return synced, copied, removed, assets
+
+def share_static(primary_dir, dest_dir, static_files, manifest, profiler=None, changes=None, assets=None):
+	"""
+	Publish static_files, which sync_static already placed in primary_dir
+	for another target, in dest_dir as hard links to those copies, and
+	record them in manifest (dest_dir's). With an AssetManifest its
+	asset-manifest.json is linked too. Returns (synced, linked, removed).
+	"""
+	synced, linked, removed = link_files(primary_dir, dest_dir, static_files, manifest.static, profiler, changes)
+	manifest.static = synced
+	if assets is not None:
+		link_files(primary_dir, dest_dir, [ASSET_MANIFEST_NAME], changes=changes)
+	elif (Path(dest_dir) / ASSET_MANIFEST_NAME).exists():
+		remove_output(Path(dest_dir), ASSET_MANIFEST_NAME, changes)
+	return synced, linked, removed
+
+def minify_static(path: Path, report):
+	# sync_dir transform: minified bytes for CSS, None (copy as-is) otherwise
+	if path.suffix.lower() != ".css":
+		return None
+	original = path.read_bytes()
+	data = minify_css(original.decode("utf-8")).encode("utf-8")
+	report.add(path, len(original), len(data))
+	return data
+
+def publish_static(build):
+	"""
+	sync_static into the first target of build, then hard-link those
+	files into the others, saving each target's manifest. Sets
+	build.assets to what pages link and inline against.
+	"""
+	primary = build.targets[0]
+	synced, copied, removed, assets = sync_static(
+		build.static_dir,
+		primary.dest,
+		primary.manifest,
+		checksum=build.checksum,
+		method=build.method,
+		profiler=build.profiler,
+		changes=primary.changes,
+		fingerprint=build.fingerprint,
+		minify=build.minify
+	)
+	primary.manifest.save()
+	print(f"static: {len(copied)} copied, {len(removed)} removed, {len(synced) - len(copied)} unchanged")
+	for target in build.targets[1:]:
+		synced, linked, removed = share_static(
+			primary.dest, target.dest, primary.manifest.static, target.manifest,
+			profiler=build.profiler, changes=target.changes, assets=assets
+		)
+		target.manifest.save()
+		print(f"static ({target.dest}): {len(linked)} linked, {len(removed)} removed, {len(synced) - len(linked)} unchanged")
+	if build.inline is not None:
+		assets = Inliner(build.static_dir, assets, *build.inline)
+	build.assets = assets
+
+def rebuild_changed(changed, removed, content_dir, template_path, build):
+	"""
+	Re-render only what the changed/removed paths affect: a template or
+	partial change re-renders every page, a markdown change just that page,
+	and a change under build's static_dir re-syncs static files (and, with
+	fingerprint, re-renders pages if any published asset name changed;
+	with inline, any static change does). Each target's manifest and
+	indexes are kept up to date with the pages re-rendered.
+	"""
+	content = Path(content_dir).resolve()
+	static = Path(build.static_dir).resolve()
+	touched = [Path(p).resolve() for p in list(changed) + list(removed)]
+	template_sources = {Path(p).resolve() for p in load_template(template_path).sources}
+
+	static_touched = any(static in p.parents for p in touched)
+	if static_touched:
+		publish_static(build)
+	elif build.fingerprint or build.inline is not None:
+		assets = AssetManifest.load(build.targets[0].dest / ASSET_MANIFEST_NAME) if build.fingerprint else None
+		build.assets = Inliner(build.static_dir, assets, *build.inline) if build.inline is not None else assets
+
+	if any(p in template_sources for p in touched) or ((build.fingerprint or build.inline is not None) and static_touched):
+		generate_pages_recursive(content_dir, template_path, build)
+		return
+	want_text = any(target.search is not None for target in build.targets)
+	want_meta = any(target.pages is not None for target in build.targets)
+	for path in touched:
+		if path.suffix != ".md" or content not in path.parents:
+			continue
+		rel = path.relative_to(content)
+		src_rel = rel.as_posix()
+		out_rel = rel.with_suffix(".html").as_posix()
+		if path.exists():
+			text = {} if want_text else None
+			meta = {} if want_meta else None
+			# recorded hash is of the bytes rendered, not of a later re-read
+			src_hash = generate_page(path, template_path, out_rel, build, text, meta)
+			for target in build.targets:
+				target.record(src_rel, src_hash, out_rel, text, meta)
+		else:
+			for target in build.targets:
+				target.forget(src_rel)
+	template = load_template(template_path) if want_meta else None
+	site_key = site_inputs_hash(template_path, build.assets, build.minify) if want_meta else None
+	for target in build.targets:
+		target.save(template, site_key, build)
+
+
+def serve_and_watch(args, build):
+	target = build.targets[0]
+	livereload = LiveReload()
+	server = start_server(target.dest, livereload, basepath=normalize_basepath(target.basepath), port=args.port)
+	host, port = server.server_address[:2]
+	print(f"serving {target.dest} at http://{host}:{port}{normalize_basepath(target.basepath)} (Ctrl+C to stop)")
+	# the initial build's profile has been reported; rebuilds are not profiled
+	build.profiler = None
+
+	def rebuild(changed, removed):
+		# same cache and write path as the initial build
+		build.minify = MinifyReport() if args.minify else None
+		target.writer = OutputWriter(target.dest, workers=max(1, args.write_threads))
+		with target.writer:
+			rebuild_changed(changed, removed, "content", "template.html", build)
+		print(f"output: {target.changes.summary()}")
+
+	def watched():
+		# recomputed after each rebuild: the template may include new partials
+		return ["content", build.static_dir] + [str(p) for p in load_template("template.html").sources]
+
+	try:
+		watch(watched, rebuild, livereload, interval=args.poll)
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.shutdown()
+
+
+def parse_args(argv=None):
+	parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+	parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+	parser.add_argument("--full", action="store_true", help="wipe docs/ and rebuild every page")
+	parser.add_argument("--checksum", action="store_true", help="compare static files by content hash, not just size and mtime")
+	parser.add_argument("--copy-method", choices=COPY_METHODS, default="copy", help="how changed static files are placed in docs/")
+	parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N", help="render pages on N worker processes")
+	parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="directory of the shared render cache")
+	parser.add_argument("--cache-size", type=int, default=256, metavar="MB", help="evict least recently used cache entries above this size")
+	parser.add_argument("--no-cache", action="store_true", help="do not read or write the render cache")
+	parser.add_argument("--changes", metavar="FILE", help="write a JSON list of added/changed/deleted output files")
+	parser.add_argument("--fingerprint", action="store_true", help="publish static files as name.<hash>.ext and rewrite links to them")
+	parser.add_argument("--minify", action="store_true", help="minify pages (template markup included) and static CSS")
+	parser.add_argument("--inline", action="store_true", help="inline small stylesheets (or their critical CSS) and small images into pages")
+	parser.add_argument("--inline-css-max", type=int, default=DEFAULT_CSS_MAX, metavar="BYTES", help="with --inline, largest stylesheet inlined whole")
+	parser.add_argument("--inline-image-max", type=int, default=DEFAULT_IMAGE_MAX, metavar="BYTES", help="with --inline, largest image inlined as a data: URI")
+	parser.add_argument("--search", action="store_true", help="build a client-side search index under docs/search/")
+	parser.add_argument("--listings", metavar="SECTIONS", help="comma-separated content folders (e.g. blog) to generate paginated listing pages for")
+	parser.add_argument("--per-page", type=int, default=DEFAULT_PER_PAGE, metavar="N", help="entries per listing page")
+	parser.add_argument("--feed", action="store_true", help="write an Atom feed of dated pages to docs/feed.xml (needs --site-url)")
+	parser.add_argument("--sitemap", action="store_true", help="write docs/sitemap.xml (needs --site-url)")
+	parser.add_argument("--site-url", metavar="URL", help="absolute URL the site is served from, for --feed and --sitemap")
+	parser.add_argument("--precompress", action="store_true", help="write .gz (and .br/.zst when available) siblings of HTML/CSS/JS outputs")
+	parser.add_argument("--write-threads", type=int, default=4, metavar="N", help="threads used to write output files")
+	parser.add_argument("--profile", action="store_true", help="print per-stage timings and the slowest pages")
+	parser.add_argument("--profile-trace", metavar="FILE", help="write a Chrome trace-event JSON of the build (implies --profile)")
+	parser.add_argument("--cprofile", metavar="FILE", help="dump cProfile stats of the build to FILE (implies --profile)")
+	parser.add_argument("--target", action="append", metavar="DIR[:BASEPATH]", help="build into DIR for BASEPATH (default /) instead of docs/; repeat to publish several targets from one parse, the later ones hard-linking the first one's static files")
+	parser.add_argument("--watch", action="store_true", help="serve docs/ with live reload and rebuild on changes")
+	parser.add_argument("--port", type=int, default=8888, help="port for --watch")
+	parser.add_argument("--poll", type=float, default=0.1, metavar="SECONDS", help="how often --watch checks for changes")
+	args = parser.parse_args(argv)
+	if (args.feed or args.sitemap) and not args.site_url:
+		parser.error("--feed and --sitemap need --site-url")
+	if args.target and args.watch:
+		parser.error("--watch serves docs/ and cannot be combined with --target")
+	args.targets = [parse_target(spec) for spec in args.target] if args.target else [("docs", args.basepath)]
+	return args
+
+def parse_target(spec):
+	# "mirror:/" -> ("mirror", "/"); the basepath defaults to "/"
+	dest, _, basepath = spec.partition(":")
+	return dest, basepath or "/"
+
+def main(argv=None):
+	args = parse_args(argv)
+	# before the writer threads and render pool exist
+	read_umask()
+
+	profiler = None
+	cprof = None
+	if args.profile or args.profile_trace or args.cprofile:
+		profiler = BuildProfiler()
+	if args.cprofile:
+		import cProfile
+		cprof = cProfile.Profile()
+		cprof.enable()
+
+	targets = []
+	for dest, basepath in args.targets:
+		public_dir = Path(dest)
+		manifest = BuildManifest.load(manifest_path_for(public_dir))
+
+		#1. Delete anything in the public directory (only for a full rebuild)
+		if args.full:
+			empty_dir(public_dir)
+			manifest.pages = {}
+			manifest.static = []
+
+		writer = OutputWriter(public_dir, workers=max(1, args.write_threads))
+
+		search = None
+		if args.search:
+			search = SearchIndex.load(public_dir)
+		elif search_state_path_for(public_dir).exists():
+			# a later --search build must not trust an index that missed edits
+			search_state_path_for(public_dir).unlink()
+			shutil.rmtree(public_dir / INDEX_DIR, ignore_errors=True)
+
+		pages = None
+		if args.listings or args.feed or args.sitemap:
+			pages = PageIndex.load(
+				public_dir, sections=(args.listings or "").split(","), per_page=args.per_page,
+				site_url=args.site_url, feed=args.feed, sitemap=args.sitemap
+			)
+		elif page_index_state_path_for(public_dir).exists():
+			# drop what an earlier build generated from the index, and the index
+			PageIndex.load(public_dir).clear(writer.changes)
+
+		targets.append(BuildTarget(public_dir, basepath, manifest, writer, search, pages))
+	primary = targets[0]
+	multi = len(targets) > 1
+
+	cache = None
+	if not args.no_cache:
+		cache = RenderCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+		# same directory, own counters: long blocks and highlighted code
+		# persist across processes
+		process_block_cache().disk = RenderCache(args.cache_dir)
+		process_highlight_cache().disk = RenderCache(args.cache_dir)
+
+	build = BuildOptions(
+		targets,
+		jobs=max(1, args.jobs),
+		profiler=profiler,
+		cache=cache,
+		minify=MinifyReport() if args.minify else None,
+		checksum=args.checksum,
+		method=args.copy_method,
+		fingerprint=args.fingerprint,
+		inline=(args.inline_css_max, args.inline_image_max) if args.inline else None
+	)
+
+	#2. sync static files into public: copy new/changed ones, drop stale ones;
+	# further targets link to the first one's copies
+	publish_static(build)
+
+	#3. Generate pages from content/ using template.html, skipping unchanged ones
+	try:
+		generate_pages_recursive("content", "template.html", build)
+	except (RenderError, ValueError) as e:
+		sys.exit(str(e))
+	finally:
+		for target in targets:
+			target.writer.close()
+
+	#4. Pre-compress changed outputs so the web server can skip on-the-fly compression
+	if args.precompress:
+		encodings = ", ".join(s.lstrip(".") for s in available_encodings())
+		for target in targets:
+			t = clock() if profiler is not None else 0.0
+			compressed, unchanged, dropped = compress_outputs(
+				target.dest, jobs=max(1, args.jobs), changes=target.changes, keep=target.manifest.static
+			)
+			if profiler is not None:
+				profiler.add(target.dest, [("compress", t, clock() - t)])
+			label = f" {target.dest}" if multi else ""
+			print(f"precompress{label} ({encodings}): {compressed} compressed, {unchanged} unchanged, {dropped} removed")
+
+	if build.minify is not None:
+		print(build.minify.summary())
+	for target in targets:
+		label = f" ({target.dest})" if multi else ""
+		print(f"output{label}: {target.changes.summary()}")
+	if args.changes:
+		if multi:
+			write_reports(args.changes, [target.changes for target in targets])
+		else:
+			primary.changes.write_report(args.changes)
+
+	if cache is not None:
+		cache.prune()
+		print(cache.stats())
+		blocks = process_block_cache()
+		print(f"block cache: {blocks.hits} hit(s), {blocks.misses} miss(es)")
+		code = process_highlight_cache()
+		print(f"highlight cache: {code.hits} hit(s), {code.misses} miss(es)")
+
+	if cprof is not None:
+		cprof.disable()
+		cprof.dump_stats(args.cprofile)
+		print(f"cProfile stats written to {args.cprofile}")
+	if profiler is not None:
+		print(profiler.summary())
+		if args.profile_trace:
+			profiler.write_trace(args.profile_trace)
+			print(f"trace written to {args.profile_trace}")
+
+	#5. Optionally keep serving and re-render whatever changes
+	if args.watch:
+		serve_and_watch(args, build)
 
 if __name__ == "__main__":
 	main()
@@ -0,0 +1,114 @@
+import hashlib
+import json
+from pathlib import Path
+
+# Bump whenever a change to the generator alters the HTML it writes, so
+# every page built by an older version is rendered again.
+GENERATOR_VERSION = "8"
+
+
+def hash_bytes(data: bytes) -> str:
+	return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def manifest_path_for(dest_dir) -> Path:
+	"""
+	Manifest lives next to the output directory (docs -> .docs-manifest.json)
+	so it is never deployed along with the site.
+	"""
+	dest = Path(dest_dir)
+	return dest.parent / f".{dest.name}-manifest.json"
+
+
+class BuildManifest:
+	"""
+	Persistent record of what the last build produced.
+
+	pages maps a source path (relative to the content dir) to the hash of
+	the markdown and the output path (relative to the output dir) it was
+	rendered to. The template hash, basepath and generator version apply
+	to every page; if any of them changes the whole site is stale.
+
+	static lists the files (relative to the output dir) the last static
+	sync placed there, so files dropped from static/ can be deleted.
+	"""
+
+	def __init__(self, path, template_hash=None, basepath=None, version=GENERATOR_VERSION, pages=None, static=None):
+		self.path = Path(path)
+		self.template_hash = template_hash
+		self.basepath = basepath
+		self.version = version
+		self.pages = pages if pages is not None else {}
+		self.static = static if static is not None else []
+
+	@classmethod
+	def load(cls, path):
+		path = Path(path)
+		try:
+			data = json.loads(path.read_text(encoding="utf-8"))
+		except (FileNotFoundError, ValueError):
+			return cls(path)
+		return cls(
+			path,
+			template_hash=data.get("template"),
+			basepath=data.get("basepath"),
+			version=data.get("version"),
+			pages=data.get("pages", {}),
+			static=data.get("static", []),
+		)
+
+	def save(self):
+		data = {
+			"version": self.version,
+			"template": self.template_hash,
+			"basepath": self.basepath,
+			"pages": dict(sorted(self.pages.items())),
+			"static": sorted(self.static),
+		}
+		tmp = self.path.with_name(self.path.name + ".tmp")
+		tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+		tmp.replace(self.path)
+
+	def site_inputs_match(self, template_hash, basepath) -> bool:
+		return (
+			self.version == GENERATOR_VERSION and
+			self.template_hash == template_hash and
+			self.basepath == basepath
+		)
+
+	def reset(self, template_hash, basepath):
+		"""
+		Forget every page and record the new site-wide inputs.
+		"""
+		self.version = GENERATOR_VERSION
+		self.template_hash = template_hash
+		self.basepath = basepath
+		self.pages = {}
+
+	def is_fresh(self, src_rel: str, src_hash: str, dest_path: Path) -> bool:
+		entry = self.pages.get(src_rel)
+		return (
+			entry is not None and
+			entry.get("hash") == src_hash and
+			Path(dest_path).exists()
+		)
+
+	def record(self, src_rel: str, src_hash: str, out_rel: str):
+		self.pages[src_rel] = {"hash": src_hash, "output": out_rel}
+
+	def forget_missing(self, present):
+		"""
+		Drop entries whose source is not in present; return their outputs.
+		"""
+		stale = []
+		for src_rel in sorted(set(self.pages) - set(present)):
+			stale.append(self.pages.pop(src_rel)["output"])
+		return stale
@@ -4,9 +4,11 @@
 import re
 from enum import Enum
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import text_node_to_html_node
 from htmlnode import ParentNode
 from inline_markdown import text_to_textnodes
+from syntax import BlockRule, default_registry
+from highlight import code_node, split_info
 
 
 class BlockType(Enum):
@@ -18,58 +20,135 @@ class BlockType(Enum):
 	ORDERED_LIST = "ordered_list"
 
 
-def markdown_to_blocks(markdown: str):
+# Precompiled once; block_to_block_type dispatches on a block's first
+# character so each block is tested against at most one family of patterns.
+_HEADING_RE = re.compile(r"#{1,6} ")
+_UL_LINE_RE = re.compile(r"[*-]\s+.+")
+_OL_LINE_RE = re.compile(r"(\d+)\.\s+.+")
+_OL_MARKER_RE = re.compile(r"^\d+\.\s+", re.MULTILINE)
+
+_FENCE = "```"
+
+
+def _iter_lines(text: str):
 	"""
-	Split a full markdown document into logical blocks.
+	Yield the lines of text one at a time without building a list of them.
+	"""
+	start = 0
+	while True:
+		end = text.find("\n", start)
+		if end == -1:
+			yield text[start:]
+			return
+		yield text[start:end]
+		start = end + 1
 
-	- Normalizes CRLF to LF
-	- Splits on one or more blank lines
-	- Trims each block and drops empties
+
+def iter_blocks(lines):
+	"""
+	Group an iterable of lines (e.g. an open file) into trimmed blocks,
+	yielding each block as soon as it is complete.
+
+	- Blank (whitespace-only) lines separate blocks
+	- A ``` fence starts a new block and runs to the closing fence, blank
+	  lines included; a one-line ```x``` is a complete block
+	- Line endings (LF or CRLF) are dropped
 	"""
-	text = markdown.replace("\r\n", "\n")
-	blocks = re.split(r"\n\s*\n", text)
-	return [b.strip() for b in blocks if b.strip()]
+	current = []
+	in_fence = False
+	for line in lines:
+		line = line.rstrip("\r\n")
+		stripped = line.strip()
+
+		if in_fence:
+			current.append(line)
+			if stripped.startswith(_FENCE):
+				in_fence = False
+				yield "\n".join(current).strip()
+				current = []
+			continue
+
+		if not stripped:
+			if current:
+				block = "\n".join(current).strip()
+				current = []
+				if block:
+					yield block
+			continue
+
+		if stripped.startswith(_FENCE):
+			if current:
+				yield "\n".join(current).strip()
+				current = []
+			if len(stripped) >= 2 * len(_FENCE) and stripped.endswith(_FENCE):
+				yield stripped
+				continue
+			in_fence = True
+
+		current.append(line)
+
+	if current:
+		block = "\n".join(current).strip()
+		if block:
+			yield block
 
 
-def extract_title(markdown: str) -> str:
+def markdown_to_blocks(markdown: str):
 	"""
-	Return the first H1 ('# <title>') text; raise if none exists.
+	Split a full markdown document into logical blocks.
+
+	- Splits on one or more blank lines (but not inside fenced code)
+	- Trims each block and drops empties
+	- Drops line endings line by line, so CRLF input yields LF blocks
+	  (see iter_blocks)
 	"""
-	for line in markdown.splitlines():
-		line = line.strip()
-		if line.startswith("# "):
-			return line[2:].strip()
-	raise ValueError("No H1 header found in markdown")
+	return list(iter_blocks(_iter_lines(markdown)))
 
 
-def block_to_block_type(block: str) -> BlockType:
+def block_to_block_type(block: str, registry=None):
 	"""
-	Classify a trimmed block into a BlockType.
+	Classify a trimmed block into a BlockType, or the BlockRule of the
+	registry (the default SyntaxRegistry if None) that claims it. Only
+	rules triggered by the block's first character are tried.
 	"""
+	first = block[:1]
+	for rule in (registry if registry is not None else default_registry()).block_rules(first):
+		if rule.match(block):
+			return rule
+
 	# fenced code
-	if block.startswith("```") and block.endswith("```"):
-		return BlockType.CODE
+	if first == "`":
+		if block.startswith(_FENCE) and block.endswith(_FENCE):
+			return BlockType.CODE
+		return BlockType.PARAGRAPH
 
 	# heading (1–6 #'s + space)
-	if re.match(r"^#{1,6} ", block):
-		return BlockType.HEADING
+	if first == "#":
+		if _HEADING_RE.match(block):
+			return BlockType.HEADING
+		return BlockType.PARAGRAPH
 
 	lines = block.split("\n")
 
 	# quote: every line starts with '>' optionally followed by space
-	if all(re.match(r"^>\s?.*$", ln) for ln in lines):
-		return BlockType.QUOTE
+	if first == ">":
+		if all(ln.startswith(">") for ln in lines):
+			return BlockType.QUOTE
+		return BlockType.PARAGRAPH
 
 	# unordered list: every line starts with '-' or '*' + space
-	if all(re.match(r"^(\*|-)\s+.+$", ln) for ln in lines):
-		return BlockType.UNORDERED_LIST
+	if first == "-" or first == "*":
+		if all(_UL_LINE_RE.fullmatch(ln) for ln in lines):
+			return BlockType.UNORDERED_LIST
+		return BlockType.PARAGRAPH
 
 	# ordered list: lines '1. x', '2. y' ... and numbers are 1..n
-	matches = [re.match(r"^(\d+)\.\s+.+$", ln) for ln in lines]
-	if all(m is not None for m in matches):
-		nums = [int(m.group(1)) for m in matches]
-		if nums == list(range(1, len(nums) + 1)):
-			return BlockType.ORDERED_LIST
+	if first.isdigit():
+		for expected, ln in enumerate(lines, 1):
+			m = _OL_LINE_RE.fullmatch(ln)
+			if m is None or int(m.group(1)) != expected:
+				return BlockType.PARAGRAPH
+		return BlockType.ORDERED_LIST
 
 	return BlockType.PARAGRAPH
 
@@ -118,66 +197,85 @@ def _strip_ol_markers(block: str) -> str:
 	"""
 	Remove leading '<number>. ' from each line in an ordered list block.
 	"""
-	lines = block.split("\n")
-	cleaned = [re.sub(r"^\d+\.\s+", "", ln) for ln in lines]
-	return "\n".join(cleaned)
+	return _OL_MARKER_RE.sub("", block)
 
 
-def text_to_children(text: str):
+def text_to_children(text: str, registry=None):
 	"""
 	Run inline markdown on a text block and convert resulting TextNodes into HTML nodes.
 	"""
 	children = []
-	for tn in text_to_textnodes(text):
+	for tn in text_to_textnodes(text, registry):
 		children.append(text_node_to_html_node(tn))
 	return children
 
 
-def markdown_to_html_node(markdown: str) -> ParentNode:
+def block_to_html_node(block: str, btype, registry=None) -> ParentNode:
+	"""
+	Build the HTML subtree for one classified block.
+	"""
+	if btype.__class__ is BlockRule:
+		return btype.build(block, lambda text: text_to_children(text, registry))
+
+	if btype == BlockType.HEADING:
+		level = _heading_level(block)
+		# skip the '<level> #' and following single space
+		text = block[level + 1:]
+		return ParentNode(f"h{level}", text_to_children(text, registry))
+
+	if btype == BlockType.CODE:
+		# retain inner text; no inline parsing inside <pre>, but the
+		# language named after the opening fence is highlighted
+		inner = block[3:-3] if block.startswith("```") and block.endswith("```") else block
+		lang, code = split_info(inner)
+		return ParentNode("pre", [code_node(code, lang)])
+
+	if btype == BlockType.QUOTE:
+		text = _strip_quote_markers(block)
+		return ParentNode("blockquote", text_to_children(text, registry))
+
+	if btype == BlockType.UNORDERED_LIST:
+		items = []
+		for raw in _strip_ul_markers(block).split("\n"):
+			items.append(ParentNode("li", text_to_children(raw, registry)))
+		return ParentNode("ul", items)
+
+	if btype == BlockType.ORDERED_LIST:
+		items = []
+		for raw in _strip_ol_markers(block).split("\n"):
+			items.append(ParentNode("li", text_to_children(raw, registry)))
+		return ParentNode("ol", items)
+
+	# paragraph
+	return ParentNode("p", text_to_children(block, registry))
+
+
+def markdown_to_html_node(markdown, block_cache=None, registry=None) -> ParentNode:
 	"""
-	Main converter: Markdown (string) -> root HTML ParentNode ('div').
+	Main converter: Markdown (string, or an iterable of lines such as an
+	open file) -> root HTML ParentNode ('div').
 
 	- Detects block type
 	- For code/quote/list/paragraph, builds appropriate HTML structure
 	- For inline text (most blocks), uses inline_markdown -> TextNodes -> HTML
 	- ALWAYS constructs the root with a non-empty children list (prevents errors)
+	- With a BlockCache, unchanged blocks reuse their previously built subtree
+	- Extension syntax comes from registry (default: default_registry());
+	  a BlockCache must only ever see one registry's output
 	"""
-	blocks = markdown_to_blocks(markdown)
+	lines = _iter_lines(markdown) if isinstance(markdown, str) else markdown
 
 	children = []
-	for block in blocks:
-		btype = block_to_block_type(block)
-
-		if btype == BlockType.HEADING:
-			level = _heading_level(block)
-			# skip the '<level> #' and following single space
-			text = block[level + 1:]
-			children.append(ParentNode(f"h{level}", text_to_children(text)))
-
-		elif btype == BlockType.CODE:
-			# retain inner text; no inline parsing inside <pre>
-			inner = block[3:-3] if block.startswith("```") and block.endswith("```") else block
-			code_leaf = text_node_to_html_node(TextNode(inner, TextType.CODE))
-			children.append(ParentNode("pre", [code_leaf]))
-
-		elif btype == BlockType.QUOTE:
-			text = _strip_quote_markers(block)
-			children.append(ParentNode("blockquote", text_to_children(text)))
-
-		elif btype == BlockType.UNORDERED_LIST:
-			items = []
-			for raw in _strip_ul_markers(block).split("\n"):
-				items.append(ParentNode("li", text_to_children(raw)))
-			children.append(ParentNode("ul", items))
-
-		elif btype == BlockType.ORDERED_LIST:
-			items = []
-			for raw in _strip_ol_markers(block).split("\n"):
-				items.append(ParentNode("li", text_to_children(raw)))
-			children.append(ParentNode("ol", items))
-
-		else:  # paragraph
-			children.append(ParentNode("p", text_to_children(block)))
+	for block in iter_blocks(lines):
+		btype = block_to_block_type(block, registry)
+		if block_cache is None:
+			children.append(block_to_html_node(block, btype, registry))
+			continue
+		node = block_cache.get(btype, block)
+		if node is None:
+			node = block_to_html_node(block, btype, registry)
+			block_cache.put(btype, block, node)
+		children.append(node)
 
 	if not children:
 		raise ValueError("No content blocks found in markdown")
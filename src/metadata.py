@@ -0,0 +1,177 @@
+import json
+import re
+
+from htmlnode import LeafNode
+
+# A page may open with YAML-style front matter between "---" lines:
+#
+#	---
+#	title: Why Tom Bombadil Was a Mistake
+#	date: 2024-05-01
+#	tags: [tolkien, essays]
+#	draft: false
+#	aliases:
+#	  - /tom/
+#	---
+#
+# Only the subset sites need is understood: one "key: value" per line,
+# scalars (quoted or bare strings, integers, true/false, null) and lists,
+# inline ([a, b]) or as "- item" lines under an empty key.
+FENCE = "---"
+
+# longest summary taken from the first paragraph, in characters
+SUMMARY_CHARS = 200
+
+_KEY_RE = re.compile(r"([A-Za-z_][\w-]*)\s*:(?:\s+(.*))?$")
+_INT_RE = re.compile(r"[+-]?\d+")
+_LITERALS = {"true": True, "false": False, "null": None, "~": None}
+
+
+def split_front_matter(md_text):
+	"""
+	(front matter dict, markdown body) of a page. Without front matter
+	the dict is empty and the body is md_text itself. Raises ValueError
+	on a malformed or unterminated block.
+	"""
+	if not md_text.startswith(FENCE):
+		return {}, md_text
+	lines = md_text.replace("\r\n", "\n").split("\n")
+	if lines[0].rstrip() != FENCE:
+		return {}, md_text
+	for end in range(1, len(lines)):
+		if lines[end].rstrip() in (FENCE, "..."):
+			return parse_front_matter(lines[1:end]), "\n".join(lines[end + 1:])
+	raise ValueError("front matter is not closed with ---")
+
+
+def parse_front_matter(lines):
+	meta = {}
+	key = None
+	# keys given no value on their own line: "- item" lines follow
+	block_lists = set()
+	for n, line in enumerate(lines, 2):
+		stripped = line.strip()
+		if not stripped or stripped.startswith("#"):
+			continue
+		if stripped.startswith("- ") or stripped == "-":
+			if key not in block_lists:
+				raise ValueError(f"front matter line {n}: list item outside a list")
+			meta[key].append(_scalar(stripped[1:].strip(), n))
+			continue
+		m = _KEY_RE.match(stripped)
+		if m is None or line[:1] in (" ", "\t"):
+			raise ValueError(f"front matter line {n}: expected 'key: value'")
+		key, value = m.group(1), m.group(2)
+		if key in meta:
+			raise ValueError(f"front matter line {n}: duplicate key {key!r}")
+		if value:
+			meta[key] = _value(value.strip(), n)
+		else:
+			meta[key] = []
+			block_lists.add(key)
+	# a key with neither a value nor items is empty, not an empty list
+	for key in block_lists:
+		if not meta[key]:
+			meta[key] = None
+	return meta
+
+
+def _value(text, n):
+	if text.startswith("[") and text.endswith("]"):
+		inner = text[1:-1].strip()
+		return [_scalar(item.strip(), n) for item in _split_items(inner, n)] if inner else []
+	return _scalar(text, n)
+
+
+def _split_items(text, n):
+	items = []
+	start = 0
+	quote = None
+	for i, c in enumerate(text):
+		if quote is not None:
+			if c == quote and text[i - 1] != "\\":
+				quote = None
+		elif c in "\"'":
+			quote = c
+		elif c == ",":
+			items.append(text[start:i])
+			start = i + 1
+	if quote is not None:
+		raise ValueError(f"front matter line {n}: unterminated string")
+	items.append(text[start:])
+	return items
+
+
+def _scalar(text, n):
+	if len(text) >= 2 and text[0] == text[-1] == '"':
+		try:
+			return json.loads(text)
+		except ValueError:
+			raise ValueError(f"front matter line {n}: bad string {text}") from None
+	if len(text) >= 2 and text[0] == text[-1] == "'":
+		return text[1:-1].replace("''", "'")
+	if text[:1] in ("\"", "'"):
+		raise ValueError(f"front matter line {n}: unterminated string")
+	# trailing comments, as in YAML
+	text = text.split(" #", 1)[0].rstrip()
+	if text in _LITERALS:
+		return _LITERALS[text]
+	if _INT_RE.fullmatch(text):
+		return int(text)
+	return text
+
+
+def plain_text(node):
+	"""
+	Text of a content (sub)tree without markup; images contribute nothing.
+	"""
+	out = []
+	stack = [node]
+	while stack:
+		node = stack.pop()
+		if isinstance(node, LeafNode):
+			if node.tag != "img" and node.value:
+				out.append(node.value)
+			continue
+		stack.extend(reversed(node.children or ()))
+	return "".join(out)
+
+
+def _truncate(text, limit):
+	text = " ".join(text.split())
+	if len(text) <= limit:
+		return text
+	cut = text.rfind(" ", 0, limit)
+	return text[:cut if cut > 0 else limit].rstrip(",;:") + "…"
+
+
+def _only_links(paragraph):
+	# "[< Back Home](/)" and lone images are navigation, not a summary
+	return all(
+		child.tag in ("a", "img") or (child.tag is None and not (child.value or "").strip())
+		for child in paragraph.children or ()
+	)
+
+
+def page_meta(root, front=None):
+	"""
+	Metadata of a parsed page: its front matter plus "title" (the front
+	matter's, else the text of the first h1 of the content tree) and
+	"summary" (front matter description, else the start of the first
+	paragraph that is not just links or images). Raises ValueError if the page has no title.
+	"""
+	meta = dict(front) if front else {}
+	title = meta.get("title")
+	summary = meta.get("summary", meta.get("description"))
+	for child in root.children or ():
+		if title is None and child.tag == "h1":
+			title = plain_text(child).strip()
+		elif summary is None and child.tag == "p" and not _only_links(child):
+			summary = _truncate(plain_text(child), SUMMARY_CHARS)
+		if title is not None and summary is not None:
+			break
+	if title is None:
+		raise ValueError("No H1 header found in markdown")
+	meta["title"] = str(title)
+	meta["summary"] = "" if summary is None else str(summary)
+	return meta
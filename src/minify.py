@@ -0,0 +1,149 @@
+import re
+
+from htmlnode import VOID_TAGS, can_unquote
+
+# Whitespace next to these can be visible (it separates words), so it is
+# collapsed to one space rather than dropped.
+INLINE_TAGS = frozenset((
+	"a", "abbr", "b", "bdi", "bdo", "br", "button", "cite", "code", "data", "del", "dfn", "em", "i", "img",
+	"input", "kbd", "label", "mark", "q", "s", "samp", "select", "small", "span", "strong", "sub",
+	"sup", "textarea", "time", "u", "var",
+))
+
+_MARKUP_RE = re.compile(
+	r"(?P<raw><(?P<rawtag>pre|textarea|script|style)\b.*?</(?P=rawtag)\s*>)"
+	r"|(?P<comment><!--.*?-->)"
+	r"|(?P<decl><![a-zA-Z][^>]*>)"
+	r"|(?P<tag></?(?P<name>[a-zA-Z][\w-]*)[^>]*>)"
+	r"|(?P<space>\s+)",
+	re.S | re.I,
+)
+
+_QUOTED_ATTR_RE = re.compile(r"""(\s[\w:.-]+)=(?:"([^"]*)"|'([^']*)')""")
+_SELF_CLOSE_RE = re.compile(r"\s*/>$")
+
+
+def _minify_tag(tag, name):
+	def unquote(m):
+		value = m.group(2) if m.group(2) is not None else m.group(3)
+		if can_unquote(value):
+			return f"{m.group(1)}={value}"
+		return m.group(0)
+
+	tag = _QUOTED_ATTR_RE.sub(unquote, tag)
+	if name.lower() in VOID_TAGS:
+		tag = _SELF_CLOSE_RE.sub(">", tag)
+	return tag
+
+
+def minify_markup(text: str, at_start=True, at_end=True) -> str:
+	"""
+	Minify a literal piece of HTML (template markup, not page content):
+	drop comments, unquote attribute values that do not need quotes, drop
+	'/' from void tags and collapse whitespace. Whitespace between two
+	non-inline tags is removed; any other run becomes one space.
+	pre/textarea/script/style elements are copied untouched. at_start /
+	at_end say whether text begins / ends the document (rather than
+	meeting a placeholder), where surrounding whitespace can go entirely.
+	"""
+	tokens = []
+	pos = 0
+	for m in _MARKUP_RE.finditer(text):
+		if m.start() > pos:
+			tokens.append(("text", text[pos:m.start()], None))
+		if m.group("raw") is not None:
+			tokens.append(("tag", m.group("raw"), m.group("rawtag").lower()))
+		elif m.group("comment") is not None:
+			comment = m.group("comment")
+			if comment.startswith("<!--[if"):
+				tokens.append(("text", comment, None))
+		elif m.group("decl") is not None:
+			tokens.append(("tag", m.group("decl"), "!"))
+		elif m.group("tag") is not None:
+			name = m.group("name")
+			tokens.append(("tag", _minify_tag(m.group("tag"), name), name.lower()))
+		elif not tokens or tokens[-1][0] != "space":
+			# runs split by a dropped comment merge into one
+			tokens.append(("space", " ", None))
+		pos = m.end()
+	if pos < len(text):
+		tokens.append(("text", text[pos:], None))
+
+	out = []
+	for i, (kind, value, name) in enumerate(tokens):
+		if kind != "space":
+			out.append(value)
+			continue
+		prev = tokens[i - 1] if i > 0 else None
+		nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+		if prev is None and at_start or nxt is None and at_end:
+			continue
+		if (
+			prev is not None and nxt is not None and
+			prev[0] == "tag" and nxt[0] == "tag" and
+			prev[2] not in INLINE_TAGS and nxt[2] not in INLINE_TAGS
+		):
+			continue
+		out.append(" ")
+	return "".join(out)
+
+
+_CSS_RE = re.compile(
+	r"""(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""
+	r"|(?P<comment>/\*.*?\*/)"
+	r"|(?P<space>\s+)"
+	r"|(?P<punct>[{};,>:])"
+	r"""|(?P<other>[^"'/\s{};,>:]+|/)""",
+	re.S,
+)
+
+# no whitespace is needed on either side of these
+_CSS_TIGHT = frozenset("{};,>")
+
+
+def minify_css(text: str) -> str:
+	"""
+	Strip comments (except /*! ... */ notices), collapse whitespace, drop
+	it around { } ; , > and after ':', and drop the last ';' of each
+	block. Strings are copied untouched; whitespace before ':' is kept
+	since it is significant in selectors ('a :hover').
+	"""
+	out = []
+	pending_space = False
+	for m in _CSS_RE.finditer(text):
+		kind = m.lastgroup
+		value = m.group(kind)
+		if kind == "comment":
+			if not value.startswith("/*!"):
+				continue
+		elif kind == "space":
+			pending_space = True
+			continue
+		elif kind == "punct" and value == "}" and out and out[-1] == ";":
+			out.pop()
+		if pending_space and out and out[-1][-1] not in _CSS_TIGHT and out[-1] != ":" and value not in _CSS_TIGHT:
+			out.append(" ")
+		pending_space = False
+		out.append(value)
+	return "".join(out)
+
+
+class MinifyReport:
+	"""
+	Bytes saved by minification, per output file.
+	"""
+
+	def __init__(self):
+		self.files = []
+
+	def add(self, path, before: int, after: int):
+		self.files.append((str(path), before, after))
+		saved = before - after
+		share = saved / before if before else 0.0
+		print(f"minified: {path} ({saved} bytes saved, {share:.0%})")
+
+	def summary(self) -> str:
+		before = sum(b for _, b, _ in self.files)
+		saved = before - sum(a for _, _, a in self.files)
+		share = saved / before if before else 0.0
+		return f"minify: {saved} bytes saved across {len(self.files)} file(s) ({share:.0%})"
@@ -0,0 +1,296 @@
+import gzip
+import io
+import json
+import os
+import stat
+import tarfile
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# set by read_umask(); None means new files get DEFAULT_FILE_MODE
+_UMASK = None
+DEFAULT_FILE_MODE = 0o644
+
+
+def read_umask():
+	"""
+	Remember the process umask for file_mode. os.umask can only be read
+	by setting it, which races with any thread creating a file meanwhile,
+	so entry points call this once at startup, before starting threads.
+	"""
+	global _UMASK
+	umask = os.umask(0)
+	os.umask(umask)
+	_UMASK = umask
+
+
+def file_mode(path) -> int:
+	"""
+	Permission bits for a file about to be (re)placed at path: the
+	existing file's, else what open() would give a new one under the
+	umask read by read_umask() (DEFAULT_FILE_MODE if it was never read).
+	mkstemp's temp files are 0600 and os.replace keeps that, which a web
+	server running as another user cannot read.
+	"""
+	try:
+		return stat.S_IMODE(os.stat(path).st_mode)
+	except FileNotFoundError:
+		return DEFAULT_FILE_MODE if _UMASK is None else 0o666 & ~_UMASK
+
+
+def write_if_changed(path, data) -> str:
+	"""
+	Write data (str or bytes) to path only if the bytes differ from what is
+	already there. The new file is written to a temp name in the same
+	directory and renamed over the old one, so readers never see a partial
+	file. Returns "added", "changed" or "unchanged".
+	"""
+	path = Path(path)
+	if isinstance(data, str):
+		data = data.encode("utf-8")
+	try:
+		if path.stat().st_size == len(data) and path.read_bytes() == data:
+			return "unchanged"
+		status = "changed"
+	except FileNotFoundError:
+		status = "added"
+
+	path.parent.mkdir(parents=True, exist_ok=True)
+	fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+	try:
+		os.fchmod(fd, file_mode(path))
+		with os.fdopen(fd, "wb") as f:
+			f.write(data)
+		os.replace(tmp, path)
+	except BaseException:
+		if os.path.exists(tmp):
+			os.unlink(tmp)
+		raise
+	return status
+
+
+def remove_output(dest_root: Path, out_rel: str, changes=None):
+	# delete a generated file and any folders it leaves empty
+	dest_root = Path(dest_root)
+	target = dest_root / out_rel
+	if target.exists():
+		target.unlink()
+		print(f"removed: {target}")
+		if changes is not None:
+			changes.record(target, "deleted")
+	parent = target.parent
+	while parent != dest_root and parent.exists() and not any(parent.iterdir()):
+		parent.rmdir()
+		parent = parent.parent
+
+
+class ChangeSet:
+	"""
+	Output files a build added, changed or deleted, relative to root.
+	Thread-safe so writer threads can record into it directly.
+	"""
+
+	def __init__(self, root):
+		self.root = Path(root)
+		self.added = []
+		self.changed = []
+		self.deleted = []
+		self._lock = threading.Lock()
+
+	def _rel(self, path):
+		path = Path(path)
+		try:
+			return path.relative_to(self.root).as_posix()
+		except ValueError:
+			return path.as_posix()
+
+	def record(self, path, status):
+		if status == "unchanged":
+			return
+		bucket = {"added": self.added, "changed": self.changed, "deleted": self.deleted}[status]
+		with self._lock:
+			bucket.append(self._rel(path))
+
+	def as_dict(self):
+		with self._lock:
+			return {
+				"added": sorted(self.added),
+				"changed": sorted(self.changed),
+				"deleted": sorted(self.deleted),
+			}
+
+	def write_report(self, path):
+		"""
+		Write the change list as JSON for deploy steps (upload / purge).
+		"""
+		Path(path).write_text(json.dumps(self.as_dict(), indent=1), encoding="utf-8")
+
+	def summary(self) -> str:
+		return f"{len(self.added)} added, {len(self.changed)} changed, {len(self.deleted)} deleted"
+
+
+def write_reports(path, changesets):
+	"""
+	Write the change lists of several output directories as one JSON
+	object keyed by directory, for builds with more than one target.
+	"""
+	report = {changes.root.as_posix(): changes.as_dict() for changes in changesets}
+	Path(path).write_text(json.dumps(report, indent=1), encoding="utf-8")
+
+
+class OutputWriter:
+	"""
+	Batches write_if_changed calls onto a small thread pool.
+
+	write() returns immediately; flush() waits for every pending write and
+	re-raises the first failure. Results are recorded in changes.
+	"""
+
+	def __init__(self, root, workers=4):
+		self.changes = ChangeSet(root)
+		self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="writer")
+		self._pending = []
+
+	def _write(self, path, data):
+		self.changes.record(path, write_if_changed(path, data))
+
+	def write(self, path, data):
+		self._pending.append(self._pool.submit(self._write, path, data))
+
+	def flush(self):
+		pending, self._pending = self._pending, []
+		errors = [f.exception() for f in pending]
+		errors = [e for e in errors if e is not None]
+		if errors:
+			raise errors[0]
+
+	def close(self):
+		try:
+			self.flush()
+		finally:
+			self._pool.shutdown()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+# Sinks receive a build's outputs as (path relative to the site root,
+# bytes) through write(), and close() finishes them. Archive members get
+# a fixed timestamp so identical sites give identical archives.
+
+_ARCHIVE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class DirectorySink:
+	"""
+	Writes outputs under root with write_if_changed on an OutputWriter;
+	what was added or changed is in .changes.
+	"""
+
+	def __init__(self, root, workers=4):
+		self.root = Path(root)
+		self._writer = OutputWriter(self.root, workers)
+		self.changes = self._writer.changes
+
+	def write(self, path, data):
+		self._writer.write(self.root / path, data)
+
+	def close(self):
+		self._writer.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class MemorySink:
+	"""
+	Keeps outputs in .files, a {path: bytes} dict.
+	"""
+
+	def __init__(self):
+		self.files = {}
+
+	def write(self, path, data):
+		self.files[path] = data.encode("utf-8") if isinstance(data, str) else data
+
+	def close(self):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class ZipSink:
+	"""
+	Writes outputs into a deflated zip archive (a path or a binary file
+	object).
+	"""
+
+	def __init__(self, file, compresslevel=6):
+		self._zip = zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+
+	def write(self, path, data):
+		info = zipfile.ZipInfo(path, date_time=_ARCHIVE_TIME)
+		info.compress_type = zipfile.ZIP_DEFLATED
+		info.external_attr = 0o644 << 16
+		self._zip.writestr(info, data)
+
+	def close(self):
+		self._zip.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class TarSink:
+	"""
+	Writes outputs into a tar archive (a path or a binary file object);
+	mode is "w", "w:gz", "w:bz2" or "w:xz".
+	"""
+
+	def __init__(self, file, mode="w:gz"):
+		self._owned = None
+		self._gzip = None
+		if isinstance(file, (str, os.PathLike)):
+			file = self._owned = open(file, "wb")
+		if mode == "w:gz":
+			# tarfile's own gzip layer stamps the current time
+			file = self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=file, mtime=0)
+			mode = "w"
+		self._tar = tarfile.open(fileobj=file, mode=mode)
+
+	def write(self, path, data):
+		if isinstance(data, str):
+			data = data.encode("utf-8")
+		info = tarfile.TarInfo(path)
+		info.size = len(data)
+		info.mode = 0o644
+		self._tar.addfile(info, io.BytesIO(data))
+
+	def close(self):
+		self._tar.close()
+		for f in (self._gzip, self._owned):
+			if f is not None:
+				f.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
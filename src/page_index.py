@@ -0,0 +1,322 @@
+import json
+import re
+from pathlib import Path
+
+from htmlnode import LeafNode, ParentNode, escape_attr
+from manifest import hash_bytes
+from output import remove_output, write_if_changed
+from page_template import normalize_basepath
+from render import render_tree
+
+# Bump when the state format or the generated listings, feed or sitemap
+# change; everything generated is then written again.
+INDEX_VERSION = "1"
+
+DEFAULT_PER_PAGE = 10
+FEED_NAME = "feed.xml"
+FEED_ENTRIES = 20
+SITEMAP_NAME = "sitemap.xml"
+
+_DATE_RE = re.compile(r"\d{4}-\d\d-\d\d")
+
+
+def page_index_state_path_for(dest_dir) -> Path:
+	"""
+	Page index state, next to the output dir like the build manifest
+	(docs -> .docs-pages.json), so it is never deployed.
+	"""
+	dest = Path(dest_dir)
+	return dest.parent / f".{dest.name}-pages.json"
+
+
+def site_path(out_rel) -> str:
+	"""
+	Root-relative URL of an output file, without basepath (serializing a
+	content tree adds it): blog/tom/index.html -> /blog/tom/
+	"""
+	url = "/" + out_rel
+	if url.endswith("/index.html"):
+		url = url[:-len("index.html")]
+	return url
+
+
+def listing_out_rel(section, page):
+	return f"{section}/index.html" if page == 1 else f"{section}/page/{page}/index.html"
+
+
+def newest_first(entries):
+	# by title, then (stable) by date descending: undated pages sort last
+	entries = sorted(entries, key=lambda e: e["meta"]["title"])
+	return sorted(entries, key=lambda e: str(e["meta"].get("date") or ""), reverse=True)
+
+
+def listing_tree(title, entries, section, page, pages):
+	"""
+	Content tree of one listing page: a link, date and summary per entry,
+	then links to the newer and older pages.
+	"""
+	items = []
+	for entry in entries:
+		meta = entry["meta"]
+		children = [LeafNode("a", meta["title"], {"href": entry["url"]})]
+		date = meta.get("date")
+		if date is not None:
+			children.append(LeafNode(None, " "))
+			children.append(LeafNode("time", str(date), {"datetime": str(date)}))
+		if meta.get("summary"):
+			children.append(LeafNode("p", meta["summary"]))
+		items.append(ParentNode("li", children))
+	body = [LeafNode("h1", title)]
+	body.append(ParentNode("ul", items, {"class": "listing"}) if items else LeafNode("p", "Nothing here yet."))
+	nav = []
+	if page > 1:
+		nav.append(LeafNode("a", "Newer", {"href": site_path(listing_out_rel(section, page - 1)), "rel": "prev"}))
+	if page < pages:
+		nav.append(LeafNode("a", "Older", {"href": site_path(listing_out_rel(section, page + 1)), "rel": "next"}))
+	if nav:
+		body.append(ParentNode("nav", nav, {"class": "pagination"}))
+	return ParentNode("div", body)
+
+
+def _timestamp(date):
+	# RFC 3339, as Atom wants it; a bare date is midnight UTC
+	date = str(date)
+	return f"{date}T00:00:00Z" if _DATE_RE.fullmatch(date) else date
+
+
+def atom_feed(entries, base_url, title, limit=FEED_ENTRIES):
+	"""
+	Atom feed of the newest dated entries. base_url is the absolute URL
+	of the site root (site URL plus basepath, ending in '/').
+	"""
+	dated = [e for e in newest_first(entries) if e["meta"].get("date") is not None][:limit]
+	updated = _timestamp(dated[0]["meta"]["date"]) if dated else "1970-01-01T00:00:00Z"
+	lines = [
+		'<?xml version="1.0" encoding="utf-8"?>',
+		'<feed xmlns="http://www.w3.org/2005/Atom">',
+		f"  <title>{escape_attr(title)}</title>",
+		f'  <link href="{escape_attr(base_url)}"/>',
+		f'  <link rel="self" href="{escape_attr(base_url + FEED_NAME)}"/>',
+		f"  <id>{escape_attr(base_url)}</id>",
+		f"  <updated>{escape_attr(updated)}</updated>",
+		f"  <author><name>{escape_attr(title)}</name></author>",
+	]
+	for entry in dated:
+		meta = entry["meta"]
+		url = escape_attr(base_url + entry["url"][1:])
+		lines += [
+			"  <entry>",
+			f"    <title>{escape_attr(meta['title'])}</title>",
+			f'    <link href="{url}"/>',
+			f"    <id>{url}</id>",
+			f"    <updated>{escape_attr(_timestamp(meta.get('updated') or meta['date']))}</updated>",
+		]
+		if meta.get("summary"):
+			lines.append(f"    <summary>{escape_attr(meta['summary'])}</summary>")
+		lines.append("  </entry>")
+	lines.append("</feed>")
+	return "\n".join(lines) + "\n"
+
+
+def sitemap_xml(urls, base_url):
+	"""
+	sitemap.xml for [(root-relative url, date or None)], in url order.
+	"""
+	lines = [
+		'<?xml version="1.0" encoding="utf-8"?>',
+		'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+	]
+	for url, date in sorted(urls):
+		lines.append("  <url>")
+		lines.append(f"    <loc>{escape_attr(base_url + url[1:])}</loc>")
+		if date is not None and _DATE_RE.match(str(date)):
+			lines.append(f"    <lastmod>{str(date)[:10]}</lastmod>")
+		lines.append("  </url>")
+	lines.append("</urlset>")
+	return "\n".join(lines) + "\n"
+
+
+class PageIndex:
+	"""
+	Metadata of every page (metadata.page_meta), kept between builds, and
+	the outputs generated from it alone:
+
+		<section>/index.html, <section>/page/<n>/index.html
+		                a paginated listing, newest first, of the pages
+		                under each section folder (e.g. blog)
+		feed.xml        Atom feed of the newest dated pages
+		sitemap.xml     every page and listing page
+
+	Pages are added with update() as they are rendered and dropped with
+	remove(); save() then regenerates the listings of the sections whose
+	pages changed (and the feed and sitemap if any did), so a new post
+	costs its own page and its section's listing pages, not a re-read of
+	every page. Pages with "draft: true" in their front matter are
+	indexed but not listed.
+	"""
+
+	def __init__(self, dest_dir, sections=(), per_page=DEFAULT_PER_PAGE, site_url=None, feed=False, sitemap=False, state_path=None):
+		if (feed or sitemap) and not site_url:
+			raise ValueError("a feed or sitemap needs the site's absolute URL")
+		self.dest = Path(dest_dir)
+		self.state_path = Path(state_path) if state_path is not None else page_index_state_path_for(dest_dir)
+		self.sections = tuple(s.strip("/") for s in sections if s.strip("/"))
+		self.per_page = max(1, per_page)
+		self.site_url = site_url.rstrip("/") if site_url else None
+		self.feed = feed
+		self.sitemap = sitemap
+		self.pages = {}
+		# output group (a section, "feed" or "sitemap") -> files written for it
+		self.outputs = {}
+		self.key = None
+		self._updates = {}
+		self._removed = set()
+
+	@classmethod
+	def load(cls, dest_dir, state_path=None, **options):
+		index = cls(dest_dir, state_path=state_path, **options)
+		try:
+			state = json.loads(index.state_path.read_text(encoding="utf-8"))
+		except (FileNotFoundError, ValueError):
+			return index
+		if state.get("version") == INDEX_VERSION:
+			index.pages = state.get("pages", {})
+			index.outputs = state.get("outputs", {})
+			index.key = state.get("key")
+		return index
+
+	def __contains__(self, src_rel):
+		return src_rel in self.pages and src_rel not in self._removed
+
+	def update(self, src_rel, out_rel, meta):
+		"""
+		Index (or re-index) the page written to out_rel from its metadata.
+		"""
+		self._removed.discard(src_rel)
+		self._updates[src_rel] = {"url": site_path(out_rel), "meta": meta}
+
+	def remove(self, src_rel):
+		self._updates.pop(src_rel, None)
+		if src_rel in self.pages:
+			self._removed.add(src_rel)
+
+	def forget_missing(self, present):
+		for src_rel in set(self.pages) - set(present):
+			self.remove(src_rel)
+
+	def listed(self, section=None):
+		"""
+		Entries of the pages shown in listings (all, or those under
+		section), newest first.
+		"""
+		prefix = f"{section}/" if section is not None else ""
+		return newest_first(
+			entry for src_rel, entry in self.pages.items()
+			if src_rel.startswith(prefix) and src_rel != f"{prefix}index.md" and not entry["meta"].get("draft")
+		)
+
+	def save(self, template, basepath="/", site_key="", assets=None, minify=False, changes=None):
+		"""
+		Apply pending updates and removals, regenerate the outputs they
+		affect and save the state. Everything is regenerated when
+		site_key (a hash of the template and other site-wide inputs),
+		basepath or the options differ from the last save. Files are only
+		rewritten when their bytes change. Returns the number of outputs
+		generated.
+		"""
+		changed = set(self._removed)
+		for src_rel in self._removed:
+			self.pages.pop(src_rel, None)
+		for src_rel, entry in self._updates.items():
+			if self.pages.get(src_rel) != entry:
+				changed.add(src_rel)
+			self.pages[src_rel] = entry
+
+		basepath = normalize_basepath(basepath)
+		options = [INDEX_VERSION, site_key, basepath, self.sections, self.per_page, self.site_url, self.feed, self.sitemap]
+		key = hash_bytes(json.dumps(options).encode("utf-8"))
+		force = key != self.key
+		base_url = f"{self.site_url}{basepath}" if self.site_url else None
+
+		page_urls = {entry["url"]: src_rel for src_rel, entry in self.pages.items()}
+		outputs = {}
+		generated = 0
+		for section in self.sections:
+			old = self.outputs.get(section, [])
+			touched = any(rel.startswith(section + "/") for rel in changed)
+			if not (force or touched or not old or not (self.dest / old[0]).exists()):
+				outputs[section] = old
+				continue
+			entries = self.listed(section)
+			pages = max(1, -(-len(entries) // self.per_page))
+			name = section.rsplit("/", 1)[-1].replace("-", " ").replace("_", " ").title()
+			written = []
+			for page in range(1, pages + 1):
+				out_rel = listing_out_rel(section, page)
+				clash = page_urls.get(site_path(out_rel))
+				if clash is not None:
+					raise ValueError(f"listing {out_rel} would overwrite the page {clash}")
+				title = name if page == 1 else f"{name} (page {page})"
+				chunk = entries[(page - 1) * self.per_page:page * self.per_page]
+				root = listing_tree(title, chunk, section, page, pages)
+				self._write(out_rel, render_tree(root, title, template, basepath, assets=assets, minify=minify), changes)
+				written.append(out_rel)
+			outputs[section] = written
+			generated += len(written)
+
+		site_changed = force or bool(changed)
+		if self.feed:
+			if site_changed or not (self.dest / FEED_NAME).exists():
+				home = self.pages.get("index.md")
+				title = home["meta"]["title"] if home is not None else self.site_url
+				self._write(FEED_NAME, atom_feed(self.listed(), base_url, title), changes)
+				generated += 1
+			outputs["feed"] = [FEED_NAME]
+		if self.sitemap:
+			if site_changed or not (self.dest / SITEMAP_NAME).exists():
+				urls = [
+					(entry["url"], entry["meta"].get("updated") or entry["meta"].get("date"))
+					for entry in self.pages.values() if not entry["meta"].get("draft")
+				]
+				for section in self.sections:
+					urls += [("/" + out_rel[:-len("index.html")], None) for out_rel in outputs[section]]
+				self._write(SITEMAP_NAME, sitemap_xml(urls, base_url), changes)
+				generated += 1
+			outputs["sitemap"] = [SITEMAP_NAME]
+
+		# listing pages past the last one, and outputs no longer wanted
+		keep = {rel for rels in outputs.values() for rel in rels}
+		for rels in self.outputs.values():
+			for out_rel in rels:
+				if out_rel not in keep:
+					remove_output(self.dest, out_rel, changes)
+
+		self.outputs = outputs
+		self.key = key
+		self._write_state()
+		self._updates = {}
+		self._removed = set()
+		return generated
+
+	def clear(self, changes=None):
+		"""
+		Remove every generated output and the state, e.g. when a build no
+		longer asks for listings, a feed or a sitemap.
+		"""
+		for rels in self.outputs.values():
+			for out_rel in rels:
+				remove_output(self.dest, out_rel, changes)
+		self.outputs = {}
+		self.state_path.unlink(missing_ok=True)
+
+	def _write_state(self):
+		state = {"version": INDEX_VERSION, "key": self.key, "outputs": self.outputs, "pages": dict(sorted(self.pages.items()))}
+		tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+		tmp.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+		tmp.replace(self.state_path)
+
+	def _write(self, out_rel, text, changes):
+		path = self.dest / out_rel
+		status = write_if_changed(path, text)
+		if changes is not None:
+			changes.record(path, status)
@@ -0,0 +1,249 @@
+import hashlib
+import re
+from pathlib import Path
+
+from minify import minify_markup
+
+# {{ Name }} is a value placeholder, {{> file.html }} includes a partial
+# (path relative to the including template) at compile time.
+_TAG_RE = re.compile(r"\{\{\s*(>)?\s*([\w./-]+)\s*\}\}")
+
+# root-relative URLs in the template's own markup that need the basepath
+_URL_ATTR_RE = re.compile(r'\b(href|src)="(/(?!/)[^"]*)')
+
+_LINK_RE = re.compile(r"<link\b[^>]*>", re.I)
+_STYLESHEET_RE = re.compile(r"""\brel=["']?stylesheet\b""", re.I)
+_LINK_HREF_RE = re.compile(r"""\bhref=["']?(/(?!/)[^"'\s>]*)""", re.I)
+_TAG_NAME_RE = re.compile(r"<([a-zA-Z][\w-]*)")
+
+# names of the placeholders that stand in for inlined stylesheets
+STYLE_PREFIX = "style:"
+
+
+def normalize_basepath(basepath) -> str:
+	"""
+	Return basepath as '/' or '/prefix/'.
+	"""
+	if not basepath or basepath == "/":
+		return "/"
+	if not basepath.endswith("/"):
+		basepath = basepath + "/"
+	if not basepath.startswith("/"):
+		basepath = "/" + basepath
+	return basepath
+
+
+def page_url(basepath, out_rel) -> str:
+	"""
+	Public URL of an output file: blog/tom/index.html -> /prefix/blog/tom/
+	"""
+	url = normalize_basepath(basepath) + out_rel
+	if url.endswith("/index.html"):
+		url = url[:-len("index.html")]
+	return url
+
+
+class Placeholder:
+	__slots__ = ("name",)
+
+	def __init__(self, name):
+		self.name = name
+
+	def __eq__(self, other):
+		return isinstance(other, Placeholder) and self.name == other.name
+
+	def __repr__(self):
+		return f"Placeholder({self.name})"
+
+
+class Template:
+	"""
+	A page template compiled into literal strings and Placeholders.
+
+	Rendering is a single join over the segments, so each page costs one
+	pass over its own output instead of one str.replace per placeholder.
+	"""
+
+	def __init__(self, segments, basepath="/", sources=()):
+		self.segments = segments
+		self.basepath = basepath
+		# files this template was compiled from: itself plus any partials
+		self.sources = tuple(sources)
+		# bytes minification removed from the literal markup (per render)
+		self.saved = 0
+		self._rebased = {}
+
+	@classmethod
+	def compile(cls, text, base_dir=None, _including=(), read=None):
+		"""
+		Compile template text. Partials are read from files relative to
+		base_dir, or through read(path) -> str when given (e.g. templates
+		held in memory).
+		"""
+		segments = []
+		sources = []
+		pos = 0
+		for m in _TAG_RE.finditer(text):
+			if m.start() > pos:
+				segments.append(text[pos:m.start()])
+			is_partial, name = m.group(1), m.group(2)
+			if is_partial:
+				partial = Path(base_dir or ".") / name
+				key = partial.resolve()
+				if key in _including:
+					raise ValueError(f"template partial includes itself: {partial}")
+				partial_text = read(partial) if read is not None else partial.read_text(encoding="utf-8")
+				inner = cls.compile(partial_text, partial.parent, _including + (key,), read)
+				segments.extend(inner.segments)
+				sources.append(partial)
+				sources.extend(inner.sources)
+			else:
+				segments.append(Placeholder(name))
+			pos = m.end()
+		if pos < len(text):
+			segments.append(text[pos:])
+		return cls(_merge_literals(segments), sources=sources)
+
+	def placeholders(self):
+		return [seg.name for seg in self.segments if isinstance(seg, Placeholder)]
+
+	def tags(self):
+		"""
+		Lowercased names of the elements in the template's own markup.
+		"""
+		return frozenset(
+			name.lower()
+			for seg in self.segments if seg.__class__ is str
+			for name in _TAG_NAME_RE.findall(seg)
+		)
+
+	def styles(self):
+		"""
+		URLs of the stylesheets replaced by placeholders (see for_basepath).
+		"""
+		return [seg.name[len(STYLE_PREFIX):] for seg in self.segments if isinstance(seg, Placeholder) and seg.name.startswith(STYLE_PREFIX)]
+
+	def for_basepath(self, basepath, assets=None, minify=False):
+		"""
+		Return this template with root-relative href/src in its literal
+		markup prefixed by basepath, and pointed at fingerprinted names for
+		assets in an AssetManifest. With minify, the literal markup is
+		minified as well (see minify_markup). Done once per basepath, not
+		per page.
+
+		If assets inlines styles (an Inliner), each <link rel=stylesheet>
+		to a stylesheet it handles becomes a Placeholder named
+		STYLE_PREFIX + its URL, for the page's <style> to fill in.
+		"""
+		basepath = normalize_basepath(basepath)
+		if basepath == self.basepath and assets is None and not minify:
+			return self
+		key = (basepath, assets.digest() if assets is not None else None, minify)
+		rebased = self._rebased.get(key)
+		if rebased is None:
+			def rewrite(m):
+				url = m.group(2)
+				if assets is not None:
+					url = assets.rewrite(url)
+				if basepath != "/":
+					url = basepath + url[1:]
+				return f'{m.group(1)}="{url}'
+
+			segments = self.segments
+			if assets is not None and assets.inlines_styles:
+				segments = _inline_style_links(segments, assets)
+			segments = [
+				_URL_ATTR_RE.sub(rewrite, seg) if seg.__class__ is str else seg
+				for seg in segments
+			]
+			saved = 0
+			if minify:
+				last = len(segments) - 1
+				for i, seg in enumerate(segments):
+					if seg.__class__ is str:
+						minified = minify_markup(seg, at_start=i == 0, at_end=i == last)
+						saved += len(seg.encode("utf-8")) - len(minified.encode("utf-8"))
+						segments[i] = minified
+			rebased = Template(segments, basepath, self.sources)
+			rebased.saved = saved
+			self._rebased[key] = rebased
+		return rebased
+
+	def render(self, values) -> str:
+		"""
+		Fill placeholders from values; missing ones render as "".
+		"""
+		get = values.get
+		return "".join([
+			seg if seg.__class__ is str else str(get(seg.name, ""))
+			for seg in self.segments
+		])
+
+
+def _inline_style_links(segments, assets):
+	out = []
+	for seg in segments:
+		if seg.__class__ is not str:
+			out.append(seg)
+			continue
+		pos = 0
+		for m in _LINK_RE.finditer(seg):
+			href = _LINK_HREF_RE.search(m.group(0))
+			if not _STYLESHEET_RE.search(m.group(0)) or href is None or not assets.inlines(href.group(1)):
+				continue
+			out.append(seg[pos:m.start()])
+			out.append(Placeholder(STYLE_PREFIX + href.group(1)))
+			pos = m.end()
+		out.append(seg[pos:])
+	return [seg for seg in out if seg != ""]
+
+
+def _merge_literals(segments):
+	merged = []
+	for seg in segments:
+		if seg.__class__ is str and merged and merged[-1].__class__ is str:
+			merged[-1] += seg
+		else:
+			merged.append(seg)
+	return merged
+
+
+_cache = {}
+
+
+def _stamp(paths):
+	stamps = []
+	for p in paths:
+		st = Path(p).stat()
+		stamps.append((st.st_mtime_ns, st.st_size))
+	return tuple(stamps)
+
+
+def load_template(path) -> Template:
+	"""
+	Compile the template at path, reusing the compiled form until it or
+	one of its partials changes (checked by mtime and size).
+	"""
+	path = Path(path)
+	key = str(path.resolve())
+	hit = _cache.get(key)
+	if hit is not None:
+		try:
+			if _stamp(hit[1].sources) == hit[0]:
+				return hit[1]
+		except FileNotFoundError:
+			pass
+	template = Template.compile(path.read_text(encoding="utf-8"), path.parent)
+	template.sources = (path,) + template.sources
+	_cache[key] = (_stamp(template.sources), template)
+	return template
+
+
+def template_hash(path) -> str:
+	"""
+	Hash of the template and every partial it includes.
+	"""
+	h = hashlib.sha256()
+	for source in load_template(path).sources:
+		h.update(Path(source).read_bytes())
+	return h.hexdigest()
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+from pathlib import Path
+
+clock = time.perf_counter
+
+
+def lap(timings, stage, start):
+	"""
+	Append (stage, start, duration) to timings and return the current time,
+	which becomes the start of the next stage. timings=None is a no-op, so
+	callers pay a single comparison per stage when profiling is off.
+	"""
+	if timings is None:
+		return start
+	now = clock()
+	timings.append((stage, start, now - start))
+	return now
+
+
+def percentile(sorted_values, q):
+	if not sorted_values:
+		return 0.0
+	k = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+	return sorted_values[k]
+
+
+class BuildProfiler:
+	"""
+	Collects per-item, per-stage timings for a build.
+
+	Each event is (item, stage, start, duration, lane): item is a page or
+	static file, lane the process that did the work (one trace lane per
+	worker in parallel builds). Starts come from time.perf_counter, which
+	is CLOCK_MONOTONIC on Linux and therefore comparable across workers.
+	"""
+
+	def __init__(self):
+		self.events = []
+		self.origin = clock()
+
+	def add(self, item, timings, lane=None):
+		lane = os.getpid() if lane is None else lane
+		for stage, start, duration in timings:
+			self.events.append((str(item), stage, start, duration, lane))
+
+	def stage_durations(self):
+		stages = {}
+		for _, stage, _, duration, _ in self.events:
+			stages.setdefault(stage, []).append(duration)
+		return stages
+
+	def item_totals(self):
+		totals = {}
+		for item, _, _, duration, _ in self.events:
+			totals[item] = totals.get(item, 0.0) + duration
+		return totals
+
+	def summary(self, top=10) -> str:
+		lines = []
+		stages = self.stage_durations()
+		grand = sum(sum(v) for v in stages.values()) or 1.0
+		lines.append(f"{'stage':<12} {'count':>6} {'total ms':>10} {'share':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+		for stage, values in stages.items():
+			values = sorted(values)
+			total = sum(values)
+			lines.append(
+				f"{stage:<12} {len(values):>6} {total * 1000:>10.1f} {total / grand:>6.0%} "
+				f"{percentile(values, 50) * 1000:>8.2f} {percentile(values, 90) * 1000:>8.2f} "
+				f"{percentile(values, 99) * 1000:>8.2f} {values[-1] * 1000:>8.2f}"
+			)
+		slowest = sorted(self.item_totals().items(), key=lambda kv: kv[1], reverse=True)[:top]
+		if slowest:
+			lines.append(f"slowest {len(slowest)}:")
+			for item, total in slowest:
+				lines.append(f"  {total * 1000:8.2f} ms  {item}")
+		return "\n".join(lines)
+
+	def trace_events(self):
+		"""
+		Chrome trace-event 'complete' events, microseconds since build start.
+		"""
+		events = []
+		for item, stage, start, duration, lane in sorted(self.events, key=lambda e: e[2]):
+			events.append({
+				"name": stage,
+				"cat": "build",
+				"ph": "X",
+				"ts": round((start - self.origin) * 1e6, 3),
+				"dur": round(duration * 1e6, 3),
+				"pid": 1,
+				"tid": lane,
+				"args": {"item": item},
+			})
+		for lane in sorted({e[4] for e in self.events}):
+			events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": f"worker {lane}"}})
+		return events
+
+	def write_trace(self, path):
+		"""
+		Write a trace loadable in chrome://tracing or Perfetto.
+		"""
+		Path(path).write_text(json.dumps({"traceEvents": self.trace_events()}), encoding="utf-8")
@@ -0,0 +1,308 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from htmlnode import escape_attr, escape_text, serialize_minified
+from markdown_blocks import markdown_to_html_node
+from metadata import page_meta, split_front_matter
+from page_template import STYLE_PREFIX, Template, load_template, normalize_basepath
+from profiler import clock, lap
+from render_cache import RenderCache
+from block_cache import process_block_cache
+from highlight import process_highlight_cache
+from search_index import page_text
+from inline import tree_tags
+
+
+def render_page(md_text: str, template, basepath: str, values=None, timings=None, cache=None, block_cache=None, assets=None, text=None, minify=False, saved=None, meta=None) -> str:
+	"""
+	Render one markdown document into a full HTML page (pure, no I/O).
+
+	template is a compiled Template (or template text). Root-relative
+	links and images are prefixed with basepath while the content tree is
+	serialized, and the template's own URLs once per basepath, so the
+	finished page is never rescanned. values fills extra placeholders
+	such as Date or Description. If timings is a list, per-stage
+	(stage, start, duration) tuples are appended to it. With a
+	RenderCache, a hit skips parsing, title extraction and serializing.
+	On a miss, blocks are looked up in block_cache (the process-wide
+	BlockCache by default), so an edited page re-parses only its edited
+	blocks. With an AssetManifest, links to static files in the content
+	and the template use their fingerprinted names. If text is a dict, it
+	is filled with the page's plain text for the search index (see
+	search_index.page_text), which is cached along with the content.
+	With minify, the content is serialized minified and the template's
+	markup minified once; if saved is a list, the bytes this removed from
+	this page are appended to it. With an Inliner as assets, small images
+	and the template's stylesheets are inlined; the tags the page uses
+	(which pick its critical CSS) are cached along with the content.
+
+	Front matter (see metadata.split_front_matter) is not part of the
+	content: its scalar and list values fill placeholders of the same
+	name. The title is the front matter's or the first h1 of the parsed
+	content. If meta is a dict, it is filled with the page's metadata
+	(metadata.page_meta), which is cached along with the content.
+	"""
+	return render_targets(
+		md_text, template, [basepath], values=values, timings=timings, cache=cache, block_cache=block_cache,
+		assets=assets, text=text, minify=minify, saved=saved, meta=meta
+	)[0]
+
+
+def parse_page(md_text: str, block_cache=None):
+	"""
+	(front matter dict, content tree) of a markdown page, its blocks
+	looked up in block_cache (the process-wide BlockCache by default).
+	"""
+	if block_cache is None:
+		block_cache = process_block_cache()
+	front, body = split_front_matter(md_text)
+	return front, markdown_to_html_node(body, block_cache=block_cache)
+
+
+def render_fragment(md_text: str, basepath: str, block_cache=None, assets=None, minify=False) -> str:
+	"""
+	Just the content HTML of a markdown page, parsed and serialized the
+	way render_page does it; front matter is dropped and no title is
+	required.
+	"""
+	html_root = parse_page(md_text, block_cache)[1]
+	basepath = normalize_basepath(basepath)
+	if minify:
+		return serialize_minified(html_root, basepath, assets)[0]
+	return html_root.to_html(basepath, assets)
+
+
+def render_targets(md_text: str, template, basepaths, values=None, timings=None, cache=None, block_cache=None, assets=None, text=None, minify=False, saved=None, meta=None) -> list:
+	"""
+	render_page for several basepaths at once, returning the pages in
+	basepaths order. The markdown is parsed at most once (and not at all
+	if every basepath hits the cache); only serializing and filling the
+	template are repeated per basepath. saved gets one entry per basepath.
+	"""
+	if isinstance(template, str):
+		template = Template.compile(template)
+	variant = None
+	if assets is not None or minify:
+		variant = f"{assets.digest() if assets is not None else ''}{':min' if minify else ''}"
+
+	pages = []
+	html_root = None
+	root_tags = None
+	info = None
+	t = clock() if timings is not None else 0.0
+	for basepath in basepaths:
+		basepath = normalize_basepath(basepath)
+		rebased = template.for_basepath(basepath, assets, minify)
+		styles = rebased.styles()
+
+		entry = None
+		if cache is not None:
+			key = cache.key(md_text, basepath, variant=variant)
+			# an entry written by a build that did not need everything is a miss
+			required = ("text",) if text is not None else ()
+			if styles:
+				required += ("tags",)
+			entry = cache.get(key, required)
+			t = lap(timings, "cache", t)
+
+		if entry is not None:
+			title = entry["title"]
+			content_html = entry["content"]
+			content_saved = entry.get("saved", 0)
+			if text is not None:
+				text.update(entry["text"])
+			content_tags = entry.get("tags")
+			info = entry["meta"]
+		else:
+			if html_root is None:
+				front, html_root = parse_page(md_text, block_cache)
+				t = lap(timings, "parse", t)
+				info = page_meta(html_root, front)
+				t = lap(timings, "title", t)
+				if text is not None:
+					text.update(page_text(html_root, info["title"]))
+					t = lap(timings, "text", t)
+			title = escape_text(info["title"])
+			if minify:
+				content_html, content_saved = serialize_minified(html_root, basepath, assets)
+			else:
+				content_html, content_saved = html_root.to_html(basepath, assets), 0
+			t = lap(timings, "serialize", t)
+			entry = {"title": title, "content": content_html, "meta": info}
+			if minify:
+				entry["saved"] = content_saved
+			if text is not None:
+				entry["text"] = text
+			content_tags = None
+			if styles:
+				if root_tags is None:
+					root_tags = sorted(tree_tags(html_root))
+				content_tags = entry["tags"] = root_tags
+			if cache is not None:
+				cache.put(key, entry)
+
+		page_values = {key: _placeholder_value(value) for key, value in info.items() if value is not None}
+		pages.append(_fill(rebased, styles, title, content_html, content_tags, basepath, assets, minify, page_values, values))
+		if saved is not None:
+			saved.append(content_saved + rebased.saved)
+		t = lap(timings, "template", t)
+	if meta is not None:
+		meta.update(info)
+	return pages
+
+
+def _placeholder_value(value):
+	if isinstance(value, list):
+		return escape_attr(", ".join(str(v) for v in value))
+	return escape_attr(value)
+
+
+def _fill(template, styles, title, content_html, content_tags, basepath, assets, minify, page_values, values):
+	page_values["Title"] = title
+	page_values["Content"] = content_html
+	if styles:
+		tags = template.tags().union(content_tags)
+		for url in styles:
+			page_values[STYLE_PREFIX + url] = assets.style_html(url, tags, basepath, minify)
+	if values:
+		page_values.update(values)
+	return template.render(page_values)
+
+
+def render_tree(root, title: str, template, basepath: str, values=None, assets=None, minify=False) -> str:
+	"""
+	Render a content tree built in code (a listing page, say) into a full
+	page the way render_page renders parsed markdown: same basepath,
+	asset, inlining and minify handling, title given as plain text.
+	"""
+	if isinstance(template, str):
+		template = Template.compile(template)
+	basepath = normalize_basepath(basepath)
+	template = template.for_basepath(basepath, assets, minify)
+	styles = template.styles()
+	if minify:
+		content_html = serialize_minified(root, basepath, assets)[0]
+	else:
+		content_html = root.to_html(basepath, assets)
+	content_tags = sorted(tree_tags(root)) if styles else None
+	return _fill(template, styles, escape_text(title), content_html, content_tags, basepath, assets, minify, {}, values)
+
+
+# Per-worker state, filled in once by _init_worker so the template is read
+# a single time per process instead of once per page.
+_worker_template = None
+_worker_basepaths = None
+_worker_cache = None
+_worker_assets = None
+_worker_minify = False
+
+
+def _init_worker(template_path, basepaths, cache_root, assets=None, minify=False):
+	global _worker_template, _worker_basepaths, _worker_cache, _worker_assets, _worker_minify
+	_worker_template = load_template(template_path)
+	_worker_basepaths = basepaths
+	_worker_assets = assets
+	_worker_minify = minify
+	_worker_cache = RenderCache(cache_root) if cache_root is not None else None
+	if cache_root is not None:
+		process_block_cache().disk = RenderCache(cache_root)
+		process_highlight_cache().disk = RenderCache(cache_root)
+
+
+class WorkerResult(NamedTuple):
+	"""
+	One source's result from a render worker. pages and saved are lists
+	in basepath order; err is set (and pages None) if rendering failed.
+	"""
+	pages: list
+	err: str
+	timings: list
+	pid: int
+	hit: bool
+	text: dict
+	saved: list
+	meta: dict
+
+
+def _render_in_worker(task):
+	from_path, profile, want_text, want_meta = task
+	text = {} if want_text else None
+	meta = {} if want_meta else None
+	saved = []
+	timings = [] if profile else None
+	hits = _worker_cache.hits if _worker_cache is not None else 0
+	try:
+		t = clock() if profile else 0.0
+		md_text = Path(from_path).read_text(encoding="utf-8")
+		lap(timings, "read", t)
+		pages = render_targets(md_text, _worker_template, _worker_basepaths, timings=timings, cache=_worker_cache, assets=_worker_assets, text=text, minify=_worker_minify, saved=saved, meta=meta)
+		err = None
+	except Exception as e:
+		pages, err = None, f"{type(e).__name__}: {e}"
+	hit = _worker_cache is not None and _worker_cache.hits > hits
+	return WorkerResult(pages, err, timings, os.getpid(), hit, text, saved, meta)
+
+
+class RenderError(Exception):
+	"""
+	Raised when one or more pages failed to render; carries every failure.
+	"""
+
+	def __init__(self, failures):
+		self.failures = failures
+		lines = [f"{path}: {err}" for path, err in failures]
+		super().__init__(f"{len(failures)} page(s) failed to render:\n" + "\n".join(lines))
+
+
+def render_pages(sources, template_path, basepath, jobs, profiler=None, cache=None, assets=None, texts=None, minify=False, saved=None, metas=None):
+	"""
+	Render sources (markdown paths) on a pool of jobs processes.
+
+	Returns the rendered HTML strings in the same order as sources. Nothing
+	is written here: if any page fails, RenderError lists all failures so
+	the caller can abort before touching the output directory. Worker
+	timings are added to profiler, one lane per worker process. Workers
+	share cache's directory and their hits/misses are added to cache.
+	If texts is a list, each page's search text dict is appended to it,
+	if saved is a list, the bytes minify removed from each page, and if
+	metas is a list, each page's metadata dict, all in source order.
+
+	basepath may also be a list of basepaths: each source is then parsed
+	once and serialized for every one of them (see render_targets), and
+	its result and saved entry are lists in basepath order.
+	"""
+	multi = not isinstance(basepath, str)
+	basepaths = list(basepath) if multi else [basepath]
+	sources = list(sources)
+	if not sources:
+		return []
+	chunksize = max(1, len(sources) // (jobs * 4))
+	with ProcessPoolExecutor(
+		max_workers=jobs,
+		initializer=_init_worker,
+		initargs=(str(template_path), basepaths, str(cache.root) if cache is not None else None, assets, minify),
+	) as pool:
+		tasks = [(str(s), profiler is not None, texts is not None, metas is not None) for s in sources]
+		results = list(pool.map(_render_in_worker, tasks, chunksize=chunksize))
+
+	if profiler is not None:
+		for src, result in zip(sources, results):
+			profiler.add(src, result.timings, lane=result.pid)
+	if cache is not None:
+		for result in results:
+			if result.hit:
+				cache.hits += 1
+			else:
+				cache.misses += 1
+	failures = [(src, result.err) for src, result in zip(sources, results) if result.err is not None]
+	if failures:
+		raise RenderError(failures)
+	if texts is not None:
+		texts.extend(result.text for result in results)
+	if saved is not None:
+		saved.extend(result.saved if multi else result.saved[0] for result in results)
+	if metas is not None:
+		metas.extend(result.meta for result in results)
+	return [result.pages if multi else result.pages[0] for result in results]
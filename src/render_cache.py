@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from manifest import GENERATOR_VERSION
+from output import file_mode
+
+DEFAULT_CACHE_DIR = ".cache/render"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class RenderCache:
+	"""
+	On-disk cache of rendered page content, shared across builds.
+
+	Entries are JSON files keyed by a hash of the markdown, the basepath
+	(links are prefixed while serializing) and GENERATOR_VERSION, fanned
+	out as root/ab/abcd....json. Writes go through a temp file and
+	os.replace so concurrent builds never read a partial entry. A hit
+	bumps the entry's mtime, which is the recency prune() evicts by.
+	"""
+
+	def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+		self.root = Path(root)
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	@staticmethod
+	def key(md_text: str, basepath: str, namespace="page", variant=None) -> str:
+		# variant: anything else the rendered output depends on (e.g. the
+		# asset manifest digest)
+		h = hashlib.sha256()
+		parts = (namespace, GENERATOR_VERSION, basepath) if variant is None else (namespace, GENERATOR_VERSION, basepath, variant)
+		for part in parts:
+			h.update(part.encode("utf-8"))
+			h.update(b"\0")
+		h.update(md_text.encode("utf-8"))
+		return h.hexdigest()
+
+	def _path(self, key: str) -> Path:
+		return self.root / key[:2] / f"{key}.json"
+
+	def get(self, key: str, required=()):
+		"""
+		The entry stored under key, or None. An entry missing any of the
+		required fields (written by a build that did not need them) is a
+		miss too.
+		"""
+		path = self._path(key)
+		try:
+			entry = json.loads(path.read_text(encoding="utf-8"))
+		except (FileNotFoundError, ValueError):
+			self.misses += 1
+			return None
+		if any(field not in entry for field in required):
+			self.misses += 1
+			return None
+		try:
+			os.utime(path)
+		except OSError:
+			pass
+		self.hits += 1
+		return entry
+
+	def put(self, key: str, entry):
+		path = self._path(key)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+		try:
+			# readable by every user sharing the cache, not mkstemp's 0600
+			os.fchmod(fd, file_mode(path))
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				json.dump(entry, f, separators=(",", ":"))
+			os.replace(tmp, path)
+		except BaseException:
+			if os.path.exists(tmp):
+				os.unlink(tmp)
+			raise
+
+	def prune(self):
+		"""
+		Evict least recently used entries until the cache fits max_bytes.
+		"""
+		if not self.root.exists():
+			return
+		entries = []
+		total = 0
+		for path in self.root.glob("*/*.json"):
+			try:
+				st = path.stat()
+			except FileNotFoundError:
+				continue
+			entries.append((st.st_mtime_ns, st.st_size, path))
+			total += st.st_size
+		entries.sort()
+		for _, size, path in entries:
+			if total <= self.max_bytes:
+				break
+			try:
+				path.unlink()
+			except FileNotFoundError:
+				pass
+			total -= size
+			self.evictions += 1
+
+	def stats(self) -> str:
+		lookups = self.hits + self.misses
+		rate = self.hits / lookups if lookups else 0.0
+		return f"render cache: {self.hits} hit(s), {self.misses} miss(es) ({rate:.0%} hit rate), {self.evictions} evicted"
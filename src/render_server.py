@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from block_cache import process_block_cache
+from highlight import process_highlight_cache
+from output import read_umask
+from page_template import load_template
+from profiler import clock, percentile
+from render import render_fragment, render_page
+from render_cache import DEFAULT_CACHE_DIR, RenderCache
+
+# latencies kept for the stats endpoint's percentiles
+STATS_WINDOW = 2048
+
+# throughput is reported over completions in the last this many seconds
+RATE_SECONDS = 60.0
+
+MAX_BODY = 8 * 1024 * 1024
+
+ENDPOINTS = ("/render/html", "/render/page")
+
+
+# Per-worker state, set once by _init_worker: the template stays compiled
+# and the block cache warm for the life of the process.
+_worker_template_path = None
+_worker_cache = None
+_worker_minify = False
+
+
+def _init_worker(template_path, cache_root, minify=False):
+	global _worker_template_path, _worker_cache, _worker_minify
+	_worker_template_path = template_path
+	_worker_minify = minify
+	_worker_cache = RenderCache(cache_root) if cache_root is not None else None
+	if cache_root is not None:
+		process_block_cache().disk = RenderCache(cache_root)
+		process_highlight_cache().disk = RenderCache(cache_root)
+	load_template(template_path)
+
+
+def _render(task):
+	endpoint, md_text, basepath = task
+	if endpoint == "/render/html":
+		return render_fragment(md_text, basepath, minify=_worker_minify)
+	# load_template recompiles only if the template or a partial changed
+	template = load_template(_worker_template_path)
+	return render_page(md_text, template, basepath, cache=_worker_cache, minify=_worker_minify)
+
+
+class RenderStats:
+	"""
+	Request counters and a sliding window of latencies (queueing
+	included), per endpoint. Thread-safe.
+	"""
+
+	def __init__(self, window=STATS_WINDOW):
+		self.started = clock()
+		self.counts = {}
+		self.rejected = 0
+		self.errors = 0
+		self._latencies = {}
+		self._window = window
+		self._done = deque(maxlen=window)
+		self._lock = threading.Lock()
+
+	def record(self, endpoint, seconds, ok=True):
+		now = clock()
+		with self._lock:
+			self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+			if not ok:
+				self.errors += 1
+			self._latencies.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+			self._done.append(now)
+
+	def reject(self):
+		with self._lock:
+			self.rejected += 1
+
+	def snapshot(self, in_flight=0, capacity=0) -> dict:
+		now = clock()
+		with self._lock:
+			recent = [t for t in self._done if now - t <= RATE_SECONDS]
+			span = min(RATE_SECONDS, now - self.started)
+			endpoints = {}
+			for endpoint, latencies in sorted(self._latencies.items()):
+				ordered = sorted(latencies)
+				endpoints[endpoint] = {
+					"requests": self.counts[endpoint],
+					"p50_ms": round(percentile(ordered, 50) * 1000, 3),
+					"p99_ms": round(percentile(ordered, 99) * 1000, 3),
+				}
+			return {
+				"uptime_s": round(now - self.started, 3),
+				"requests": sum(self.counts.values()),
+				"errors": self.errors,
+				"rejected": self.rejected,
+				"in_flight": in_flight,
+				"capacity": capacity,
+				"requests_per_s": round(len(recent) / span, 3) if span > 0 else 0.0,
+				"endpoints": endpoints,
+			}
+
+
+class RenderService:
+	"""
+	Renders markdown on a pool of jobs worker processes that keep the
+	compiled template and block cache warm between requests.
+
+	At most jobs + max_queue requests are admitted at once (rendering or
+	waiting for a worker); acquire() fails beyond that so the server can
+	answer 503 at once instead of queuing without bound.
+	"""
+
+	def __init__(self, template_path="template.html", jobs=1, max_queue=None, cache_root=None, minify=False):
+		self.jobs = max(1, jobs)
+		self.capacity = self.jobs + (max_queue if max_queue is not None else self.jobs * 8)
+		self.stats = RenderStats()
+		self._slots = threading.BoundedSemaphore(self.capacity)
+		self._in_flight = 0
+		self._lock = threading.Lock()
+		self._pool = ProcessPoolExecutor(
+			max_workers=self.jobs,
+			initializer=_init_worker,
+			initargs=(str(template_path), str(cache_root) if cache_root is not None else None, minify),
+		)
+
+	def acquire(self) -> bool:
+		if not self._slots.acquire(blocking=False):
+			self.stats.reject()
+			return False
+		with self._lock:
+			self._in_flight += 1
+		return True
+
+	def release(self):
+		with self._lock:
+			self._in_flight -= 1
+		self._slots.release()
+
+	def render(self, endpoint, md_text, basepath="/") -> str:
+		"""
+		Render on a worker (the caller must hold a slot from acquire());
+		errors raised while rendering are re-raised here.
+		"""
+		return self._pool.submit(_render, (endpoint, md_text, basepath)).result()
+
+	def stats_snapshot(self) -> dict:
+		with self._lock:
+			in_flight = self._in_flight
+		return self.stats.snapshot(in_flight, self.capacity)
+
+	def close(self):
+		self._pool.shutdown(cancel_futures=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+	"""
+	POST /render/html   markdown body -> HTML fragment of the content
+	POST /render/page   markdown body -> full page through the template
+	GET  /stats         JSON counters, p50/p99 latency and throughput
+
+	?basepath=/prefix/ on a render request prefixes root-relative links.
+	"""
+
+	service = None
+	protocol_version = "HTTP/1.1"
+
+	def log_message(self, format, *args):
+		pass
+
+	def do_GET(self):
+		if urlsplit(self.path).path != "/stats":
+			self._send(404, "text/plain", "not found\n")
+			return
+		self._send(200, "application/json", json.dumps(self.service.stats_snapshot(), indent=1))
+
+	def do_POST(self):
+		start = clock()
+		url = urlsplit(self.path)
+		if url.path not in ENDPOINTS:
+			self._send(404, "text/plain", "not found\n")
+			return
+		length = self.headers.get("Content-Length")
+		if length is None:
+			self._send(411, "text/plain", "Content-Length required\n", close=True)
+			return
+		try:
+			length = int(length)
+		except ValueError:
+			length = -1
+		if length < 0:
+			self._send(400, "text/plain", "bad Content-Length\n", close=True)
+			return
+		if length > MAX_BODY:
+			self._send(413, "text/plain", "request body too large\n", close=True)
+			return
+		# shed load before spending time on the upload; the unread body
+		# means the connection cannot be reused
+		if not self.service.acquire():
+			self._send(503, "text/plain", "render queue full\n", {"Retry-After": "1"}, close=True)
+			return
+		ok = False
+		try:
+			body = self.rfile.read(length)
+			basepath = parse_qs(url.query).get("basepath", ["/"])[0]
+			html = self.service.render(url.path, body.decode("utf-8"), basepath)
+			ok = True
+		except ValueError as e:
+			# bad markdown (e.g. a page without a title): the client's fault
+			status, html = 422, f"{type(e).__name__}: {e}\n"
+		except Exception as e:
+			status, html = 500, f"{type(e).__name__}: {e}\n"
+		finally:
+			self.service.release()
+		self.service.stats.record(url.path, clock() - start, ok)
+		if ok:
+			self._send(200, "text/html; charset=utf-8", html)
+		else:
+			self._send(status, "text/plain; charset=utf-8", html)
+
+	def _send(self, status, content_type, text, headers=None, close=False):
+		data = text.encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(data)))
+		for name, value in (headers or {}).items():
+			self.send_header(name, value)
+		if close:
+			self.send_header("Connection", "close")
+			self.close_connection = True
+		self.end_headers()
+		self.wfile.write(data)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+	def get_request(self):
+		request, _ = super().get_request()
+		# BaseHTTPRequestHandler expects a (host, port) client address
+		return request, ("local", 0)
+
+
+def start_render_server(service, host="127.0.0.1", port=8890, socket_path=None):
+	"""
+	Serve service over HTTP on a background thread, on host:port or on a
+	Unix socket at socket_path; returns the server (port=0 picks a free
+	port, see server.server_address).
+	"""
+	handler = type("Handler", (RenderRequestHandler,), {"service": service})
+	if socket_path is not None:
+		if os.path.exists(socket_path):
+			os.unlink(socket_path)
+		server = ThreadingUnixHTTPServer(socket_path, handler)
+	else:
+		server = ThreadingHTTPServer((host, port), handler)
+		server.daemon_threads = True
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	return server
+
+
+def parse_args(argv=None):
+	parser = argparse.ArgumentParser(description="Serve markdown rendering over HTTP for live previews.")
+	parser.add_argument("--template", default="template.html", help="page template for /render/page")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8890)
+	parser.add_argument("--socket", metavar="PATH", help="listen on a Unix socket instead of host:port")
+	parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, metavar="N", help="render worker processes")
+	parser.add_argument("--max-queue", type=int, metavar="N", help="requests allowed to wait for a worker (default 8 per worker)")
+	parser.add_argument("--cache-dir", help=f"share a render cache directory (e.g. {DEFAULT_CACHE_DIR}) with builds")
+	parser.add_argument("--minify", action="store_true", help="minify rendered pages")
+	return parser.parse_args(argv)
+
+
+def main(argv=None):
+	args = parse_args(argv)
+	# before the server threads and render pool exist
+	read_umask()
+	service = RenderService(args.template, jobs=args.jobs, max_queue=args.max_queue, cache_root=args.cache_dir, minify=args.minify)
+	server = start_render_server(service, args.host, args.port, args.socket)
+	where = args.socket or "http://{}:{}".format(*server.server_address[:2])
+	print(f"render server on {where} with {service.jobs} worker(s) (Ctrl+C to stop)")
+	try:
+		while True:
+			time.sleep(3600)
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.shutdown()
+		service.close()
+
+
+if __name__ == "__main__":
+	main()
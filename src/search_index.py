@@ -0,0 +1,354 @@
+import base64
+import json
+import re
+from pathlib import Path
+
+from htmlnode import LeafNode
+from output import write_if_changed
+
+# Bump when tokenizing, weighting or the shard format changes; the whole
+# index is then rebuilt.
+INDEX_VERSION = "1"
+
+INDEX_DIR = "search"
+
+# Terms are sharded by their first SHARD_PREFIX characters, so a query
+# loads one small file per term instead of the whole index.
+SHARD_PREFIX = 2
+
+MIN_TERM = 2
+MAX_TERM = 24
+
+TITLE_WEIGHT = 10
+HEADING_WEIGHT = 5
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+_INLINE_TAGS = frozenset(("a", "b", "i", "code", "del"))
+_SAFE_SHARD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+	"""
+	Lowercased words of text, MIN_TERM to MAX_TERM characters long.
+	"""
+	return [w for w in _WORD_RE.findall(text.lower()) if MIN_TERM <= len(w) <= MAX_TERM]
+
+
+def page_text(root, title):
+	"""
+	Plain text of a rendered content tree for indexing:
+	{"title": title, "headings": [text of each h1-h6], "body": all text}.
+
+	Walks the leaves built from text_to_textnodes output (and code
+	blocks) instead of re-reading the serialized HTML; images contribute
+	nothing.
+	"""
+	headings = []
+	body = []
+	stack = [(root, None)]
+	while stack:
+		node, heading = stack.pop()
+		if isinstance(node, LeafNode):
+			if node.tag != "img" and node.value:
+				body.append(node.value)
+				if heading is not None:
+					heading.append(node.value)
+			continue
+		if node.tag in _HEADING_TAGS:
+			heading = []
+			headings.append(heading)
+		if node.tag not in _INLINE_TAGS and body:
+			# block boundary: keep words of adjacent blocks apart
+			body.append("\n")
+		for child in reversed(node.children or ()):
+			stack.append((child, heading))
+	return {"title": title, "headings": ["".join(h) for h in headings], "body": "".join(body)}
+
+
+def term_weights(text):
+	"""
+	term -> weight for one page (a page_text() dict): one per occurrence
+	in the body, plus HEADING_WEIGHT per heading and TITLE_WEIGHT for the
+	title it is in.
+	"""
+	weights = {}
+	for term in tokenize(text["body"]):
+		weights[term] = weights.get(term, 0) + 1
+	for heading in text["headings"]:
+		for term in set(tokenize(heading)):
+			weights[term] = weights.get(term, 0) + HEADING_WEIGHT
+	for term in set(tokenize(text["title"])):
+		weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+	return weights
+
+
+def shard_for(term: str) -> str:
+	"""
+	Shard file stem for a term: its prefix if that is [a-z0-9], else 'x'
+	and the prefix's UTF-8 bytes in hex (URL- and filesystem-safe).
+	"""
+	prefix = term[:SHARD_PREFIX]
+	if _SAFE_SHARD_RE.fullmatch(prefix):
+		return prefix
+	return "x" + prefix.encode("utf-8").hex()
+
+
+def _write_varint(out: bytearray, n: int):
+	while n >= 0x80:
+		out.append((n & 0x7F) | 0x80)
+		n >>= 7
+	out.append(n)
+
+
+def encode_postings(postings) -> str:
+	"""
+	{doc id: weight} -> base64 of LEB128 varints: (id delta, weight) pairs
+	in ascending id order. Most deltas and weights fit in one byte.
+	"""
+	out = bytearray()
+	last = 0
+	for doc_id in sorted(postings):
+		_write_varint(out, doc_id - last)
+		_write_varint(out, postings[doc_id])
+		last = doc_id
+	return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_postings(encoded: str):
+	data = base64.b64decode(encoded)
+	postings = {}
+	values = []
+	n = shift = 0
+	for byte in data:
+		n |= (byte & 0x7F) << shift
+		if byte & 0x80:
+			shift += 7
+			continue
+		values.append(n)
+		n = shift = 0
+	doc_id = 0
+	for i in range(0, len(values) - 1, 2):
+		doc_id += values[i]
+		postings[doc_id] = values[i + 1]
+	return postings
+
+
+# Browser side: siteSearch(query) loads docs.json and one shard per query
+# term on demand and resolves to [{url, title, score}], best first, for
+# the pages containing every query term.
+SEARCH_JS = """\
+(function () {
+  var base = document.currentScript.src.replace(/[^/]*$/, "");
+  var cache = {};
+  function load(name) {
+    if (!cache[name]) {
+      cache[name] = fetch(base + name + ".json").then(function (r) { return r.ok ? r.json() : {}; });
+    }
+    return cache[name];
+  }
+  function shard(term) {
+    var prefix = Array.from(term).slice(0, %(prefix)d).join("");
+    if (/^[a-z0-9]+$/.test(prefix)) return prefix;
+    return "x" + Array.from(new TextEncoder().encode(prefix), function (b) {
+      return b.toString(16).padStart(2, "0");
+    }).join("");
+  }
+  function decode(encoded) {
+    var bytes = atob(encoded), values = [], n = 0, shift = 0, out = {}, id = 0;
+    for (var i = 0; i < bytes.length; i++) {
+      var b = bytes.charCodeAt(i);
+      n += (b & 127) * Math.pow(2, shift);
+      if (b & 128) { shift += 7; continue; }
+      values.push(n); n = 0; shift = 0;
+    }
+    for (var j = 0; j + 1 < values.length; j += 2) { id += values[j]; out[id] = values[j + 1]; }
+    return out;
+  }
+  window.siteSearch = function (query) {
+    var terms = (query.toLowerCase().match(/[\\p{L}\\p{N}]+/gu) || []).filter(function (t) {
+      return t.length >= %(min)d && t.length <= %(max)d;
+    });
+    if (!terms.length) return Promise.resolve([]);
+    return Promise.all([load("docs")].concat(terms.map(function (t) { return load(shard(t)); })))
+      .then(function (loaded) {
+        var docs = loaded[0].docs, scores = null;
+        terms.forEach(function (t, i) {
+          var postings = loaded[i + 1][t] ? decode(loaded[i + 1][t]) : {}, next = {};
+          for (var id in postings) {
+            if (scores === null || id in scores) next[id] = (scores ? scores[id] : 0) + postings[id];
+          }
+          scores = next;
+        });
+        return Object.keys(scores).map(function (id) {
+          return {url: docs[id][0], title: docs[id][1], score: scores[id]};
+        }).sort(function (a, b) { return b.score - a.score; });
+      });
+  };
+})();
+""" % {"prefix": SHARD_PREFIX, "min": MIN_TERM, "max": MAX_TERM}
+
+
+def search_state_path_for(dest_dir) -> Path:
+	"""
+	Build-side index state, next to the output dir like the build manifest
+	(docs -> .docs-search.json), so it is never deployed.
+	"""
+	dest = Path(dest_dir)
+	return dest.parent / f".{dest.name}-search.json"
+
+
+class SearchIndex:
+	"""
+	Inverted index of the site's pages, published under dest/search/:
+
+		docs.json       {"docs": [[url, title], ...]} indexed by doc id
+		<shard>.json    {term: encoded postings} for terms in that shard
+		search.js       the loader defining siteSearch(query)
+
+	Pages are added with update() as they are rendered and dropped with
+	remove(); save() then rewrites only the shards holding terms of those
+	pages. The state file remembers each page's doc id and shards, so an
+	incremental build never re-reads pages it did not render.
+	"""
+
+	def __init__(self, dest_dir, state_path=None):
+		self.dest = Path(dest_dir)
+		self.dir = self.dest / INDEX_DIR
+		self.state_path = Path(state_path) if state_path is not None else search_state_path_for(dest_dir)
+		self.pages = {}
+		self._updates = {}
+		self._removed = set()
+		# set when the state is unusable: whatever is published is stale
+		self._rebuild = True
+
+	@classmethod
+	def load(cls, dest_dir, state_path=None):
+		index = cls(dest_dir, state_path)
+		try:
+			state = json.loads(index.state_path.read_text(encoding="utf-8"))
+		except (FileNotFoundError, ValueError):
+			return index
+		# a missing published index (e.g. docs/ wiped) means starting over
+		if state.get("version") == INDEX_VERSION and (index.dir / "docs.json").exists():
+			index.pages = state.get("pages", {})
+			index._rebuild = False
+		return index
+
+	def __contains__(self, src_rel):
+		return src_rel in self.pages and src_rel not in self._removed
+
+	def update(self, src_rel, url, text):
+		"""
+		Index (or re-index) the page at url from its page_text().
+		"""
+		self._removed.discard(src_rel)
+		self._updates[src_rel] = (url, text["title"], term_weights(text))
+
+	def remove(self, src_rel):
+		self._updates.pop(src_rel, None)
+		if src_rel in self.pages:
+			self._removed.add(src_rel)
+
+	def forget_missing(self, present):
+		for src_rel in set(self.pages) - set(present):
+			self.remove(src_rel)
+
+	def _next_ids(self, count, used):
+		ids = []
+		candidate = 0
+		while len(ids) < count:
+			if candidate not in used:
+				ids.append(candidate)
+			candidate += 1
+		return ids
+
+	def save(self, writer=None):
+		"""
+		Apply pending updates and removals to the published index and
+		state. Untouched shards are not read or written. Returns the number
+		of shards rewritten. With an OutputWriter the files are queued on it
+		and recorded in its changes, and the state is saved only once they
+		have all been written.
+		"""
+		touched = set()
+		if self._rebuild and self.dir.exists():
+			touched.update(p.stem for p in self.dir.glob("*.json") if p.name != "docs.json")
+		dropped = set()
+		for src_rel in self._removed | set(self._updates):
+			old = self.pages.get(src_rel)
+			if old is not None:
+				dropped.add(old["id"])
+				touched.update(old["shards"])
+		for src_rel in self._removed:
+			self.pages.pop(src_rel, None)
+
+		used = {p["id"] for p in self.pages.values()}
+		new = [rel for rel in sorted(self._updates) if rel not in self.pages]
+		fresh_ids = iter(self._next_ids(len(new), used))
+		additions = {}
+		for src_rel in sorted(self._updates):
+			url, title, weights = self._updates[src_rel]
+			old = self.pages.get(src_rel)
+			doc_id = old["id"] if old is not None else next(fresh_ids)
+			by_shard = {}
+			for term, weight in weights.items():
+				by_shard.setdefault(shard_for(term), {})[term] = weight
+			for shard, terms in by_shard.items():
+				additions.setdefault(shard, []).append((doc_id, terms))
+			touched.update(by_shard)
+			self.pages[src_rel] = {"id": doc_id, "url": url, "title": title, "shards": sorted(by_shard)}
+
+		self.dir.mkdir(parents=True, exist_ok=True)
+		for shard in sorted(touched):
+			self._rewrite_shard(shard, dropped, additions.get(shard, ()), writer)
+
+		docs = [None] * (max((p["id"] for p in self.pages.values()), default=-1) + 1)
+		for page in self.pages.values():
+			docs[page["id"]] = [page["url"], page["title"]]
+		self._write(self.dir / "docs.json", json.dumps({"docs": docs}, separators=(",", ":")), writer)
+		self._write(self.dir / "search.js", SEARCH_JS, writer)
+		if writer is not None:
+			writer.flush()
+
+		state = {"version": INDEX_VERSION, "pages": dict(sorted(self.pages.items()))}
+		tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+		tmp.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+		tmp.replace(self.state_path)
+
+		self._updates = {}
+		self._removed = set()
+		self._rebuild = False
+		return len(touched)
+
+	def _rewrite_shard(self, shard, dropped, additions, writer):
+		path = self.dir / f"{shard}.json"
+		try:
+			encoded = {} if self._rebuild else json.loads(path.read_text(encoding="utf-8"))
+		except (FileNotFoundError, ValueError):
+			encoded = {}
+		postings = {}
+		for term, value in encoded.items():
+			entries = decode_postings(value)
+			for doc_id in dropped & entries.keys():
+				del entries[doc_id]
+			if entries:
+				postings[term] = entries
+		for doc_id, terms in additions:
+			for term, weight in terms.items():
+				postings.setdefault(term, {})[doc_id] = weight
+
+		if not postings:
+			if path.exists():
+				path.unlink()
+				if writer is not None:
+					writer.changes.record(path, "deleted")
+			return
+		data = {term: encode_postings(postings[term]) for term in sorted(postings)}
+		self._write(path, json.dumps(data, separators=(",", ":")), writer)
+
+	def _write(self, path, text, writer):
+		if writer is not None:
+			writer.write(path, text)
+		else:
+			write_if_changed(path, text)
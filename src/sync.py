@@ -0,0 +1,227 @@
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from output import write_if_changed
+from profiler import clock
+
+# ioctl request number for FICLONE on Linux (btrfs, xfs, ...): share the
+# source extents with the destination instead of copying any data.
+FICLONE = 0x40049409
+
+COPY_METHODS = ("copy", "reflink", "hardlink")
+
+
+def _file_digest(path: Path) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def _copy_file_range(src: Path, dst: Path):
+	# kernel-side copy; falls back to shutil when the syscall is unavailable
+	if not hasattr(os, "copy_file_range"):
+		shutil.copyfile(src, dst)
+		return
+	with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+		remaining = os.fstat(fsrc.fileno()).st_size
+		try:
+			while remaining > 0:
+				n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+				if n == 0:
+					break
+				remaining -= n
+		except OSError:
+			fsrc.seek(0)
+			fdst.seek(0)
+			fdst.truncate()
+			shutil.copyfileobj(fsrc, fdst)
+
+
+def _reflink(src: Path, dst: Path):
+	try:
+		import fcntl
+	except ImportError:
+		_copy_file_range(src, dst)
+		return
+	with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+		try:
+			fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+			return
+		except OSError:
+			pass
+	_copy_file_range(src, dst)
+
+
+def place_file(src: Path, dst: Path, method="copy"):
+	"""
+	Put src at dst atomically (via a temp name + rename) using method:
+	copy (copy_file_range), reflink (FICLONE, else copy) or hardlink
+	(os.link, else copy). Copies keep the source mtime.
+	"""
+	if method not in COPY_METHODS:
+		raise ValueError(f"unknown copy method: {method}")
+	dst.parent.mkdir(parents=True, exist_ok=True)
+	tmp = dst.with_name(f".{dst.name}.tmp")
+	if tmp.exists():
+		tmp.unlink()
+
+	if method == "hardlink":
+		try:
+			os.link(src, tmp)
+			os.replace(tmp, dst)
+			return
+		except OSError:
+			if tmp.exists():
+				tmp.unlink()
+
+	if method == "reflink":
+		_reflink(src, tmp)
+	else:
+		_copy_file_range(src, tmp)
+	shutil.copystat(src, tmp)
+	os.replace(tmp, dst)
+
+
+def is_up_to_date(src: Path, dst: Path, checksum=False) -> bool:
+	"""
+	Compare by size and mtime, and additionally by content hash if checksum.
+	"""
+	try:
+		s = src.stat()
+		d = dst.stat()
+	except FileNotFoundError:
+		return False
+	if s.st_ino == d.st_ino and s.st_dev == d.st_dev:
+		return True
+	if s.st_size != d.st_size:
+		return False
+	if checksum:
+		return _file_digest(src) == _file_digest(dst)
+	return s.st_mtime_ns == d.st_mtime_ns
+
+
+def sync_dir(src, dst, previous=(), checksum=False, method="copy", profiler=None, changes=None, rename=None, transform=None):
+	"""
+	Make dst mirror the files under src without wiping it.
+
+	Only new or changed files are written. previous is the set of relative
+	paths the last sync placed in dst; those no longer in src are deleted,
+	and nothing else in dst (e.g. generated pages) is touched.
+
+	Returns (synced, copied, removed) as sorted lists of relative paths,
+	where synced is every file now mirrored from src. With a profiler,
+	each file's check and copy are timed; with a ChangeSet, copies and
+	deletions are recorded in it. rename maps a path relative to src to
+	the one it is published under in dst (e.g. a fingerprinted name);
+	the returned lists and previous are then in terms of dst.
+
+	transform(path) may return the bytes to publish for a source file
+	instead of copying it (e.g. minified CSS); those are written only if
+	they differ from what dst already holds, and None means copy.
+	"""
+	src = Path(src)
+	dst = Path(dst)
+	if not src.exists() or not src.is_dir():
+		raise FileNotFoundError(f"source directory not found: {src}")
+	dst.mkdir(parents=True, exist_ok=True)
+
+	synced = []
+	copied = []
+	for item in sorted(src.rglob("*")):
+		if item.is_dir():
+			continue
+		rel = item.relative_to(src).as_posix()
+		if rename is not None:
+			rel = rename(rel)
+		synced.append(rel)
+		target = dst / rel
+		t = clock() if profiler is not None else 0.0
+		data = transform(item) if transform is not None else None
+		if data is not None:
+			status = write_if_changed(target, data)
+			if profiler is not None:
+				profiler.add(item, [("transform", t, clock() - t)])
+			if status != "unchanged":
+				if changes is not None:
+					changes.record(target, status)
+				copied.append(rel)
+				print(f"copied: {item} -> {target}")
+			continue
+		if is_up_to_date(item, target, checksum):
+			if profiler is not None:
+				profiler.add(item, [("check", t, clock() - t)])
+			continue
+		existed = changes is not None and target.exists()
+		place_file(item, target, method)
+		if profiler is not None:
+			profiler.add(item, [("copy", t, clock() - t)])
+		if changes is not None:
+			changes.record(target, "changed" if existed else "added")
+		copied.append(rel)
+		print(f"copied: {item} -> {target}")
+
+	return synced, copied, _remove_stale(dst, set(previous) - set(synced), changes)
+
+
+def link_files(src, dst, files, previous=(), profiler=None, changes=None):
+	"""
+	Make dst hold the files (paths relative to src) as hard links to
+	those in src, e.g. the static files one build target already
+	published, shared by another target instead of copied again. Files
+	already linked are left alone, and those in previous but no longer
+	in files are deleted. Returns (synced, linked, removed) like
+	sync_dir, where linked only counts files whose bytes changed.
+	"""
+	src = Path(src)
+	dst = Path(dst)
+	dst.mkdir(parents=True, exist_ok=True)
+	synced = sorted(files)
+	linked = []
+	for rel in synced:
+		item = src / rel
+		target = dst / rel
+		t = clock() if profiler is not None else 0.0
+		try:
+			shared = os.path.samefile(item, target)
+		except FileNotFoundError:
+			shared = False
+		if shared:
+			if profiler is not None:
+				profiler.add(item, [("check", t, clock() - t)])
+			continue
+		if not target.exists():
+			status = "added"
+		else:
+			# an identical copy is relinked, but it is not a change to deploy
+			status = "unchanged" if is_up_to_date(item, target, checksum=True) else "changed"
+		place_file(item, target, "hardlink")
+		if profiler is not None:
+			profiler.add(item, [("link", t, clock() - t)])
+		if status == "unchanged":
+			continue
+		if changes is not None:
+			changes.record(target, status)
+		linked.append(rel)
+		print(f"linked: {item} -> {target}")
+	return synced, linked, _remove_stale(dst, set(previous) - set(synced), changes)
+
+
+def _remove_stale(dst, stale, changes):
+	removed = []
+	for rel in sorted(stale):
+		target = dst / rel
+		if target.exists():
+			target.unlink()
+			print(f"removed: {target}")
+			if changes is not None:
+				changes.record(target, "deleted")
+		removed.append(rel)
+		parent = target.parent
+		while parent != dst and parent.exists() and not any(parent.iterdir()):
+			parent.rmdir()
+			parent = parent.parent
+	return removed
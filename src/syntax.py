@@ -0,0 +1,212 @@
+import re
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextType
+
+
+class BlockRule:
+	"""
+	A block-level syntax. For a block starting with one of triggers (any
+	block if triggers is empty) and for which match(block) is true,
+	build(block, inline) returns its HTML node; inline(text) gives the
+	HTML children of inline markdown. Rules with a lower priority are
+	tried first, and all of them before the core block types.
+	"""
+
+	__slots__ = ("name", "triggers", "match", "build", "priority")
+
+	def __init__(self, name, triggers, match, build, priority=100):
+		self.name = name
+		self.triggers = triggers
+		self.match = match
+		self.build = build
+		self.priority = priority
+
+	@property
+	def value(self):
+		# stands in for BlockType.value in block cache keys
+		return f"ext:{self.name}"
+
+	def __repr__(self):
+		return f"BlockRule({self.name})"
+
+
+class InlineRule:
+	"""
+	An inline syntax starting at one of the characters in triggers.
+	parse(text, i, hi, find, span) is called with text[i] a trigger and
+	returns (TextNode, end) for a span text[i:end], or None if nothing
+	matches here. find(marker, start) is the scanner's forward-only
+	text.find up to hi; span(text_type, lo, hi) parses text[lo:hi] as
+	nested inline markup and wraps it in a TextNode of text_type.
+	"""
+
+	__slots__ = ("name", "triggers", "parse", "priority")
+
+	def __init__(self, name, triggers, parse, priority=100):
+		if not triggers:
+			raise ValueError(f"inline rule {name} needs trigger characters")
+		self.name = name
+		self.triggers = triggers
+		self.parse = parse
+		self.priority = priority
+
+	def __repr__(self):
+		return f"InlineRule({self.name})"
+
+
+class SyntaxRegistry:
+	"""
+	Extension rules for the block and inline parsers.
+
+	Dispatch tables (first character -> rules in priority order) are
+	built once, on first use after a change, so the parsers only try the
+	rules that can match where they are: a rule costs nothing on text
+	without its trigger characters.
+	"""
+
+	def __init__(self):
+		self.block = []
+		self.inline = []
+		self._block_table = None
+		self._inline_table = None
+		self._special = {}
+
+	def add_block(self, rule):
+		self.block.append(rule)
+		self._block_table = None
+		return rule
+
+	def add_inline(self, rule):
+		self.inline.append(rule)
+		self._inline_table = None
+		self._special = {}
+		return rule
+
+	def names(self):
+		return [rule.name for rule in self.block + self.inline]
+
+	def block_rules(self, first):
+		"""
+		Rules to try, in order, for a block starting with first.
+		"""
+		table = self._block_table
+		if table is None:
+			table = self._block_table = _dispatch_table(self.block)
+		rules = table.get(first)
+		return rules if rules is not None else table[""]
+
+	def inline_table(self):
+		"""
+		Trigger character -> inline rules, in order.
+		"""
+		if self._inline_table is None:
+			self._inline_table = _dispatch_table(self.inline)
+			del self._inline_table[""]
+		return self._inline_table
+
+	def special_re(self, core):
+		"""
+		Regex finding the next character that is in core (a string of the
+		scanner's own markup characters) or triggers an inline rule.
+		"""
+		pattern = self._special.get(core)
+		if pattern is None:
+			chars = "".join(sorted(set(core).union(self.inline_table())))
+			pattern = self._special[core] = re.compile(f"[{re.escape(chars)}]")
+		return pattern
+
+
+def _dispatch_table(rules):
+	ordered = sorted(rules, key=lambda r: r.priority)
+	wildcard = tuple(r for r in ordered if not r.triggers)
+	table = {"": wildcard}
+	for char in {c for r in ordered for c in r.triggers}:
+		table[char] = tuple(r for r in ordered if not r.triggers or char in r.triggers)
+	return table
+
+
+# GitHub-style tables: a header row, a |---|:--:| delimiter row, body rows.
+_DELIMITER_CELL_RE = re.compile(r"\s*(:?)-+(:?)\s*")
+_UNESCAPED_PIPE_RE = re.compile(r"(?<!\\)\|")
+_ALIGN = {(True, False): "left", (True, True): "center", (False, True): "right"}
+
+
+def _table_cells(line):
+	line = line.strip()
+	if line.startswith("|"):
+		line = line[1:]
+	if line.endswith("|") and not line.endswith("\\|"):
+		line = line[:-1]
+	return [cell.strip().replace("\\|", "|") for cell in _UNESCAPED_PIPE_RE.split(line)]
+
+
+def _table_alignments(line):
+	cells = _table_cells(line)
+	aligns = []
+	for cell in cells:
+		m = _DELIMITER_CELL_RE.fullmatch(cell)
+		if m is None:
+			return None
+		aligns.append(_ALIGN.get((bool(m.group(1)), bool(m.group(2)))))
+	return aligns
+
+
+def _is_table(block):
+	lines = block.split("\n")
+	if len(lines) < 2 or not all(ln.lstrip().startswith("|") for ln in lines):
+		return False
+	aligns = _table_alignments(lines[1])
+	return aligns is not None and len(aligns) == len(_table_cells(lines[0]))
+
+
+def _table_row(tag, cells, aligns, inline):
+	row = []
+	for i, align in enumerate(aligns):
+		text = cells[i] if i < len(cells) else ""
+		props = {"style": f"text-align: {align}"} if align else None
+		children = inline(text) if text else [LeafNode(None, "")]
+		row.append(ParentNode(tag, children, props))
+	return ParentNode("tr", row)
+
+
+def _build_table(block, inline):
+	lines = block.split("\n")
+	aligns = _table_alignments(lines[1])
+	head = ParentNode("thead", [_table_row("th", _table_cells(lines[0]), aligns, inline)])
+	rows = [_table_row("td", _table_cells(ln), aligns, inline) for ln in lines[2:]]
+	return ParentNode("table", [head, ParentNode("tbody", rows)] if rows else [head])
+
+
+TABLES = BlockRule("tables", "|", _is_table, _build_table)
+
+
+def _parse_strikethrough(text, i, hi, find, span):
+	# exactly two tildes open a span; longer runs are literal
+	if not text.startswith("~~", i, hi) or text.startswith("~", i + 2, hi) or text[i - 1:i] == "~":
+		return None
+	close = find("~~", i + 2)
+	if close == -1:
+		return None
+	return span(TextType.STRIKETHROUGH, i + 2, close), close + 2
+
+
+STRIKETHROUGH = InlineRule("strikethrough", "~", _parse_strikethrough)
+
+
+_default = None
+
+
+def default_registry():
+	"""
+	The registry the parsers use unless given another: tables and
+	strikethrough. Adding rules to it changes what pages render to, so
+	cached output (block and render caches, the build manifest) is only
+	safe if GENERATOR_VERSION changes along with the rule set.
+	"""
+	global _default
+	if _default is None:
+		_default = SyntaxRegistry()
+		_default.add_block(TABLES)
+		_default.add_inline(STRIKETHROUGH)
+	return _default
@@ -0,0 +1,139 @@
+import json
+import struct
+import tempfile
+import unittest
+import zlib
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from assets import AssetManifest, ASSET_MANIFEST_NAME, fingerprinted_name, image_size
+from htmlnode import LeafNode
+from manifest import BuildManifest, manifest_path_for
+from page_template import Template
+from render import render_page
+from main import BuildOptions, BuildTarget, generate_pages_recursive, sync_static
+
+
+def png_bytes(width, height):
+	ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+	return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+
+
+def jpeg_bytes(width, height):
+	app0 = b"JFIF\0\x01\x01\0\0\x01\0\x01\0\0"
+	sof = struct.pack(">BHHB", 8, height, width, 1) + b"\x01\x11\0"
+	return (
+		b"\xff\xd8"
+		+ b"\xff\xe0" + struct.pack(">H", len(app0) + 2) + app0
+		+ b"\xff\xc0" + struct.pack(">H", len(sof) + 2) + sof
+		+ b"\xff\xd9"
+	)
+
+
+class TestImageSize(unittest.TestCase):
+
+	def test_png_and_jpeg_headers(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			(root / "a.png").write_bytes(png_bytes(640, 480))
+			(root / "b.jpg").write_bytes(jpeg_bytes(300, 200))
+			(root / "c.png").write_bytes(b"not a png")
+			(root / "d.css").write_text("body {}", encoding="utf-8")
+			self.assertEqual(image_size(root / "a.png"), (640, 480))
+			self.assertEqual(image_size(root / "b.jpg"), (300, 200))
+			self.assertIsNone(image_size(root / "c.png"))
+			self.assertIsNone(image_size(root / "d.css"))
+
+
+class TestAssetManifest(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.static = Path(self.tmp.name) / "static"
+		(self.static / "images").mkdir(parents=True)
+		(self.static / "images" / "a.png").write_bytes(png_bytes(10, 20))
+		(self.static / "index.css").write_text("body {}", encoding="utf-8")
+		self.assets = AssetManifest.build(self.static)
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def test_fingerprinted_name(self):
+		self.assertEqual(fingerprinted_name("images/a.png", "0123456789abcdef"), "images/a.0123456789.png")
+		self.assertEqual(fingerprinted_name("LICENSE", "0123456789abcdef"), "LICENSE.0123456789")
+
+	def test_build_and_rewrite(self):
+		css = self.assets.output_for("index.css")
+		self.assertRegex(css, r"^index\.[0-9a-f]{10}\.css$")
+		self.assertEqual(self.assets.rewrite("/index.css?v=1#x"), f"/{css}?v=1#x")
+		self.assertEqual(self.assets.rewrite("/missing.css"), "/missing.css")
+		self.assertEqual(self.assets.rewrite("//cdn/index.css"), "//cdn/index.css")
+		self.assertEqual(self.assets.lookup("/images/a.png")["width"], 10)
+
+	def test_name_changes_only_with_content(self):
+		again = AssetManifest.build(self.static, previous=self.assets)
+		self.assertEqual(again.digest(), self.assets.digest())
+		(self.static / "index.css").write_text("body { margin: 0 }", encoding="utf-8")
+		edited = AssetManifest.build(self.static, previous=self.assets)
+		self.assertNotEqual(edited.output_for("index.css"), self.assets.output_for("index.css"))
+		self.assertEqual(edited.output_for("images/a.png"), self.assets.output_for("images/a.png"))
+
+	def test_serializer_rewrites_src_and_adds_size(self):
+		img = LeafNode("img", "", {"src": "/images/a.png", "alt": "A"})
+		name = self.assets.output_for("images/a.png")
+		self.assertEqual(
+			img.to_html("/blog/", self.assets),
+			f'<img src="/blog/{name}" alt="A" width="10" height="20"></img>'
+		)
+		# without assets the same node still renders as before
+		self.assertEqual(img.to_html("/blog/"), '<img src="/blog/images/a.png" alt="A"></img>')
+		sized = LeafNode("img", "", {"src": "/images/a.png", "width": "5"})
+		self.assertEqual(sized.to_html(None, self.assets), f'<img src="/{name}" width="5"></img>')
+
+	def test_template_and_content_rewritten(self):
+		template = Template.compile('<link href="/index.css"><a href="/about">x</a>{{ Content }}')
+		html = render_page("# T\n\n![a](/images/a.png)", template, "/site/", assets=self.assets)
+		self.assertIn(f'href="/site/{self.assets.output_for("index.css")}"', html)
+		self.assertIn('href="/site/about"', html)
+		self.assertIn(f'src="/site/{self.assets.output_for("images/a.png")}"', html)
+		self.assertIn('width="10" height="20"', html)
+
+
+class TestFingerprintBuild(unittest.TestCase):
+
+	def test_sync_and_pages_follow_asset_changes(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			static = root / "static"
+			static.mkdir()
+			(static / "index.css").write_text("body {}", encoding="utf-8")
+			content = root / "content"
+			content.mkdir()
+			(content / "index.md").write_text("# Home", encoding="utf-8")
+			template = root / "template.html"
+			template.write_text('<link href="/index.css">{{ Content }}', encoding="utf-8")
+			docs = root / "docs"
+
+			def build():
+				manifest = BuildManifest.load(manifest_path_for(docs))
+				with redirect_stdout(StringIO()):
+					_, _, _, assets = sync_static(static, docs, manifest, fingerprint=True)
+					generate_pages_recursive(content, template, BuildOptions([BuildTarget(docs, "/", manifest)], assets=assets))
+				return assets
+
+			first = build()
+			old_css = first.output_for("index.css")
+			self.assertTrue((docs / old_css).exists())
+			self.assertFalse((docs / "index.css").exists())
+			published = json.loads((docs / ASSET_MANIFEST_NAME).read_text(encoding="utf-8"))
+			self.assertEqual(published["assets"]["index.css"]["path"], old_css)
+
+			(static / "index.css").write_text("body { color: red }", encoding="utf-8")
+			new_css = build().output_for("index.css")
+			self.assertFalse((docs / old_css).exists())
+			self.assertIn(new_css, (docs / "index.html").read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+	unittest.main()
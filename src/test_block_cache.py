@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from block_cache import BlockCache, node_from_data, node_to_data, DISK_MIN_CHARS
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import BlockType, markdown_to_html_node
+from render_cache import RenderCache
+
+
+class TestNodeData(unittest.TestCase):
+
+	def test_roundtrip(self):
+		tree = ParentNode("p", [
+			LeafNode(None, "a "),
+			LeafNode("a", "link", {"href": "/x"}),
+			ParentNode("b", [LeafNode("i", "deep")]),
+		], {"class": "c"})
+		self.assertEqual(node_from_data(node_to_data(tree)).to_html(), tree.to_html())
+
+
+class TestBlockCache(unittest.TestCase):
+
+	def test_unchanged_blocks_are_reused(self):
+		cache = BlockCache()
+		md = "# Title\n\nfirst paragraph\n\nsecond paragraph"
+		before = markdown_to_html_node(md, block_cache=cache)
+		self.assertEqual((cache.hits, cache.misses), (0, 3))
+		edited = md.replace("second", "changed")
+		after = markdown_to_html_node(edited, block_cache=cache)
+		self.assertEqual((cache.hits, cache.misses), (2, 4))
+		self.assertIs(after.children[0], before.children[0])
+		self.assertIs(after.children[1], before.children[1])
+		self.assertEqual(after.to_html(), markdown_to_html_node(edited).to_html())
+
+	def test_same_text_different_type_not_shared(self):
+		cache = BlockCache()
+		cache.put(BlockType.PARAGRAPH, "x", ParentNode("p", [LeafNode(None, "x")]))
+		self.assertIsNone(cache.get(BlockType.HEADING, "x"))
+
+	def test_lru_bound(self):
+		cache = BlockCache(max_entries=2)
+		for text in ("a", "b", "c"):
+			cache.put(BlockType.PARAGRAPH, text, ParentNode("p", [LeafNode(None, text)]))
+		self.assertEqual(len(cache.entries), 2)
+		self.assertIsNone(cache.get(BlockType.PARAGRAPH, "a"))
+
+	def test_disk_tier_shares_long_blocks(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			long_block = "word " * (DISK_MIN_CHARS // 5 + 1)
+			md = f"# T\n\n{long_block}"
+			markdown_to_html_node(md, block_cache=BlockCache(disk=RenderCache(Path(tmp))))
+			fresh = BlockCache(disk=RenderCache(Path(tmp)))
+			out = markdown_to_html_node(md, block_cache=fresh)
+			# only the long paragraph came from disk; the short heading did not
+			self.assertEqual((fresh.hits, fresh.misses), (1, 1))
+			self.assertEqual(out.to_html(), markdown_to_html_node(md).to_html())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,104 @@
+import io
+import json
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from build import SiteSource, build_site, iter_site
+from output import DirectorySink, MemorySink, TarSink, ZipSink
+from render import RenderError
+from test_assets import png_bytes
+
+SITE = {
+	"template.html": '<html><head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet"></head>{{> body.html }}</html>',
+	"body.html": "<body>{{ Content }}</body>",
+	"content/index.md": "# Home\n\nSee [the post](/blog/post/).",
+	"content/blog/post/index.md": "# Post\n\n![pic](/images/a.png)",
+	"content/notes.txt": "not a page",
+	"static/index.css": "body {\n  margin: 0;\n}\n",
+	"static/images/a.png": png_bytes(4, 3),
+}
+
+
+class TestBuildSite(unittest.TestCase):
+
+	def test_mapping_into_memory(self):
+		files = build_site(SITE, basepath="/site/").files
+		self.assertEqual(sorted(files), ["blog/post/index.html", "images/a.png", "index.css", "index.html"])
+		self.assertEqual(
+			files["index.html"].decode("utf-8"),
+			'<html><head><title>Home</title><link href="/site/index.css" rel="stylesheet"></head>'
+			'<body><div><h1>Home</h1><p>See <a href="/site/blog/post/">the post</a>.</p></div></body></html>'
+		)
+		self.assertEqual(files["images/a.png"], SITE["static/images/a.png"])
+
+	def test_directory_source_matches_mapping(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			for name, data in SITE.items():
+				path = root / name
+				path.parent.mkdir(parents=True, exist_ok=True)
+				if isinstance(data, str):
+					path.write_text(data, encoding="utf-8")
+				else:
+					path.write_bytes(data)
+			self.assertEqual(build_site(root, minify=True).files, build_site(SITE, minify=True).files)
+
+	def test_fingerprint_and_minify(self):
+		files = build_site(SITE, minify=True, fingerprint=True).files
+		assets = json.loads(files["asset-manifest.json"])["assets"]
+		css = assets["index.css"]["path"]
+		self.assertEqual(files[css], b"body{margin:0}")
+		self.assertIn(f"<link href=/{css} rel=stylesheet>".encode("utf-8"), files["index.html"])
+		self.assertIn(b'width=4 height=3', files["blog/post/index.html"])
+
+	def test_streams_and_collects_failures(self):
+		site = dict(SITE, **{"content/bad.md": "no title", "content/worse.md": "none either"})
+		seen = []
+		with self.assertRaises(RenderError) as ctx:
+			for path, _ in iter_site(SiteSource(site)):
+				seen.append(path)
+		self.assertEqual([p for p, _ in ctx.exception.failures], ["content/bad.md", "content/worse.md"])
+		self.assertIn("index.html", seen)
+
+
+class TestSinks(unittest.TestCase):
+
+	def test_archives_hold_the_same_files(self):
+		expected = build_site(SITE).files
+		buf = io.BytesIO()
+		with ZipSink(buf) as sink:
+			build_site(SITE, sink)
+		with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as z:
+			self.assertEqual({n: z.read(n) for n in z.namelist()}, expected)
+
+		archives = []
+		for _ in range(2):
+			buf = io.BytesIO()
+			with TarSink(buf) as sink:
+				build_site(SITE, sink)
+			archives.append(buf.getvalue())
+		self.assertEqual(archives[0], archives[1])
+		with tarfile.open(fileobj=io.BytesIO(archives[0])) as tar:
+			self.assertEqual({m.name: tar.extractfile(m).read() for m in tar.getmembers()}, expected)
+
+	def test_directory_sink_writes_only_changes(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			with DirectorySink(tmp) as sink:
+				build_site(SITE, sink)
+			self.assertEqual(len(sink.changes.added), 4)
+			self.assertTrue((Path(tmp) / "blog" / "post" / "index.html").exists())
+			with DirectorySink(tmp) as sink:
+				build_site(SITE, sink)
+			self.assertEqual(sink.changes.summary(), "0 added, 0 changed, 0 deleted")
+
+	def test_memory_sink_accepts_text(self):
+		sink = MemorySink()
+		sink.write("a.txt", "é")
+		self.assertEqual(sink.files, {"a.txt": "é".encode("utf-8")})
+
+
+if __name__ == "__main__":
+	unittest.main()
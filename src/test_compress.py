@@ -0,0 +1,74 @@
+import gzip
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from compress import MIN_SIZE, compress_file, compress_outputs
+from output import ChangeSet
+
+
+class TestCompressOutputs(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.root = Path(self.tmp.name)
+		self.page = self.root / "blog" / "index.html"
+		self.page.parent.mkdir()
+		self.page.write_text("<p>hello</p>" * 100, encoding="utf-8")
+		(self.root / "index.css").write_text("body { color: red; }\n" * 50, encoding="utf-8")
+		(self.root / "tiny.js").write_text("x=1", encoding="utf-8")
+		(self.root / "a.png").write_bytes(b"\x89PNG" + b"\0" * MIN_SIZE)
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def test_compresses_text_outputs_only(self):
+		compressed, skipped, removed = compress_outputs(self.root)
+		self.assertEqual((compressed, skipped, removed), (2, 0, 0))
+		gz = self.page.with_name("index.html.gz")
+		self.assertEqual(gzip.decompress(gz.read_bytes()), self.page.read_bytes())
+		self.assertTrue((self.root / "index.css.gz").exists())
+		self.assertFalse((self.root / "tiny.js.gz").exists())
+		self.assertFalse((self.root / "a.png.gz").exists())
+
+	def test_output_is_deterministic(self):
+		first = compress_file(self.page)[0][0].read_bytes()
+		os.utime(self.page, ns=(1, 1))
+		self.assertEqual(compress_file(self.page), [(self.page.with_name("index.html.gz"), "unchanged")])
+		self.assertEqual(self.page.with_name("index.html.gz").read_bytes(), first)
+
+	def test_skips_unchanged_and_recompresses_edits(self):
+		compress_outputs(self.root)
+		self.page.write_text("<p>edited</p>" * 100, encoding="utf-8")
+		os.utime(self.page, ns=(10**18, 10**18))
+		changes = ChangeSet(self.root)
+		compressed, skipped, _ = compress_outputs(self.root, changes=changes)
+		self.assertEqual((compressed, skipped), (1, 1))
+		self.assertEqual(changes.as_dict()["changed"], ["blog/index.html.gz"])
+		gz = self.page.with_name("index.html.gz")
+		self.assertEqual(gzip.decompress(gz.read_bytes()), self.page.read_bytes())
+
+	def test_removes_orphaned_siblings(self):
+		compress_outputs(self.root)
+		self.page.unlink()
+		(self.root / "shipped.css.gz").write_bytes(b"kept")
+		changes = ChangeSet(self.root)
+		_, _, removed = compress_outputs(self.root, changes=changes, keep=["shipped.css.gz"])
+		self.assertEqual(removed, 1)
+		self.assertFalse(self.page.with_name("index.html.gz").exists())
+		self.assertTrue((self.root / "shipped.css.gz").exists())
+		self.assertEqual(changes.as_dict()["deleted"], ["blog/index.html.gz"])
+
+	def test_parallel_matches_sequential(self):
+		for i in range(6):
+			(self.root / f"p{i}.html").write_text(f"<h1>{i}</h1>" * 200, encoding="utf-8")
+		compressed, _, _ = compress_outputs(self.root, jobs=3)
+		self.assertEqual(compressed, 8)
+		for i in range(6):
+			path = self.root / f"p{i}.html"
+			self.assertEqual(gzip.decompress(path.with_name(path.name + ".gz").read_bytes()), path.read_bytes())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,97 @@
+import tempfile
+import unittest
+
+from highlight import HighlightCache, JSON, PYTHON, SHELL, JAVASCRIPT, code_node, split_info
+from markdown_blocks import markdown_to_html_node
+from render_cache import RenderCache
+
+
+def classes(lexer, code):
+	return [(cls, text) for cls, text in lexer.tokens(code) if cls is not None]
+
+
+class TestLexers(unittest.TestCase):
+
+	def test_tokens_cover_the_code(self):
+		code = 'def f(x):\n    return "a" # done\n'
+		self.assertEqual("".join(text for _, text in PYTHON.tokens(code)), code)
+
+	def test_python(self):
+		self.assertEqual(
+			classes(PYTHON, '@cache\ndef f(x=1.5):\n    return len("#no") # yes'),
+			[("deco", "@cache"), ("kw", "def"), ("fn", "f"), ("num", "1.5"), ("kw", "return"),
+			 ("bi", "len"), ("str", '"#no"'), ("com", "# yes")],
+		)
+
+	def test_shell(self):
+		self.assertEqual(
+			classes(SHELL, 'export DIR="$HOME/x" # set\necho ${DIR}#1'),
+			[("kw", "export"), ("str", '"$HOME/x"'), ("com", "# set"), ("bi", "echo"), ("var", "${DIR}"), ("num", "1")],
+		)
+
+	def test_json(self):
+		self.assertEqual(
+			classes(JSON, '{"a": [1, -2.5e3, true, "s"]}'),
+			[("key", '"a"'), ("num", "1"), ("num", "-2.5e3"), ("lit", "true"), ("str", '"s"')],
+		)
+
+	def test_javascript(self):
+		self.assertEqual(
+			classes(JAVASCRIPT, "/* c */ const s = `x${y}`; // done"),
+			[("com", "/* c */"), ("kw", "const"), ("str", "`x${y}`"), ("com", "// done")],
+		)
+
+
+class TestFencedCode(unittest.TestCase):
+
+	def test_split_info(self):
+		self.assertEqual(split_info("python\nx = 1\n"), ("python", "\nx = 1\n"))
+		self.assertEqual(split_info(" JS title=a.js\nx\n"), ("js", "\nx\n"))
+		self.assertEqual(split_info("\nx = 1\n"), (None, "\nx = 1\n"))
+		self.assertEqual(split_info("one line"), (None, "one line"))
+
+	def test_highlighted_block(self):
+		html = markdown_to_html_node("```python\nx = None  # <none>\n```").to_html()
+		self.assertEqual(
+			html,
+			'<div><pre><code class="language-python">\nx = <span class="hl-kw">None</span>  '
+			'<span class="hl-com"># &lt;none&gt;</span>\n</code></pre></div>'
+		)
+
+	def test_unknown_and_missing_language(self):
+		self.assertEqual(
+			markdown_to_html_node("```rust\nfn main() {}\n```").to_html(),
+			'<div><pre><code class="language-rust">\nfn main() {}\n</code></pre></div>'
+		)
+		self.assertEqual(markdown_to_html_node("```\nx\n```").to_html(), "<div><pre><code>\nx\n</code></pre></div>")
+
+	def test_minified_keeps_code_whitespace(self):
+		html = markdown_to_html_node("```sh\necho  $A\n```").to_html(minify=True)
+		self.assertEqual(html, '<div><pre><code class=language-sh>\n<span class=hl-bi>echo</span>  <span class=hl-var>$A</span>\n</code></pre></div>')
+
+
+class TestHighlightCache(unittest.TestCase):
+
+	def test_memory_and_disk(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			cache = HighlightCache(disk=RenderCache(tmp))
+			first = code_node("print(1)", "py", cache).to_html()
+			self.assertEqual(code_node("print(1)", "py", cache).to_html(), first)
+			self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+			fresh = HighlightCache(disk=RenderCache(tmp))
+			self.assertEqual(code_node("print(1)", "py", fresh).to_html(), first)
+			self.assertEqual((fresh.hits, fresh.misses), (1, 0))
+			# keyed by language as well as code
+			code_node("print(1)", "js", fresh)
+			self.assertEqual(fresh.misses, 1)
+
+	def test_lru_bound(self):
+		cache = HighlightCache(max_entries=2)
+		for code in ("a", "b", "c"):
+			cache.tokens("py", code)
+		self.assertEqual(list(cache.entries), [("py", "b"), ("py", "c")])
+
+
+if __name__ == "__main__":
+	unittest.main()
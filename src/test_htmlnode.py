@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_text, escape_attr
 
 class TestHTMLNode(unittest.TestCase):
 
@@ -98,6 +99,62 @@ class TestParentNode(unittest.TestCase):
 		with self.assertRaises(ValueError):
 			ParentNode("div", None)
 
+
+class TestSerializer(unittest.TestCase):
+
+	def test_escape_text(self):
+		self.assertEqual(escape_text("a < b & c > d"), "a &lt; b &amp; c &gt; d")
+		self.assertEqual(escape_text('say "hi"'), 'say "hi"')
+
+	def test_escape_attr(self):
+		self.assertEqual(escape_attr('/a?x=1&y="2"'), "/a?x=1&amp;y=&quot;2&quot;")
+
+	def test_leaf_text_is_escaped(self):
+		self.assertEqual(LeafNode("a", "< Back Home", {"href": "/"}).to_html(), '<a href="/">&lt; Back Home</a>')
+		self.assertEqual(LeafNode(None, "1 < 2").to_html(), "1 &lt; 2")
+
+	def test_write_html_matches_to_html(self):
+		tree = ParentNode("div", [
+			ParentNode("p", [LeafNode(None, "x & y "), LeafNode("b", "bold")]),
+			LeafNode("img", "", {"src": "/a.png", "alt": "pic"}),
+		], {"class": "wrap"})
+		buf = io.StringIO()
+		tree.write_html(buf)
+		self.assertEqual(buf.getvalue(), tree.to_html())
+		self.assertEqual(
+			buf.getvalue(),
+			'<div class="wrap"><p>x &amp; y <b>bold</b></p><img src="/a.png" alt="pic"></img></div>'
+		)
+
+	def test_deep_nesting_does_not_recurse(self):
+		node = LeafNode("span", "leaf")
+		for _ in range(5000):
+			node = ParentNode("div", [node])
+		html = node.to_html()
+		self.assertTrue(html.startswith("<div><div>"))
+		self.assertEqual(html.count("</div>"), 5000)
+
+	def test_props_html_cached_until_props_replaced(self):
+		node = LeafNode("a", "x", {"href": "/one"})
+		first = node.props_to_html()
+		self.assertIs(node.props_to_html(), first)
+		node.props = {"href": "/two"}
+		self.assertEqual(node.props_to_html(), ' href="/two"')
+
+	def test_nodes_are_slotted(self):
+		for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("div", [LeafNode(None, "x")])):
+			self.assertFalse(hasattr(node, "__dict__"))
+
+	def test_tags_are_interned(self):
+		tag = "".join(["s", "pan"])
+		self.assertIs(LeafNode(tag, "x").tag, LeafNode("span", "y").tag)
+
+	def test_nested_child_error_still_raised(self):
+		child = LeafNode("b", "x")
+		child.value = None
+		with self.assertRaises(ValueError):
+			ParentNode("div", [child]).to_html()
+
 if __name__ == "__main__":
 	unittest.main()
 
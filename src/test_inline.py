@@ -0,0 +1,98 @@
+import base64
+import tempfile
+import unittest
+from pathlib import Path
+
+from assets import AssetManifest
+from inline import Inliner, critical_css, selector_matches, split_rules
+from markdown_blocks import markdown_to_html_node
+from page_template import Template
+from render import render_page
+from test_assets import png_bytes
+
+TEMPLATE = '<html><head><link href="/index.css" rel="stylesheet"></head><body>{{ Content }}</body></html>'
+
+
+class TestCriticalCss(unittest.TestCase):
+
+	def test_split_rules(self):
+		css = '@import "x.css";a{content:"}"}@media (min-width:1px){p{color:red}}'
+		self.assertEqual(
+			split_rules(css),
+			[('@import "x.css"', None), ("a", 'content:"}"'), ("@media (min-width:1px)", "p{color:red}")]
+		)
+
+	def test_selector_matches(self):
+		tags = {"html", "body", "p", "a"}
+		self.assertTrue(selector_matches("p > a:hover", tags))
+		self.assertTrue(selector_matches(".note", tags))
+		self.assertTrue(selector_matches("a[href$=pdf]", tags))
+		self.assertTrue(selector_matches("::-webkit-scrollbar", tags))
+		self.assertFalse(selector_matches("pre code", tags))
+		self.assertFalse(selector_matches("p:not(.x) img", tags))
+
+	def test_keeps_only_usable_rules(self):
+		css = "h1,h2{color:red}pre{margin:0}@media print{pre{x:y}p{x:z}}@font-face{font-family:A}"
+		self.assertEqual(
+			critical_css(css, {"h1", "p"}),
+			"h1{color:red}@media print{p{x:z}}@font-face{font-family:A}"
+		)
+
+
+class TestInliner(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.static = Path(self.tmp.name) / "static"
+		(self.static / "images").mkdir(parents=True)
+		self.small = png_bytes(10, 20)
+		(self.static / "images" / "small.png").write_bytes(self.small)
+		(self.static / "images" / "copy.png").write_bytes(self.small)
+		(self.static / "images" / "big.png").write_bytes(png_bytes(30, 40) + b"\0" * 200)
+		(self.static / "index.css").write_text("p {\n  color: red;\n}\npre {\n  margin: 0;\n}\n", encoding="utf-8")
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def test_small_images_become_data_uris(self):
+		inliner = Inliner(self.static, image_max=100)
+		root = markdown_to_html_node("![a](/images/small.png) ![b](/images/big.png)")
+		html = root.to_html(assets=inliner)
+		uri = "data:image/png;base64," + base64.b64encode(self.small).decode("ascii")
+		self.assertIn(f'<img src="{uri}" alt="a" width="10" height="20">', html)
+		self.assertIn('<img src="/images/big.png" alt="b">', html)
+
+	def test_encoded_once_per_hash(self):
+		inliner = Inliner(self.static, image_max=100)
+		self.assertIs(inliner.images["images/small.png"]["inline"], inliner.images["images/copy.png"]["inline"])
+
+	def test_falls_back_to_fingerprinted_names(self):
+		assets = AssetManifest.build(self.static)
+		inliner = Inliner(self.static, assets, image_max=100)
+		html = markdown_to_html_node("![b](/images/big.png)").to_html(assets=inliner)
+		self.assertIn(f'src="/{assets.output_for("images/big.png")}"', html)
+		self.assertIn('width="30" height="40"', html)
+
+	def test_small_stylesheet_inlined_whole(self):
+		inliner = Inliner(self.static)
+		html = render_page("# T\n\npara", Template.compile(TEMPLATE), "/", assets=inliner)
+		self.assertEqual(html, "<html><head><style>p{color:red}pre{margin:0}</style></head><body><div><h1>T</h1><p>para</p></div></body></html>")
+
+	def test_large_stylesheet_gets_critical_css_and_deferred_link(self):
+		inliner = Inliner(self.static, css_max=10)
+		html = render_page("# T\n\npara", Template.compile(TEMPLATE), "/docs/", assets=inliner)
+		self.assertIn("<head><style>p{color:red}</style>", html)
+		self.assertIn('<link href="/docs/index.css" rel="stylesheet" media="print" onload="this.media=\'all\'">', html)
+		self.assertIn('<noscript><link href="/docs/index.css" rel="stylesheet"></noscript>', html)
+		html = render_page("# T\n\n```\ncode\n```", Template.compile(TEMPLATE), "/docs/", assets=inliner)
+		self.assertIn("<style>pre{margin:0}</style>", html)
+
+	def test_digest_follows_inlined_files(self):
+		before = Inliner(self.static).digest()
+		(self.static / "index.css").write_text("p { color: blue; }", encoding="utf-8")
+		self.assertNotEqual(Inliner(self.static).digest(), before)
+		self.assertNotEqual(Inliner(self.static, css_max=1).digest(), Inliner(self.static).digest())
+
+
+if __name__ == "__main__":
+	unittest.main()
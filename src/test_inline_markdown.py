@@ -1,6 +1,18 @@
 import unittest
 from inline_markdown import extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes
-from textnode import TextNode, TextType
+from textnode import TextNode, TextType, text_node_to_html_node
+from splitnodes import split_nodes_delimiter
+
+
+def chained_text_to_textnodes(text):
+	# the original five-pass pipeline, kept as a reference implementation
+	nodes = [TextNode(text, TextType.TEXT)]
+	nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+	nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+	nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+	nodes = split_nodes_image(nodes)
+	nodes = split_nodes_link(nodes)
+	return nodes
 
 class TestMarkdownExtract(unittest.TestCase):
 
@@ -161,6 +173,71 @@ class TestMarkdownExtract(unittest.TestCase):
 			text_to_textnodes(text)
 
 
+class TestSinglePassScanner(unittest.TestCase):
+
+	COMPAT_CASES = [
+		"This is **text** with an _italic_ word and a `code block` "
+		"and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) "
+		"and a [link](https://boot.dev)",
+		"no markup here",
+		"see [site](http://s.com)",
+		"pic: ![alt](http://img.png)",
+		"Start ![alt](http://img.png) end",
+		"x ![a](u1) y ![b](u2) z",
+		"Go to [site](http://s.com) now",
+		"[a](u1) and [b](u2)",
+		"![img](http://x.png) and also [site](http://s.com)",
+		"pic: ![a](u1) and link: [b](u2)",
+		"**bold** at start and _end_",
+		"",
+		"Here's the deal, **I like Tolkien**.",
+		"Disney _didn't ruin it_ (okay, but Amazon might have)",
+		"a [ lone bracket and a ! mark",
+	]
+
+	def test_matches_chained_passes(self):
+		for text in self.COMPAT_CASES:
+			with self.subTest(text=text):
+				self.assertEqual(text_to_textnodes(text), chained_text_to_textnodes(text))
+
+	def test_unmatched_delimiters_raise_like_chained(self):
+		for text in ["bad `code", "bad **bold", "bad _italic"]:
+			with self.subTest(text=text):
+				with self.assertRaises(ValueError):
+					chained_text_to_textnodes(text)
+				with self.assertRaises(ValueError):
+					text_to_textnodes(text)
+
+	def test_bold_inside_link(self):
+		out = text_to_textnodes("see [the **docs**](http://d.com)")
+		self.assertEqual(out[1].text_type, TextType.LINK)
+		self.assertEqual(out[1].text, "the docs")
+		self.assertEqual(out[1].children, [TextNode("the ", TextType.TEXT), TextNode("docs", TextType.BOLD)])
+		self.assertEqual(
+			text_node_to_html_node(out[1]).to_html(),
+			'<a href="http://d.com">the <b>docs</b></a>'
+		)
+
+	def test_italic_inside_bold(self):
+		out = text_to_textnodes("**very _much_ so**")
+		self.assertEqual(text_node_to_html_node(out[0]).to_html(), "<b>very <i>much</i> so</b>")
+
+	def test_nested_unmatched_is_literal(self):
+		out = text_to_textnodes("**snake_case**")
+		self.assertEqual(out, [TextNode("snake_case", TextType.BOLD)])
+
+	def test_underscore_in_url_is_not_emphasis(self):
+		out = text_to_textnodes("[x](http://a_b.com)")
+		self.assertEqual(out, [TextNode("x", TextType.LINK, "http://a_b.com")])
+
+	def test_code_is_not_scanned(self):
+		out = text_to_textnodes("`**not bold**`")
+		self.assertEqual(out, [TextNode("**not bold**", TextType.CODE)])
+
+	def test_pathological_brackets_are_linear(self):
+		text = "[" * 200000 + "](" * 1000
+		out = text_to_textnodes(text)
+		self.assertEqual("".join(n.text for n in out), text)
 
 
 if __name__ == "__main__":
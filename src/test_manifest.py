@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from manifest import BuildManifest, manifest_path_for, hash_bytes
+from main import BuildOptions, BuildTarget, generate_pages_recursive
+
+
+class TestBuildManifest(unittest.TestCase):
+
+	def test_manifest_path_is_next_to_output(self):
+		self.assertEqual(manifest_path_for("site/docs"), Path("site/.docs-manifest.json"))
+
+	def test_load_missing_is_empty(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			m = BuildManifest.load(Path(tmp) / "m.json")
+			self.assertEqual(m.pages, {})
+			self.assertFalse(m.site_inputs_match("abc", "/"))
+
+	def test_save_and_load_roundtrip(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = Path(tmp) / "m.json"
+			m = BuildManifest.load(path)
+			m.reset("t", "/static/")
+			m.record("index.md", "h1", "index.html")
+			m.save()
+			loaded = BuildManifest.load(path)
+			self.assertTrue(loaded.site_inputs_match("t", "/static/"))
+			self.assertFalse(loaded.site_inputs_match("t", "/"))
+			self.assertEqual(loaded.pages["index.md"], {"hash": "h1", "output": "index.html"})
+
+	def test_forget_missing_returns_outputs(self):
+		m = BuildManifest("unused.json")
+		m.record("a.md", "1", "a.html")
+		m.record("b.md", "2", "b.html")
+		self.assertEqual(m.forget_missing(["a.md"]), ["b.html"])
+		self.assertEqual(list(m.pages), ["a.md"])
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		self.content = root / "content"
+		self.docs = root / "docs"
+		self.template = root / "template.html"
+		(self.content / "blog").mkdir(parents=True)
+		(self.content / "index.md").write_text("# Home\n\nhello", encoding="utf-8")
+		(self.content / "blog" / "post.md").write_text("# Post\n\nbody", encoding="utf-8")
+		self.template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+		self.manifest_path = manifest_path_for(self.docs)
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def build(self, basepath="/"):
+		manifest = BuildManifest.load(self.manifest_path)
+		with redirect_stdout(StringIO()) as out:
+			generate_pages_recursive(self.content, self.template, BuildOptions([BuildTarget(self.docs, basepath, manifest)]))
+		return out.getvalue()
+
+	def test_second_build_skips_unchanged_pages(self):
+		self.build()
+		log = self.build()
+		self.assertNotIn("Generating page", log)
+		self.assertIn("2 unchanged page(s) skipped", log)
+
+	def test_only_edited_page_is_rendered(self):
+		self.build()
+		(self.content / "index.md").write_text("# Home\n\nchanged", encoding="utf-8")
+		log = self.build()
+		self.assertIn("index.md", log)
+		self.assertNotIn("post.md", log)
+		self.assertIn("changed", (self.docs / "index.html").read_text(encoding="utf-8"))
+
+	def test_template_change_rebuilds_everything(self):
+		self.build()
+		self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}", encoding="utf-8")
+		log = self.build()
+		self.assertEqual(log.count("Generating page"), 2)
+
+	def test_basepath_change_rebuilds_everything(self):
+		self.build()
+		log = self.build("/static/")
+		self.assertEqual(log.count("Generating page"), 2)
+
+	def test_missing_output_is_regenerated(self):
+		self.build()
+		os.remove(self.docs / "index.html")
+		log = self.build()
+		self.assertEqual(log.count("Generating page"), 1)
+		self.assertTrue((self.docs / "index.html").exists())
+
+	def test_deleted_source_removes_output(self):
+		self.build()
+		(self.docs / "style.css").write_text("kept", encoding="utf-8")
+		(self.content / "blog" / "post.md").unlink()
+		self.build()
+		self.assertFalse((self.docs / "blog").exists())
+		self.assertTrue((self.docs / "index.html").exists())
+		self.assertTrue((self.docs / "style.css").exists())
+		manifest = BuildManifest.load(self.manifest_path)
+		self.assertEqual(list(manifest.pages), ["index.md"])
+		self.assertEqual(manifest.pages["index.md"]["hash"], hash_bytes((self.content / "index.md").read_bytes()))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -1,5 +1,6 @@
+import io
 import unittest
-from markdown_blocks import markdown_to_blocks, BlockType, block_to_block_type, extract_title
+from markdown_blocks import markdown_to_blocks, BlockType, block_to_block_type, iter_blocks, markdown_to_html_node
 
 class TestMarkdownToBlocks(unittest.TestCase):
 	def test_basic_blocks(self):
@@ -24,6 +25,43 @@ class TestMarkdownToBlocks(unittest.TestCase):
 		markdown = "\n\n\n\n"
 		self.assertEqual(markdown_to_blocks(markdown), [])
 
+	def test_crlf_and_whitespace_only_separators(self):
+		markdown = "para one\r\nstill one\r\n  \t \r\npara two"
+		self.assertEqual(markdown_to_blocks(markdown), ["para one\nstill one", "para two"])
+
+	def test_fenced_code_keeps_blank_lines(self):
+		markdown = "intro\n\n```\ndef f():\n\n    return 1\n```\n\nafter"
+		self.assertEqual(
+			markdown_to_blocks(markdown),
+			["intro", "```\ndef f():\n\n    return 1\n```", "after"]
+		)
+
+	def test_fence_interrupts_paragraph(self):
+		markdown = "text\n```\ncode\n```"
+		self.assertEqual(markdown_to_blocks(markdown), ["text", "```\ncode\n```"])
+
+	def test_one_line_fence(self):
+		self.assertEqual(markdown_to_blocks("```x```\nnext"), ["```x```", "next"])
+
+	def test_unclosed_fence_runs_to_end(self):
+		blocks = markdown_to_blocks("```\ncode\n\nmore")
+		self.assertEqual(blocks, ["```\ncode\n\nmore"])
+		self.assertEqual(block_to_block_type(blocks[0]), BlockType.PARAGRAPH)
+
+	def test_iter_blocks_streams_from_file(self):
+		f = io.StringIO("# Title\n\nbody line\n\n- a\n- b\n")
+		blocks = iter_blocks(f)
+		self.assertEqual(next(blocks), "# Title")
+		self.assertEqual(list(blocks), ["body line", "- a\n- b"])
+
+	def test_html_from_lines_matches_string(self):
+		md = "# T\n\n```\nx\n\ny\n```\n\n> q"
+		self.assertEqual(
+			markdown_to_html_node(io.StringIO(md)).to_html(),
+			markdown_to_html_node(md).to_html()
+		)
+		self.assertIn("<pre><code>\nx\n\ny\n</code></pre>", markdown_to_html_node(md).to_html())
+
 	def test_block_type_heading_levels(self):
 		self.assertEqual(block_to_block_type("# H1"), BlockType.HEADING)
 		self.assertEqual(block_to_block_type("###### H6"), BlockType.HEADING)
@@ -44,35 +82,22 @@ class TestMarkdownToBlocks(unittest.TestCase):
 		block = "1. first\n2. second\n3. third"
 		self.assertEqual(block_to_block_type(block), BlockType.ORDERED_LIST)
 
+	def test_block_type_near_misses_are_paragraphs(self):
+		self.assertEqual(block_to_block_type("#NoSpace"), BlockType.PARAGRAPH)
+		self.assertEqual(block_to_block_type("####### seven"), BlockType.PARAGRAPH)
+		self.assertEqual(block_to_block_type("> quoted\nnot quoted"), BlockType.PARAGRAPH)
+		self.assertEqual(block_to_block_type("- one\ntwo"), BlockType.PARAGRAPH)
+		self.assertEqual(block_to_block_type("1. one\n3. three"), BlockType.PARAGRAPH)
+		self.assertEqual(block_to_block_type("2. starts at two"), BlockType.PARAGRAPH)
+		self.assertEqual(block_to_block_type("`inline` start"), BlockType.PARAGRAPH)
+
+	def test_block_type_star_list(self):
+		self.assertEqual(block_to_block_type("* one\n* two"), BlockType.UNORDERED_LIST)
+
 	def test_block_type_paragraph_fallback(self):
 		block = "Just a normal paragraph with *markdown* **inside**."
 		self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
-	def test_extract_title_basic(self):
-		md = "# Hello"
-		self.assertEqual(extract_title(md), "Hello")
-
-	def test_extract_title_trims_spaces(self):
-		md = "   #   My Title   \n\nSome content"
-		self.assertEqual(extract_title(md), "My Title")
-
-	def test_extract_title_ignores_other_headers(self):
-		md = "## Not it\n### Also not it\n# Real One\nParagraph"
-		self.assertEqual(extract_title(md), "Real One")
-
-	def test_extract_title_uses_first_h1(self):
-		md = "# First Title\n\n# Second Title"
-		self.assertEqual(extract_title(md), "First Title")
-
-	def test_extract_title_ignores_no_space_after_hash(self):
-		md = "#Hello (no space)\n\n# Proper Title"
-		self.assertEqual(extract_title(md), "Proper Title")
-
-	def test_extract_title_raises_when_missing(self):
-		md = "No h1 here\n## Subheading only\nParagraph text"
-		with self.assertRaises(ValueError):
-			extract_title(md)
-
 
 if __name__ == "__main__":
 	unittest.main()
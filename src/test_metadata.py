@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+
+from markdown_blocks import markdown_to_html_node
+from metadata import page_meta, split_front_matter
+from render import render_page
+from render_cache import RenderCache
+
+
+class TestFrontMatter(unittest.TestCase):
+
+	def test_parse(self):
+		md = (
+			"---\n"
+			'title: "Tom: a mistake?"\n'
+			"date: 2024-05-01 # published\n"
+			"tags: [tolkien, 'essays, long']\n"
+			"draft: false\n"
+			"weight: 3\n"
+			"aliases:\n"
+			"  - /tom/\n"
+			"  - /bombadil/\n"
+			"empty:\n"
+			"---\n"
+			"# Tom\n"
+		)
+		meta, body = split_front_matter(md)
+		self.assertEqual(meta, {
+			"title": "Tom: a mistake?", "date": "2024-05-01", "tags": ["tolkien", "essays, long"],
+			"draft": False, "weight": 3, "aliases": ["/tom/", "/bombadil/"], "empty": None,
+		})
+		self.assertEqual(body, "# Tom\n")
+
+	def test_no_front_matter(self):
+		md = "# Title\n\n---\n\ntext"
+		self.assertEqual(split_front_matter(md), ({}, md))
+		self.assertEqual(split_front_matter("----\nx"), ({}, "----\nx"))
+
+	def test_malformed(self):
+		for md in ("---\ntitle: x\n", "---\njust text\n---\n", "---\n- item\n---\n", "---\na: 1\na: 2\n---\n", "---\na: 'open\n---\n"):
+			with self.assertRaises(ValueError, msg=md):
+				split_front_matter(md)
+
+
+class TestPageMeta(unittest.TestCase):
+
+	def test_title_and_summary_from_tree(self):
+		root = markdown_to_html_node("[< Back](/)\n\n# A **bold** `title`\n\nFirst _real_ paragraph.\n\nSecond.")
+		self.assertEqual(page_meta(root), {"title": "A bold title", "summary": "First real paragraph."})
+
+	def test_front_matter_wins(self):
+		root = markdown_to_html_node("# Heading\n\ntext")
+		meta = page_meta(root, {"title": "Given", "description": "About it"})
+		self.assertEqual((meta["title"], meta["summary"]), ("Given", "About it"))
+
+	def test_long_summary_is_cut_at_a_word(self):
+		root = markdown_to_html_node("# T\n\n" + "word " * 100)
+		summary = page_meta(root)["summary"]
+		self.assertLessEqual(len(summary), 201)
+		self.assertTrue(summary.endswith("word…"))
+
+	def test_no_title(self):
+		# an h1 inside a code block is not a title
+		with self.assertRaises(ValueError):
+			page_meta(markdown_to_html_node("```\n# not a title\n```"))
+
+
+class TestRenderWithMeta(unittest.TestCase):
+
+	def test_front_matter_fills_placeholders(self):
+		md = '---\ndescription: Tom & "friends"\ntags: [a, b]\n---\n# Hi\n\ntext'
+		meta = {}
+		html = render_page(md, '<title>{{ Title }}</title><meta content="{{ description }}" keywords="{{ tags }}">{{ Content }}', "/", meta=meta)
+		self.assertEqual(
+			html,
+			'<title>Hi</title><meta content="Tom &amp; &quot;friends&quot;" keywords="a, b"><div><h1>Hi</h1><p>text</p></div>'
+		)
+		self.assertEqual(meta["title"], "Hi")
+		self.assertEqual(meta["tags"], ["a", "b"])
+
+	def test_meta_cached_with_content(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			cache = RenderCache(tmp)
+			first = {}
+			render_page("---\ndate: 2024-01-01\n---\n# T\n\nbody", "{{ Content }}", "/", cache=cache, meta=first)
+			again = {}
+			render_page("---\ndate: 2024-01-01\n---\n# T\n\nbody", "{{ Content }}", "/", cache=cache, meta=again)
+			self.assertEqual(cache.hits, 1)
+			self.assertEqual(again, first)
+			self.assertEqual(first["date"], "2024-01-01")
+
+
+if __name__ == "__main__":
+	unittest.main()
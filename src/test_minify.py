@@ -0,0 +1,106 @@
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from htmlnode import LeafNode, ParentNode, serialize_minified
+from markdown_blocks import markdown_to_html_node
+from minify import MinifyReport, minify_css, minify_markup
+from page_template import Template
+from render import render_page
+from sync import sync_dir
+
+
+class TestMinifyMarkup(unittest.TestCase):
+
+	def test_collapses_whitespace_and_unquotes(self):
+		text = '<!doctype html>\n<html>\n  <head>\n    <meta charset="utf-8" />\n    <link href="/a.css" rel="stylesheet" />\n  </head>\n</html>\n'
+		self.assertEqual(
+			minify_markup(text),
+			"<!doctype html><html><head><meta charset=utf-8><link href=/a.css rel=stylesheet></head></html>"
+		)
+
+	def test_keeps_spaces_that_separate_words(self):
+		self.assertEqual(minify_markup("<p>\n  <b>a</b>\n  <i>b</i>\n</p>"), "<p> <b>a</b> <i>b</i> </p>")
+		self.assertEqual(minify_markup('<div class="a b" data-x=""></div>'), '<div class="a b" data-x=""></div>')
+
+	def test_leaves_preformatted_content_and_placeholder_edges(self):
+		self.assertEqual(minify_markup("<pre>\n  a  b\n</pre>  <!-- note -->  <hr />"), "<pre>\n  a  b\n</pre><hr>")
+		self.assertEqual(minify_markup("  <title> ", at_start=False, at_end=False), " <title> ")
+
+
+class TestMinifyCss(unittest.TestCase):
+
+	def test_minify_css(self):
+		css = '/* c */\nh1,\nh2 > b {\n  color: red ;\n  font-family: "A  B", serif;\n}\na :hover { margin: 0 auto; }\n/*! license */'
+		self.assertEqual(minify_css(css), 'h1,h2>b{color:red;font-family:"A  B",serif}a :hover{margin:0 auto}/*! license */')
+
+
+class TestSerializeMinified(unittest.TestCase):
+
+	def test_optional_end_tags_and_quotes(self):
+		root = markdown_to_html_node("# T\n\nsome\ntext [x](/a b)\n\n- one\n- two\n\n![i](/i.png)")
+		html, _ = serialize_minified(root)
+		self.assertEqual(
+			html,
+			'<div><h1>T</h1><p>some text <a href="/a b">x</a><ul><li>one<li>two</ul>'
+			'<p><img src=/i.png alt=i></div>'
+		)
+
+	def test_keeps_end_tags_where_required(self):
+		# a </p> followed by text, or inside an <a>, must stay
+		root = ParentNode("div", [ParentNode("p", [LeafNode(None, "x")]), LeafNode(None, "tail")])
+		self.assertEqual(serialize_minified(root)[0], "<div><p>x</p>tail</div>")
+		link = ParentNode("a", [ParentNode("p", [LeafNode(None, "x")])], {"href": "/"})
+		self.assertEqual(serialize_minified(link)[0], "<a href=/><p>x</p></a>")
+
+	def test_preformatted_content_untouched(self):
+		root = markdown_to_html_node("```\n  a   b\n\n  c\n```")
+		self.assertEqual(serialize_minified(root)[0], root.to_html())
+
+	def test_saved_matches_size_difference(self):
+		# bytes, not characters: U+3000 is whitespace and 3 bytes in UTF-8
+		md = "# Title\n\nA \u3000 paragraph\nwith [a link](/x) and ![img](/i.png)\n\n1. first\n2. second\n\n> quote"
+		template = Template.compile('<html>\n  <body class="page">\u3000\n    {{ Content }}\n  </body>\n</html>\n')
+		plain = render_page(md, template, "/base/")
+		saved = []
+		minified = render_page(md, template, "/base/", minify=True, saved=saved)
+		self.assertEqual(saved, [len(plain.encode("utf-8")) - len(minified.encode("utf-8"))])
+		self.assertLess(len(minified), len(plain))
+
+
+class TestMinifyStatic(unittest.TestCase):
+
+	def test_css_is_minified_and_rewritten_only_when_changed(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			src = root / "static"
+			src.mkdir()
+			(src / "a.css").write_text("a {\n  color: red;\n}\n", encoding="utf-8")
+			(src / "b.txt").write_text("as is  ", encoding="utf-8")
+
+			def transform(path):
+				if path.suffix == ".css":
+					return minify_css(path.read_text(encoding="utf-8")).encode("utf-8")
+				return None
+
+			with redirect_stdout(StringIO()):
+				_, copied, _ = sync_dir(src, root / "docs", transform=transform)
+				self.assertEqual(copied, ["a.css", "b.txt"])
+				self.assertEqual((root / "docs" / "a.css").read_text(encoding="utf-8"), "a{color:red}")
+				self.assertEqual((root / "docs" / "b.txt").read_text(encoding="utf-8"), "as is  ")
+				_, copied, _ = sync_dir(src, root / "docs", previous=["a.css", "b.txt"], transform=transform)
+				self.assertEqual(copied, [])
+
+	def test_report(self):
+		report = MinifyReport()
+		with redirect_stdout(StringIO()) as out:
+			report.add("docs/a.css", 200, 150)
+			report.add("docs/index.html", 800, 600)
+		self.assertIn("docs/a.css (50 bytes saved, 25%)", out.getvalue())
+		self.assertEqual(report.summary(), "minify: 250 bytes saved across 2 file(s) (25%)")
+
+
+if __name__ == "__main__":
+	unittest.main()
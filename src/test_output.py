@@ -0,0 +1,127 @@
+import json
+import os
+import stat
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import output
+from output import OutputWriter, read_umask, write_if_changed
+from manifest import BuildManifest, manifest_path_for
+from main import BuildOptions, BuildTarget, generate_pages_recursive
+
+
+class TestWriteIfChanged(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.root = Path(self.tmp.name)
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def test_statuses(self):
+		path = self.root / "a" / "index.html"
+		self.assertEqual(write_if_changed(path, "<p>1</p>"), "added")
+		self.assertEqual(write_if_changed(path, "<p>1</p>"), "unchanged")
+		self.assertEqual(write_if_changed(path, b"<p>2</p>"), "changed")
+		self.assertEqual(path.read_text(encoding="utf-8"), "<p>2</p>")
+
+	def test_unchanged_keeps_mtime(self):
+		path = self.root / "x.html"
+		write_if_changed(path, "same")
+		os.utime(path, ns=(10**9, 10**9))
+		write_if_changed(path, "same")
+		self.assertEqual(path.stat().st_mtime_ns, 10**9)
+
+	def test_replaces_atomically_leaving_no_temp_files(self):
+		path = self.root / "x.html"
+		write_if_changed(path, "one")
+		before = path.stat().st_ino
+		write_if_changed(path, "two")
+		self.assertNotEqual(path.stat().st_ino, before)
+		self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["x.html"])
+
+	def test_mode_follows_umask_and_existing_file(self):
+		# not mkstemp's 0600: pages must be readable by the web server
+		self.addCleanup(setattr, output, "_UMASK", output._UMASK)
+		old = os.umask(0o027)
+		try:
+			read_umask()
+		finally:
+			os.umask(old)
+		path = self.root / "x.html"
+		write_if_changed(path, "one")
+		self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o640)
+		path.chmod(0o604)
+		write_if_changed(path, "two")
+		self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o604)
+
+	def test_default_mode_when_umask_not_read(self):
+		self.addCleanup(setattr, output, "_UMASK", output._UMASK)
+		output._UMASK = None
+		path = self.root / "x.html"
+		write_if_changed(path, "one")
+		self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o644)
+
+
+class TestOutputWriter(unittest.TestCase):
+
+	def test_batched_writes_and_report(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			(root / "old.html").write_text("old", encoding="utf-8")
+			(root / "same.html").write_text("same", encoding="utf-8")
+			with OutputWriter(root, workers=3) as writer:
+				for i in range(10):
+					writer.write(root / "pages" / f"{i}.html", f"page {i}")
+				writer.write(root / "old.html", "new")
+				writer.write(root / "same.html", "same")
+				writer.changes.record(root / "gone.html", "deleted")
+			report = writer.changes.as_dict()
+			self.assertEqual(report["added"], sorted(f"pages/{i}.html" for i in range(10)))
+			self.assertEqual(report["changed"], ["old.html"])
+			self.assertEqual(report["deleted"], ["gone.html"])
+			writer.changes.write_report(root / "changes.json")
+			self.assertEqual(json.loads((root / "changes.json").read_text(encoding="utf-8")), report)
+
+	def test_flush_reraises_write_errors(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			(root / "file").write_text("x", encoding="utf-8")
+			writer = OutputWriter(root)
+			writer.write(root / "file" / "child.html", "cannot")
+			with self.assertRaises(OSError):
+				writer.close()
+
+
+class TestBuildChangeReport(unittest.TestCase):
+
+	def test_second_build_reports_only_edits(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			content = root / "content"
+			content.mkdir()
+			(content / "a.md").write_text("# A", encoding="utf-8")
+			(content / "b.md").write_text("# B", encoding="utf-8")
+			template = root / "t.html"
+			template.write_text("{{ Content }}", encoding="utf-8")
+			docs = root / "docs"
+
+			def build():
+				manifest = BuildManifest.load(manifest_path_for(docs))
+				with redirect_stdout(StringIO()), OutputWriter(docs) as writer:
+					generate_pages_recursive(content, template, BuildOptions([BuildTarget(docs, "/", manifest, writer)]))
+				return writer.changes.as_dict()
+
+			self.assertEqual(build()["added"], ["a.html", "b.html"])
+			(content / "a.md").write_text("# A2", encoding="utf-8")
+			(content / "b.md").unlink()
+			self.assertEqual(build(), {"added": [], "changed": ["a.html"], "deleted": ["b.html"]})
+			self.assertEqual(build(), {"added": [], "changed": [], "deleted": []})
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,133 @@
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from main import BuildOptions, BuildTarget, generate_pages_recursive
+from manifest import BuildManifest, manifest_path_for
+from page_index import PageIndex, atom_feed, site_path, sitemap_xml
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+def post(title, date, extra=""):
+	return f"---\ndate: {date}\n{extra}---\n# {title}\n\nAbout {title}."
+
+
+class TestFeedAndSitemap(unittest.TestCase):
+
+	def entries(self):
+		return [
+			{"url": "/blog/a/", "meta": {"title": "A & B", "summary": "first", "date": "2024-01-01"}},
+			{"url": "/blog/b/", "meta": {"title": "Newer", "summary": "", "date": "2024-02-01T10:00:00Z"}},
+			{"url": "/about/", "meta": {"title": "About", "summary": "undated"}},
+		]
+
+	def test_atom_feed_lists_dated_entries_newest_first(self):
+		feed = atom_feed(self.entries(), "https://example.com/site/", "Site")
+		self.assertIn("<updated>2024-02-01T10:00:00Z</updated>\n  <author>", feed)
+		self.assertLess(feed.index("https://example.com/site/blog/b/"), feed.index("https://example.com/site/blog/a/"))
+		self.assertIn("<title>A &amp; B</title>", feed)
+		self.assertIn("<updated>2024-01-01T00:00:00Z</updated>\n    <summary>first</summary>", feed)
+		self.assertNotIn("/about/", feed)
+
+	def test_sitemap(self):
+		xml = sitemap_xml([("/b/", "2024-02-01T10:00:00Z"), ("/", None)], "https://example.com/")
+		self.assertIn(
+			"  <url>\n    <loc>https://example.com/</loc>\n  </url>\n"
+			"  <url>\n    <loc>https://example.com/b/</loc>\n    <lastmod>2024-02-01</lastmod>\n  </url>\n",
+			xml
+		)
+
+	def test_site_path(self):
+		self.assertEqual(site_path("blog/tom/index.html"), "/blog/tom/")
+		self.assertEqual(site_path("index.html"), "/")
+		self.assertEqual(site_path("blog/tom.html"), "/blog/tom.html")
+
+
+class TestPageIndex(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		self.content = root / "content"
+		(self.content / "blog").mkdir(parents=True)
+		(self.content / "index.md").write_text("# Home\n\nWelcome", encoding="utf-8")
+		(self.content / "blog" / "one.md").write_text(post("One", "2024-01-01"), encoding="utf-8")
+		(self.content / "blog" / "two.md").write_text(post("Two", "2024-02-01"), encoding="utf-8")
+		(self.content / "blog" / "wip.md").write_text(post("Wip", "2024-03-01", "draft: true\n"), encoding="utf-8")
+		self.template = root / "template.html"
+		self.template.write_text(TEMPLATE, encoding="utf-8")
+		self.docs = root / "docs"
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def build(self, jobs=1, **options):
+		options = {"sections": ["blog"], "per_page": 2, "site_url": "https://example.com", "feed": True, "sitemap": True, **options}
+		manifest = BuildManifest.load(manifest_path_for(self.docs))
+		pages = PageIndex.load(self.docs, **options)
+		with redirect_stdout(StringIO()) as out:
+			generate_pages_recursive(self.content, self.template, BuildOptions([BuildTarget(self.docs, "/site", manifest, pages=pages)], jobs=jobs))
+		return out.getvalue()
+
+	def read(self, rel):
+		return (self.docs / rel).read_text(encoding="utf-8")
+
+	def test_listing_feed_and_sitemap(self):
+		self.build()
+		listing = self.read("blog/index.html")
+		self.assertTrue(listing.startswith("<title>Blog</title>"))
+		self.assertIn('<a href="/site/blog/two.html">Two</a> <time datetime="2024-02-01">2024-02-01</time><p>About Two.</p>', listing)
+		self.assertLess(listing.index("Two"), listing.index("One"))
+		self.assertNotIn("Wip", listing)
+		self.assertFalse((self.docs / "blog" / "page" / "2").exists())
+		feed = self.read("feed.xml")
+		self.assertIn("<title>Home</title>", feed)
+		self.assertIn("https://example.com/site/blog/one.html", feed)
+		self.assertIn("<loc>https://example.com/site/blog/</loc>", self.read("sitemap.xml"))
+
+	def test_new_post_regenerates_only_its_listing(self):
+		self.build()
+		(self.content / "blog" / "three.md").write_text(post("Three", "2024-04-01"), encoding="utf-8")
+		log = self.build()
+		self.assertIn("4 unchanged page(s) skipped", log)
+		self.assertIn("page index: 4 listing/feed/sitemap file(s) generated", log)
+		self.assertIn("Three", self.read("blog/index.html"))
+		self.assertIn("One", self.read("blog/page/2/index.html"))
+		self.assertIn('<a href="/site/blog/" rel="prev">Newer</a>', self.read("blog/page/2/index.html"))
+		log = self.build()
+		self.assertIn("page index: 0 listing/feed/sitemap file(s) generated", log)
+
+		# pagination shrinks again: the extra page goes
+		(self.content / "blog" / "three.md").unlink()
+		self.build()
+		self.assertFalse((self.docs / "blog" / "page").exists())
+
+	def test_parallel_build_matches_sequential(self):
+		self.build(jobs=3)
+		parallel = [self.read(rel) for rel in ("blog/index.html", "feed.xml", "sitemap.xml")]
+		manifest_path_for(self.docs).unlink()
+		Path(self.tmp.name, ".docs-pages.json").unlink()
+		self.build(jobs=1)
+		self.assertEqual([self.read(rel) for rel in ("blog/index.html", "feed.xml", "sitemap.xml")], parallel)
+
+	def test_options_change_regenerates_and_clear_removes(self):
+		self.build()
+		self.build(feed=False)
+		self.assertFalse((self.docs / "feed.xml").exists())
+		with redirect_stdout(StringIO()):
+			PageIndex.load(self.docs).clear()
+		self.assertFalse((self.docs / "blog" / "index.html").exists())
+		self.assertFalse((self.docs / "sitemap.xml").exists())
+		self.assertFalse(Path(self.tmp.name, ".docs-pages.json").exists())
+
+	def test_listing_may_not_overwrite_a_page(self):
+		(self.content / "blog" / "index.md").write_text("# Blog home", encoding="utf-8")
+		with self.assertRaises(ValueError):
+			self.build()
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from page_template import Template, Placeholder, load_template, normalize_basepath, template_hash
+from htmlnode import LeafNode, ParentNode, prefix_url
+from render import render_page
+
+
+class TestTemplate(unittest.TestCase):
+
+	def test_compile_segments(self):
+		t = Template.compile("<title>{{ Title }}</title><p>{{Content}}</p>")
+		self.assertEqual(t.segments, ["<title>", Placeholder("Title"), "</title><p>", Placeholder("Content"), "</p>"])
+
+	def test_render_fills_and_blanks_missing(self):
+		t = Template.compile("{{ Title }}|{{ Date }}|{{ Description }}")
+		self.assertEqual(t.render({"Title": "T", "Date": "2024-01-01"}), "T|2024-01-01|")
+
+	def test_partials_are_inlined(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			(root / "parts").mkdir()
+			(root / "parts" / "nav.html").write_text('<a href="/">{{ Title }}</a>', encoding="utf-8")
+			(root / "page.html").write_text("<nav>{{> parts/nav.html }}</nav>{{ Content }}", encoding="utf-8")
+			t = load_template(root / "page.html")
+			self.assertEqual(t.render({"Title": "Home", "Content": "x"}), '<nav><a href="/">Home</a></nav>x')
+			self.assertEqual(len(t.sources), 2)
+
+	def test_partial_cycle_raises(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			(root / "a.html").write_text("{{> a.html }}", encoding="utf-8")
+			with self.assertRaises(ValueError):
+				load_template(root / "a.html")
+
+	def test_for_basepath_rewrites_template_urls_once(self):
+		t = Template.compile('<link href="/index.css" /><img src="/a.png" /><a href="//cdn/x">{{ Content }}')
+		rebased = t.for_basepath("static")
+		self.assertIs(rebased, t.for_basepath("/static/"))
+		self.assertEqual(
+			rebased.render({"Content": ""}),
+			'<link href="/static/index.css" /><img src="/static/a.png" /><a href="//cdn/x">'
+		)
+		self.assertIs(t.for_basepath("/"), t)
+
+	def test_load_template_cached_until_changed(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = Path(tmp) / "t.html"
+			path.write_text("one {{ Title }}", encoding="utf-8")
+			first = load_template(path)
+			self.assertIs(load_template(path), first)
+			h1 = template_hash(path)
+			path.write_text("two {{ Title }}!", encoding="utf-8")
+			self.assertEqual(load_template(path).render({"Title": "x"}), "two x!")
+			self.assertNotEqual(template_hash(path), h1)
+
+	def test_normalize_basepath(self):
+		self.assertEqual(normalize_basepath("/"), "/")
+		self.assertEqual(normalize_basepath("static"), "/static/")
+		self.assertEqual(normalize_basepath("/static"), "/static/")
+
+
+class TestNodeLevelBasepath(unittest.TestCase):
+
+	def test_prefix_url(self):
+		self.assertEqual(prefix_url("/a", "/static/"), "/static/a")
+		self.assertEqual(prefix_url("//cdn/a", "/static/"), "//cdn/a")
+		self.assertEqual(prefix_url("https://x.com", "/static/"), "https://x.com")
+		self.assertEqual(prefix_url("/a", "/"), "/a")
+
+	def test_serializer_prefixes_links_and_images(self):
+		tree = ParentNode("p", [
+			LeafNode("a", "home", {"href": "/blog"}),
+			LeafNode("img", "", {"src": "/images/x.png", "alt": "x"}),
+			LeafNode(None, 'literal href="/not-a-link"'),
+		])
+		self.assertEqual(
+			tree.to_html("/static/"),
+			'<p><a href="/static/blog">home</a><img src="/static/images/x.png" alt="x"></img>literal href="/not-a-link"</p>'
+		)
+		self.assertEqual(tree.to_html(), '<p><a href="/blog">home</a><img src="/images/x.png" alt="x"></img>literal href="/not-a-link"</p>')
+
+	def test_render_page_uses_src_not_scr(self):
+		template = Template.compile('<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+		html = render_page("# A & B\n\n![pic](/images/p.png)", template, "/static/")
+		self.assertIn('src="/static/images/p.png"', html)
+		self.assertNotIn("scr=", html)
+		self.assertIn('<link href="/static/index.css">', html)
+		self.assertIn("<title>A &amp; B</title>", html)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,92 @@
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from profiler import BuildProfiler, lap, percentile
+from main import BuildOptions, BuildTarget, generate_pages_recursive
+
+
+class TestProfiler(unittest.TestCase):
+
+	def test_lap_without_timings_is_noop(self):
+		self.assertEqual(lap(None, "parse", 1.5), 1.5)
+
+	def test_lap_records_stage(self):
+		timings = []
+		lap(timings, "parse", 0.0)
+		self.assertEqual(timings[0][0], "parse")
+		self.assertEqual(timings[0][1], 0.0)
+
+	def test_percentile(self):
+		values = list(range(101))
+		self.assertEqual(percentile(values, 50), 50)
+		self.assertEqual(percentile(values, 99), 99)
+		self.assertEqual(percentile([], 50), 0.0)
+
+	def test_summary_lists_stages_and_slowest(self):
+		prof = BuildProfiler()
+		prof.add("a.md", [("parse", 0.0, 0.010), ("write", 0.01, 0.001)], lane=1)
+		prof.add("b.md", [("parse", 0.0, 0.002)], lane=2)
+		text = prof.summary(top=1)
+		self.assertIn("parse", text)
+		self.assertIn("write", text)
+		self.assertIn("slowest 1:", text)
+		self.assertIn("a.md", text)
+		self.assertNotIn("b.md", text)
+
+	def test_trace_events_one_lane_per_worker(self):
+		prof = BuildProfiler()
+		prof.add("a.md", [("parse", prof.origin, 0.001)], lane=11)
+		prof.add("b.md", [("parse", prof.origin + 0.002, 0.001)], lane=12)
+		with tempfile.TemporaryDirectory() as tmp:
+			path = Path(tmp) / "trace.json"
+			prof.write_trace(path)
+			events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+		complete = [e for e in events if e["ph"] == "X"]
+		self.assertEqual([e["tid"] for e in complete], [11, 12])
+		self.assertEqual(complete[1]["ts"], 2000.0)
+		self.assertEqual(complete[0]["args"], {"item": "a.md"})
+		self.assertEqual(len([e for e in events if e["ph"] == "M"]), 2)
+
+
+class TestProfiledBuild(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		self.content = root / "content"
+		self.content.mkdir()
+		for i in range(3):
+			(self.content / f"p{i}.md").write_text(f"# P{i}\n\ntext", encoding="utf-8")
+		self.template = root / "t.html"
+		self.template.write_text("{{ Content }}", encoding="utf-8")
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def test_sequential_build_records_every_stage(self):
+		prof = BuildProfiler()
+		with redirect_stdout(StringIO()):
+			generate_pages_recursive(self.content, self.template, BuildOptions([BuildTarget(Path(self.tmp.name) / "out")], profiler=prof))
+		self.assertEqual(
+			set(prof.stage_durations()),
+			{"read", "parse", "title", "serialize", "template", "write"}
+		)
+		self.assertEqual(len(prof.item_totals()), 3)
+
+	def test_parallel_build_records_worker_lanes(self):
+		prof = BuildProfiler()
+		with redirect_stdout(StringIO()):
+			generate_pages_recursive(self.content, self.template, BuildOptions([BuildTarget(Path(self.tmp.name) / "out")], jobs=2, profiler=prof))
+		self.assertIn("parse", prof.stage_durations())
+		parse_lanes = {e[4] for e in prof.events if e[1] == "parse"}
+		write_lanes = {e[4] for e in prof.events if e[1] == "write"}
+		self.assertTrue(parse_lanes)
+		self.assertTrue(parse_lanes.isdisjoint(write_lanes))
+
+
+if __name__ == "__main__":
+	unittest.main()
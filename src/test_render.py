@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from render import render_page, render_pages, render_targets, RenderError
+from main import BuildOptions, BuildTarget, generate_pages_recursive
+from manifest import BuildManifest, manifest_path_for
+
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestRenderPage(unittest.TestCase):
+
+	def test_render_page_fills_template(self):
+		html = render_page("# Hi\n\nsome **bold** text", TEMPLATE, "/")
+		self.assertEqual(html, "<title>Hi</title><body><div><h1>Hi</h1><p>some <b>bold</b> text</p></div></body>")
+
+
+class TestRenderTargets(unittest.TestCase):
+
+	def test_one_parse_per_page(self):
+		md = "# Hi\n\n[home](/) ![x](/x.png)"
+		timings = []
+		saved = []
+		pages = render_targets(md, TEMPLATE, ["/", "/a/", "b"], timings=timings, minify=True, saved=saved)
+		self.assertEqual(pages, [render_page(md, TEMPLATE, b, minify=True) for b in ("/", "/a/", "b")])
+		self.assertIn('<a href=/b/>home</a>', pages[2])
+		self.assertEqual([stage for stage, _, _ in timings].count("parse"), 1)
+		self.assertEqual([stage for stage, _, _ in timings].count("serialize"), 3)
+		self.assertEqual(len(saved), 3)
+
+
+class TestParallelRender(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		self.content = root / "content"
+		self.template = root / "template.html"
+		self.template.write_text(TEMPLATE, encoding="utf-8")
+		self.content.mkdir()
+		for i in range(8):
+			(self.content / f"page{i}.md").write_text(f"# Page {i}\n\n- item _{i}_", encoding="utf-8")
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def build(self, dest, jobs):
+		with redirect_stdout(StringIO()) as out:
+			generate_pages_recursive(self.content, self.template, BuildOptions([BuildTarget(dest)], jobs=jobs))
+		return out.getvalue()
+
+	def test_output_and_log_independent_of_jobs(self):
+		root = Path(self.tmp.name)
+		log1 = self.build(root / "one", 1)
+		log4 = self.build(root / "four", 4)
+		self.assertEqual(log1.replace("/one/", "/x/"), log4.replace("/four/", "/x/"))
+		for i in range(8):
+			name = f"page{i}.html"
+			self.assertEqual((root / "one" / name).read_bytes(), (root / "four" / name).read_bytes())
+
+	def test_render_pages_preserves_order(self):
+		sources = sorted(self.content.glob("*.md"))
+		pages = render_pages(sources, self.template, "/", 3)
+		for src, html in zip(sources, pages):
+			self.assertEqual(html, render_page(src.read_text(encoding="utf-8"), TEMPLATE, "/"))
+
+	def test_targets_match_separate_builds(self):
+		root = Path(self.tmp.name)
+		for jobs in (1, 3):
+			targets = [
+				BuildTarget(root / f"multi{jobs}" / name, basepath, BuildManifest.load(manifest_path_for(root / f"multi{jobs}" / name)))
+				for name, basepath in (("a", "/"), ("b", "/pre/"))
+			]
+			with redirect_stdout(StringIO()) as out:
+				generate_pages_recursive(self.content, self.template, BuildOptions(targets, jobs=jobs))
+			self.assertEqual(out.getvalue().count("Generating page"), 16)
+			with redirect_stdout(StringIO()) as out:
+				generate_pages_recursive(self.content, self.template, BuildOptions(targets, jobs=jobs))
+			self.assertEqual(out.getvalue(), "8 unchanged page(s) skipped\n")
+		with redirect_stdout(StringIO()):
+			generate_pages_recursive(self.content, self.template, BuildOptions([BuildTarget(root / "single", "/pre/")]))
+		for i in range(8):
+			name = f"page{i}.html"
+			for jobs in (1, 3):
+				self.assertEqual((root / f"multi{jobs}" / "b" / name).read_bytes(), (root / "single" / name).read_bytes())
+			self.assertIn("<li>item <i>", (root / "multi1" / "a" / name).read_text(encoding="utf-8"))
+
+	def test_failure_reports_all_and_writes_nothing(self):
+		(self.content / "bad1.md").write_text("no title", encoding="utf-8")
+		(self.content / "bad2.md").write_text("still no title", encoding="utf-8")
+		dest = Path(self.tmp.name) / "out"
+		with self.assertRaises(RenderError) as ctx:
+			self.build(dest, 4)
+		self.assertEqual([p.name for p, _ in ctx.exception.failures], ["bad1.md", "bad2.md"])
+		self.assertFalse(dest.exists())
+
+
+if __name__ == "__main__":
+	unittest.main()
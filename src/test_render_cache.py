@@ -0,0 +1,97 @@
+import os
+import stat
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import output
+from render_cache import RenderCache
+from render import render_page
+from main import BuildOptions, BuildTarget, generate_pages_recursive
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestRenderCache(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.root = Path(self.tmp.name) / "cache"
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def test_key_depends_on_markdown_and_basepath(self):
+		k = RenderCache.key("# a", "/")
+		self.assertEqual(k, RenderCache.key("# a", "/"))
+		self.assertNotEqual(k, RenderCache.key("# b", "/"))
+		self.assertNotEqual(k, RenderCache.key("# a", "/static/"))
+
+	def test_put_then_get_counts_hits_and_misses(self):
+		cache = RenderCache(self.root)
+		self.assertIsNone(cache.get("ab" * 32))
+		cache.put("ab" * 32, {"title": "T", "content": "<div></div>"})
+		self.assertEqual(cache.get("ab" * 32), {"title": "T", "content": "<div></div>"})
+		self.assertEqual((cache.hits, cache.misses), (1, 1))
+		self.assertEqual(list(self.root.glob("*/.tmp-*")), [])
+
+	def test_entry_without_required_fields_is_a_miss(self):
+		cache = RenderCache(self.root)
+		cache.put("ab" * 32, {"title": "T"})
+		self.assertIsNone(cache.get("ab" * 32, required=("title", "text")))
+		self.assertEqual(cache.get("ab" * 32, required=("title",)), {"title": "T"})
+		self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+	def test_entries_readable_by_other_users(self):
+		self.addCleanup(setattr, output, "_UMASK", output._UMASK)
+		output._UMASK = 0o022
+		cache = RenderCache(self.root)
+		cache.put("cd" * 32, {"title": "T"})
+		self.assertEqual(stat.S_IMODE(cache._path("cd" * 32).stat().st_mode), 0o644)
+
+	def test_prune_evicts_least_recently_used(self):
+		cache = RenderCache(self.root, max_bytes=0)
+		keys = [c * 64 for c in "abc"]
+		for i, key in enumerate(keys):
+			cache.put(key, {"content": "x" * 100})
+			path = self.root / key[:2] / f"{key}.json"
+			os.utime(path, ns=(i * 10**9, i * 10**9))
+		size = (self.root / "aa" / f"{'a' * 64}.json").stat().st_size
+		cache.max_bytes = 2 * size
+		cache.get(keys[0])  # touching a makes b the oldest
+		cache.prune()
+		self.assertEqual(cache.evictions, 1)
+		self.assertIsNone(cache.get(keys[1]))
+		self.assertIsNotNone(cache.get(keys[0]))
+		self.assertIsNotNone(cache.get(keys[2]))
+
+	def test_render_page_hit_skips_parsing(self):
+		cache = RenderCache(self.root)
+		first = render_page("# Hi\n\ntext", TEMPLATE, "/", cache=cache)
+		timings = []
+		second = render_page("# Hi\n\ntext", TEMPLATE, "/", cache=cache, timings=timings)
+		self.assertEqual(first, second)
+		self.assertEqual(cache.hits, 1)
+		self.assertNotIn("parse", [stage for stage, _, _ in timings])
+
+	def test_parallel_build_counts_worker_hits(self):
+		content = Path(self.tmp.name) / "content"
+		content.mkdir()
+		for i in range(4):
+			(content / f"p{i}.md").write_text(f"# P{i}", encoding="utf-8")
+		template = Path(self.tmp.name) / "t.html"
+		template.write_text(TEMPLATE, encoding="utf-8")
+		out = Path(self.tmp.name) / "out"
+		with redirect_stdout(StringIO()):
+			cold = RenderCache(self.root)
+			generate_pages_recursive(content, template, BuildOptions([BuildTarget(out)], jobs=2, cache=cold))
+			warm = RenderCache(self.root)
+			generate_pages_recursive(content, template, BuildOptions([BuildTarget(out)], jobs=2, cache=warm))
+		self.assertEqual((cold.hits, cold.misses), (0, 4))
+		self.assertEqual((warm.hits, warm.misses), (4, 0))
+
+
+if __name__ == "__main__":
+	unittest.main()
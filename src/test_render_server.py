@@ -0,0 +1,152 @@
+import http.client
+import json
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from render import render_page
+from render_server import RenderService, RenderStats, start_render_server
+
+TEMPLATE = '<html><head><title>{{ Title }}</title><link href="/a.css"></head><body>{{ Content }}</body></html>'
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+	def __init__(self, path):
+		super().__init__("localhost")
+		self.socket_path = path
+
+	def connect(self):
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.sock.connect(self.socket_path)
+
+
+class TestRenderServer(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		cls.tmp = tempfile.TemporaryDirectory()
+		cls.template = Path(cls.tmp.name) / "template.html"
+		cls.template.write_text(TEMPLATE, encoding="utf-8")
+		cls.service = RenderService(cls.template, jobs=2, max_queue=2)
+		cls.server = start_render_server(cls.service, port=0)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.server.shutdown()
+		cls.server.server_close()
+		cls.service.close()
+		cls.tmp.cleanup()
+
+	def request(self, method, path, body=None, conn=None):
+		conn = conn or http.client.HTTPConnection(*self.server.server_address[:2], timeout=10)
+		try:
+			conn.request(method, path, body=body.encode("utf-8") if body is not None else None)
+			response = conn.getresponse()
+			return response.status, response.read().decode("utf-8")
+		finally:
+			conn.close()
+
+	def test_fragment_and_page(self):
+		status, html = self.request("POST", "/render/html?basepath=/docs/", "hello [x](/y)")
+		self.assertEqual((status, html), (200, '<div><p>hello <a href="/docs/y">x</a></p></div>'))
+		md = "# Title\n\nbody"
+		status, html = self.request("POST", "/render/page?basepath=/docs/", md)
+		self.assertEqual(status, 200)
+		self.assertEqual(html, render_page(md, TEMPLATE, "/docs/"))
+
+	def test_fragment_drops_front_matter(self):
+		status, html = self.request("POST", "/render/html", "---\ndate: 2024-01-01\n---\ntext")
+		self.assertEqual((status, html), (200, "<div><p>text</p></div>"))
+
+	def test_errors(self):
+		status, body = self.request("POST", "/render/page", "no title")
+		self.assertEqual(status, 422)
+		self.assertIn("No H1 header", body)
+		self.assertEqual(self.request("POST", "/nope", "x")[0], 404)
+
+	def test_bad_content_length(self):
+		for length, expected in ((None, 411), ("abc", 400), ("-1", 400)):
+			conn = http.client.HTTPConnection(*self.server.server_address[:2], timeout=10)
+			try:
+				conn.putrequest("POST", "/render/html", skip_accept_encoding=True)
+				if length is not None:
+					conn.putheader("Content-Length", length)
+				conn.endheaders()
+				self.assertEqual(conn.getresponse().status, expected, msg=length)
+			finally:
+				conn.close()
+
+	def test_concurrent_requests(self):
+		results = []
+
+		def send(i):
+			results.append(self.request("POST", "/render/page", f"# Page {i}\n\ntext")[0])
+
+		threads = [threading.Thread(target=send, args=(i,)) for i in range(3)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+		self.assertEqual(results, [200, 200, 200])
+
+	def test_backpressure(self):
+		held = 0
+		while self.service.acquire():
+			held += 1
+		try:
+			self.assertEqual(held, 4)
+			status, _ = self.request("POST", "/render/html", "x")
+			self.assertEqual(status, 503)
+			# rejected before the body is read: no need to send it at all
+			conn = http.client.HTTPConnection(*self.server.server_address[:2], timeout=5)
+			try:
+				conn.putrequest("POST", "/render/html", skip_accept_encoding=True)
+				conn.putheader("Content-Length", "1000000")
+				conn.endheaders()
+				response = conn.getresponse()
+				self.assertEqual((response.status, response.getheader("Connection")), (503, "close"))
+			finally:
+				conn.close()
+		finally:
+			for _ in range(held):
+				self.service.release()
+		self.assertEqual(self.request("POST", "/render/html", "x")[0], 200)
+
+	def test_stats(self):
+		self.request("POST", "/render/html", "x")
+		status, body = self.request("GET", "/stats")
+		self.assertEqual(status, 200)
+		stats = json.loads(body)
+		self.assertGreaterEqual(stats["endpoints"]["/render/html"]["requests"], 1)
+		self.assertGreater(stats["endpoints"]["/render/html"]["p99_ms"], 0)
+		self.assertEqual(stats["capacity"], 4)
+		self.assertGreater(stats["requests_per_s"], 0)
+
+	def test_unix_socket(self):
+		path = str(Path(self.tmp.name) / "render.sock")
+		server = start_render_server(self.service, socket_path=path)
+		try:
+			status, html = self.request("POST", "/render/html", "**hi**", conn=UnixHTTPConnection(path))
+			self.assertEqual((status, html), (200, "<div><p><b>hi</b></p></div>"))
+		finally:
+			server.shutdown()
+			server.server_close()
+
+
+class TestRenderStats(unittest.TestCase):
+
+	def test_percentiles(self):
+		stats = RenderStats()
+		for ms in range(1, 101):
+			stats.record("/render/page", ms / 1000, ok=ms != 100)
+		stats.reject()
+		snap = stats.snapshot(in_flight=1, capacity=8)
+		self.assertEqual(snap["endpoints"]["/render/page"], {"requests": 100, "p50_ms": 51.0, "p99_ms": 99.0})
+		self.assertEqual((snap["requests"], snap["errors"], snap["rejected"]), (100, 1, 1))
+
+
+if __name__ == "__main__":
+	unittest.main()
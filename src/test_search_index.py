@@ -0,0 +1,156 @@
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from markdown_blocks import markdown_to_html_node
+from manifest import BuildManifest, manifest_path_for
+from render import render_page
+from render_cache import RenderCache
+from search_index import (
+	SearchIndex, decode_postings, encode_postings, page_text, shard_for, term_weights, tokenize
+)
+from main import BuildOptions, BuildTarget, generate_pages_recursive
+from output import OutputWriter
+
+
+def search(index_dir, query):
+	# what search.js does, for checking the published files
+	docs = json.loads((index_dir / "docs.json").read_text(encoding="utf-8"))["docs"]
+	scores = None
+	for term in tokenize(query):
+		try:
+			shard = json.loads((index_dir / f"{shard_for(term)}.json").read_text(encoding="utf-8"))
+		except FileNotFoundError:
+			shard = {}
+		postings = decode_postings(shard[term]) if term in shard else {}
+		scores = {d: w + (scores or {}).get(d, 0) for d, w in postings.items() if scores is None or d in scores}
+	return [docs[d][0] for d, _ in sorted((scores or {}).items(), key=lambda kv: -kv[1])]
+
+
+class TestTokens(unittest.TestCase):
+
+	def test_tokenize(self):
+		self.assertEqual(tokenize("The Hobbit's x-ray, 2024_ed Ünïcode"), ["the", "hobbit", "ray", "2024", "ed", "ünïcode"])
+
+	def test_shard_names_are_safe(self):
+		self.assertEqual(shard_for("hobbit"), "ho")
+		self.assertEqual(shard_for("éowyn"), "x" + "éo".encode("utf-8").hex())
+
+	def test_postings_round_trip(self):
+		postings = {0: 1, 5: 300, 7: 2, 100000: 12}
+		self.assertEqual(decode_postings(encode_postings(postings)), postings)
+		# deltas of small ids and weights take one byte each
+		self.assertEqual(len(encode_postings({1: 1, 2: 1, 3: 1})), 8)
+
+	def test_page_text_and_weights(self):
+		root = markdown_to_html_node("# Rings\n\n## Of Power\n\nThe _one_ ring ![img](/a.png) [rules](/r)")
+		text = page_text(root, "Rings")
+		self.assertEqual(text["headings"], ["Rings", "Of Power"])
+		self.assertEqual(text["body"], "Rings\nOf Power\nThe one ring  rules")
+		self.assertNotIn("img", text["body"])
+		weights = term_weights(text)
+		self.assertEqual(weights["rings"], 1 + 5 + 10)
+		self.assertEqual(weights["power"], 1 + 5)
+		self.assertEqual(weights["ring"], 1)
+
+	def test_text_is_cached_with_content(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			cache = RenderCache(tmp)
+			render_page("# T\n\nbody words", "{{ Content }}", "/", cache=cache)
+			text = {}
+			render_page("# T\n\nbody words", "{{ Content }}", "/", cache=cache, text=text)
+			self.assertEqual(cache.hits, 0)
+			again = {}
+			render_page("# T\n\nbody words", "{{ Content }}", "/", cache=cache, text=again)
+			self.assertEqual(cache.hits, 1)
+			self.assertEqual(again, text)
+
+
+class TestSearchIndex(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		self.content = root / "content"
+		(self.content / "blog").mkdir(parents=True)
+		(self.content / "index.md").write_text("# Home\n\nWelcome hobbits", encoding="utf-8")
+		(self.content / "blog" / "tom.md").write_text("# Tom\n\nBombadil sings to hobbits", encoding="utf-8")
+		self.template = root / "template.html"
+		self.template.write_text("{{ Content }}", encoding="utf-8")
+		self.docs = root / "docs"
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def build(self, jobs=1, writer=None):
+		manifest = BuildManifest.load(manifest_path_for(self.docs))
+		index = SearchIndex.load(self.docs)
+		with redirect_stdout(StringIO()) as out:
+			target = BuildTarget(self.docs, "/site", manifest, writer, search=index)
+			generate_pages_recursive(self.content, self.template, BuildOptions([target], jobs=jobs))
+		return out.getvalue()
+
+	def test_build_indexes_pages(self):
+		self.build()
+		index_dir = self.docs / "search"
+		self.assertEqual(sorted(search(index_dir, "hobbits")), ["/site/", "/site/blog/tom.html"])
+		self.assertEqual(search(index_dir, "tom bombadil"), ["/site/blog/tom.html"])
+		self.assertEqual(search(index_dir, "bombadil welcome"), [])
+		self.assertTrue((index_dir / "search.js").exists())
+
+	def test_incremental_update_touches_only_changed_pages(self):
+		self.build()
+		index_dir = self.docs / "search"
+		(self.content / "blog" / "tom.md").write_text("# Tom\n\nGoldberry dances", encoding="utf-8")
+		(self.content / "index.md").unlink()
+		(self.content / "new.md").write_text("# New\n\nhobbits again", encoding="utf-8")
+		log = self.build()
+		self.assertIn("search index: 9 shard(s) updated", log)
+		self.assertEqual(search(index_dir, "bombadil"), [])
+		self.assertEqual(search(index_dir, "goldberry"), ["/site/blog/tom.html"])
+		self.assertEqual(search(index_dir, "hobbits"), ["/site/new.html"])
+		self.assertEqual(search(index_dir, "welcome"), [])
+		self.assertFalse((index_dir / "bo.json").exists())
+		log = self.build()
+		self.assertIn("2 unchanged page(s) skipped", log)
+		self.assertIn("search index: 0 shard(s) updated", log)
+
+	def test_files_go_through_the_writer(self):
+		with OutputWriter(self.docs) as writer:
+			self.build(writer=writer)
+		added = writer.changes.as_dict()["added"]
+		self.assertIn("search/search.js", added)
+		self.assertIn("search/docs.json", added)
+		self.assertIn("search/bo.json", added)
+		(self.content / "blog" / "tom.md").write_text("# Tom\n\nGoldberry dances", encoding="utf-8")
+		with OutputWriter(self.docs) as writer:
+			self.build(writer=writer)
+		changes = writer.changes.as_dict()
+		self.assertIn("search/bo.json", changes["deleted"])
+		self.assertIn("search/go.json", changes["added"])
+		self.assertNotIn("search/search.js", changes["changed"])
+
+	def test_parallel_build_matches_sequential(self):
+		self.build(jobs=3)
+		parallel = {p.name: p.read_bytes() for p in (self.docs / "search").iterdir()}
+		(manifest_path_for(self.docs)).unlink()
+		self.build(jobs=1)
+		sequential = {p.name: p.read_bytes() for p in (self.docs / "search").iterdir()}
+		self.assertEqual(parallel, sequential)
+
+	def test_lost_state_rebuilds_from_scratch(self):
+		self.build()
+		Path(self.tmp.name, ".docs-search.json").unlink()
+		(self.content / "blog" / "tom.md").unlink()
+		log = self.build()
+		# the page is re-rendered even though the manifest says it is fresh
+		self.assertIn("0 unchanged page(s) skipped", log)
+		self.assertEqual(search(self.docs / "search", "bombadil"), [])
+		self.assertEqual(search(self.docs / "search", "hobbits"), ["/site/"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from sync import link_files, sync_dir, place_file, is_up_to_date
+
+
+class TestSyncDir(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		self.src = root / "static"
+		self.dst = root / "docs"
+		(self.src / "images").mkdir(parents=True)
+		(self.src / "index.css").write_text("body {}", encoding="utf-8")
+		(self.src / "images" / "a.png").write_bytes(b"\x89PNG" + b"x" * 100)
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def sync(self, previous=(), **kwargs):
+		with redirect_stdout(StringIO()):
+			return sync_dir(self.src, self.dst, previous=previous, **kwargs)
+
+	def test_first_sync_copies_everything(self):
+		synced, copied, removed = self.sync()
+		self.assertEqual(synced, ["images/a.png", "index.css"])
+		self.assertEqual(copied, synced)
+		self.assertEqual(removed, [])
+		self.assertEqual((self.dst / "index.css").read_text(encoding="utf-8"), "body {}")
+
+	def test_second_sync_copies_nothing(self):
+		synced, _, _ = self.sync()
+		_, copied, removed = self.sync(previous=synced)
+		self.assertEqual(copied, [])
+		self.assertEqual(removed, [])
+
+	def test_changed_file_is_recopied(self):
+		synced, _, _ = self.sync()
+		(self.src / "index.css").write_text("body { color: red }", encoding="utf-8")
+		_, copied, _ = self.sync(previous=synced)
+		self.assertEqual(copied, ["index.css"])
+
+	def test_checksum_catches_same_size_same_mtime_edit(self):
+		synced, _, _ = self.sync()
+		target = self.dst / "index.css"
+		st = target.stat()
+		target.write_text("body{!}", encoding="utf-8")
+		os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+		self.assertEqual(self.sync(previous=synced)[1], [])
+		self.assertEqual(self.sync(previous=synced, checksum=True)[1], ["index.css"])
+
+	def test_stale_files_removed_but_others_kept(self):
+		synced, _, _ = self.sync()
+		(self.dst / "index.html").write_text("generated", encoding="utf-8")
+		(self.src / "images" / "a.png").unlink()
+		_, _, removed = self.sync(previous=synced)
+		self.assertEqual(removed, ["images/a.png"])
+		self.assertFalse((self.dst / "images").exists())
+		self.assertTrue((self.dst / "index.html").exists())
+
+	def test_hardlink_shares_inode(self):
+		self.sync(method="hardlink")
+		self.assertTrue(os.path.samefile(self.src / "index.css", self.dst / "index.css"))
+		self.assertTrue(is_up_to_date(self.src / "index.css", self.dst / "index.css"))
+
+	def test_reflink_falls_back_to_copy(self):
+		self.sync(method="reflink")
+		self.assertEqual((self.dst / "images" / "a.png").read_bytes(), (self.src / "images" / "a.png").read_bytes())
+
+	def test_place_file_preserves_mtime(self):
+		src = self.src / "index.css"
+		os.utime(src, ns=(1_000_000_000, 1_000_000_000))
+		place_file(src, self.dst / "copy.css")
+		self.assertEqual((self.dst / "copy.css").stat().st_mtime_ns, 1_000_000_000)
+
+	def test_unknown_method_raises(self):
+		with self.assertRaises(ValueError):
+			place_file(self.src / "index.css", self.dst / "x.css", method="teleport")
+
+	def test_link_files_shares_another_targets_copies(self):
+		synced, _, _ = self.sync()
+		mirror = Path(self.tmp.name) / "mirror"
+		with redirect_stdout(StringIO()):
+			linked = link_files(self.dst, mirror, synced)[1]
+			self.assertEqual(linked, ["images/a.png", "index.css"])
+			self.assertTrue(os.path.samefile(self.dst / "index.css", mirror / "index.css"))
+			self.assertEqual(link_files(self.dst, mirror, synced)[1], [])
+
+			# a rewritten copy is relinked; a dropped file goes
+			(self.src / "index.css").write_text("p {}", encoding="utf-8")
+			synced, _, _ = self.sync(previous=synced)
+			_, linked, removed = link_files(self.dst, mirror, ["index.css"], previous=synced)
+		self.assertEqual((linked, removed), (["index.css"], ["images/a.png"]))
+		self.assertTrue(os.path.samefile(self.dst / "index.css", mirror / "index.css"))
+		self.assertFalse((mirror / "images").exists())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from markdown_blocks import BlockType, block_to_block_type, markdown_to_html_node
+from syntax import STRIKETHROUGH, TABLES, BlockRule, InlineRule, SyntaxRegistry
+from textnode import TextNode, TextType
+
+
+class TestTables(unittest.TestCase):
+
+	def test_table_with_alignment_and_inline_cells(self):
+		md = "| Name | **Age** |\n|:-----|----:|\n| Frodo | 50 |\n| Sam \\| Gamgee |"
+		self.assertEqual(
+			markdown_to_html_node(md).to_html(),
+			"<div><table>"
+			'<thead><tr><th style="text-align: left">Name</th><th style="text-align: right"><b>Age</b></th></tr></thead>'
+			'<tbody><tr><td style="text-align: left">Frodo</td><td style="text-align: right">50</td></tr>'
+			'<tr><td style="text-align: left">Sam | Gamgee</td><td style="text-align: right"></td></tr></tbody>'
+			"</table></div>"
+		)
+
+	def test_header_only(self):
+		html = markdown_to_html_node("| a | b |\n| --- | --- |").to_html()
+		self.assertEqual(html, "<div><table><thead><tr><th>a</th><th>b</th></tr></thead></table></div>")
+
+	def test_not_a_table(self):
+		for block in ("| a | b |", "| a | b |\n| --- |", "| a |\n| x |", "a | b\n--- | ---"):
+			self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH, block)
+		self.assertIs(block_to_block_type("|a|\n|-|"), TABLES)
+
+	def test_minified_table_drops_optional_end_tags(self):
+		html = markdown_to_html_node("| a |\n| - |\n| 1 |\n| 2 |").to_html(minify=True)
+		self.assertEqual(html, "<div><table><thead><tr><th>a<tbody><tr><td>1<tr><td>2</table></div>")
+
+
+class TestStrikethrough(unittest.TestCase):
+
+	def test_strikethrough(self):
+		self.assertEqual(
+			text_to_textnodes("a ~~gone~~ b"),
+			[TextNode("a ", TextType.TEXT), TextNode("gone", TextType.STRIKETHROUGH), TextNode(" b", TextType.TEXT)],
+		)
+
+	def test_nested_and_unmatched(self):
+		html = markdown_to_html_node("~~old **bold**~~ ~ ~~~~ ~~open").to_html()
+		self.assertEqual(html, "<div><p><del>old <b>bold</b></del> ~ ~~~~ ~~open</p></div>")
+		html = markdown_to_html_node("[~~x~~](/y)").to_html()
+		self.assertEqual(html, '<div><p><a href="/y"><del>x</del></a></p></div>')
+
+
+class TestSyntaxRegistry(unittest.TestCase):
+
+	def test_rules_only_tried_at_their_triggers(self):
+		calls = []
+
+		def parse(text, i, hi, find, span):
+			calls.append(i)
+			end = find("%", i + 1)
+			if end == -1:
+				return None
+			return span(TextType.CODE, i + 1, end), end + 1
+
+		registry = SyntaxRegistry()
+		registry.add_inline(InlineRule("percent", "%", parse))
+		nodes = text_to_textnodes("plain text with **no** trigger", registry)
+		self.assertEqual(calls, [])
+		self.assertEqual(len(nodes), 3)
+		nodes = text_to_textnodes("a %b% c", registry)
+		self.assertEqual(calls, [2])
+		self.assertEqual(nodes[1], TextNode("b", TextType.CODE))
+		# the default registry does not know the rule
+		self.assertEqual(text_to_textnodes("a %b% c"), [TextNode("a %b% c", TextType.TEXT)])
+
+	def test_block_priority_and_core_fallback(self):
+		tried = []
+
+		def rule(name, triggers, priority, matches):
+			def match(block):
+				tried.append(name)
+				return matches
+			return BlockRule(name, triggers, match, lambda block, inline: ParentNode("ul", [LeafNode("li", name)]), priority)
+
+		registry = SyntaxRegistry()
+		registry.add_block(rule("late", "-", 20, True))
+		registry.add_block(rule("early", "-", 10, False))
+		registry.add_block(rule("any", "", 15, False))
+		self.assertEqual(block_to_block_type("- [ ] task", registry).name, "late")
+		self.assertEqual(tried, ["early", "any", "late"])
+		tried.clear()
+		self.assertEqual(block_to_block_type("# Title", registry), BlockType.HEADING)
+		self.assertEqual(tried, ["any"])
+		html = markdown_to_html_node("- [ ] task", registry=registry).to_html()
+		self.assertEqual(html, "<div><ul><li>late</li></ul></div>")
+
+	def test_dispatch_table_rebuilt_after_adding(self):
+		registry = SyntaxRegistry()
+		self.assertEqual(registry.block_rules("|"), ())
+		registry.add_block(TABLES)
+		registry.add_inline(STRIKETHROUGH)
+		self.assertEqual(registry.block_rules("|"), (TABLES,))
+		self.assertEqual(registry.inline_table(), {"~": (STRIKETHROUGH,)})
+		self.assertEqual(registry.names(), ["tables", "strikethrough"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -79,6 +79,16 @@ class TestTextNode(unittest.TestCase):
 		self.assertEqual(html_node.value, "")
 		self.assertEqual(html_node.props, {"src": "https://example.com/img.png", "alt": "Alt text"})
 
+	def test_link_props_shared_and_read_only(self):
+		a = text_node_to_html_node(TextNode("one", TextType.LINK, "/home"))
+		b = text_node_to_html_node(TextNode("two", TextType.LINK, "/home"))
+		self.assertIs(a.props, b.props)
+		with self.assertRaises(TypeError):
+			a.props["href"] = "/elsewhere"
+
+	def test_text_node_is_slotted(self):
+		self.assertFalse(hasattr(TextNode("x", TextType.TEXT), "__dict__"))
+
 	def test_invalid_type_raises(self):
 		class FakeType: pass
 		node = TextNode("x", FakeType())
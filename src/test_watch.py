@@ -0,0 +1,228 @@
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import main
+from manifest import BuildManifest, hash_bytes, manifest_path_for
+from output import OutputWriter
+from render_cache import RenderCache
+from main import BuildOptions, BuildTarget, generate_pages_recursive, rebuild_changed
+from watch import LiveReload, LIVERELOAD_PATH, LIVERELOAD_SCRIPT, diff_snapshots, snapshot, start_server, watch
+
+
+class TestSnapshots(unittest.TestCase):
+
+	def test_diff_detects_change_add_and_remove(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			(root / "a.md").write_text("a", encoding="utf-8")
+			(root / "sub").mkdir()
+			(root / "sub" / "b.md").write_text("b", encoding="utf-8")
+			before = snapshot([root])
+			(root / "a.md").write_text("aa", encoding="utf-8")
+			(root / "sub" / "b.md").unlink()
+			(root / "c.md").write_text("c", encoding="utf-8")
+			changed, removed = diff_snapshots(before, snapshot([root]))
+			self.assertEqual(changed, sorted([str(root / "a.md"), str(root / "c.md")]))
+			self.assertEqual(removed, [str(root / "sub" / "b.md")])
+
+	def test_missing_paths_are_ignored(self):
+		self.assertEqual(snapshot(["/nonexistent/path"]), {})
+
+
+class TestLiveReload(unittest.TestCase):
+
+	def test_wait_returns_after_notify(self):
+		lr = LiveReload()
+		threading.Timer(0.01, lr.notify).start()
+		self.assertEqual(lr.wait(0, timeout=2), 1)
+
+	def test_wait_times_out(self):
+		self.assertEqual(LiveReload().wait(0, timeout=0.01), 0)
+
+	def test_watch_calls_rebuild_and_notifies(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = Path(tmp) / "page.md"
+			path.write_text("one", encoding="utf-8")
+			lr = LiveReload()
+			stop = threading.Event()
+			calls = []
+
+			def rebuild(changed, removed):
+				calls.append((changed, removed))
+				stop.set()
+
+			thread = threading.Thread(target=watch, args=([tmp], rebuild, lr, 0.01, stop))
+			with redirect_stdout(StringIO()):
+				thread.start()
+				# let the watcher take its first snapshot
+				threading.Event().wait(0.2)
+				path.write_text("two!", encoding="utf-8")
+				thread.join(timeout=5)
+			self.assertEqual(calls, [([str(path)], [])])
+			self.assertEqual(lr.generation, 1)
+
+
+class TestWatch(unittest.TestCase):
+
+	def test_paths_recomputed_after_rebuild(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			root = Path(tmp)
+			template = root / "template.html"
+			partial = root / "partial.html"
+			template.write_text("a", encoding="utf-8")
+			partial.write_text("p", encoding="utf-8")
+			paths = [str(template)]
+			rebuilds = []
+			stop = threading.Event()
+
+			def rebuild(changed, removed):
+				rebuilds.append(changed)
+				# the template now includes the partial
+				paths.append(str(partial))
+				if len(rebuilds) == 2:
+					stop.set()
+
+			thread = threading.Thread(target=watch, args=(lambda: list(paths), rebuild, LiveReload(), 0.01, stop))
+			with redirect_stdout(StringIO()):
+				thread.start()
+				# let watch take its first snapshot
+				time.sleep(0.1)
+				template.write_text("a + partial", encoding="utf-8")
+				deadline = time.monotonic() + 5
+				while not rebuilds and time.monotonic() < deadline:
+					time.sleep(0.01)
+				partial.write_text("p2", encoding="utf-8")
+				thread.join(timeout=5)
+				stop.set()
+			self.assertFalse(thread.is_alive())
+			self.assertEqual(rebuilds, [[str(template)], [str(partial)]])
+
+
+class TestWatchServer(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		(root / "blog").mkdir()
+		(root / "blog" / "index.html").write_text("<html><body>post</body></html>", encoding="utf-8")
+		(root / "index.css").write_text("body {}", encoding="utf-8")
+		self.livereload = LiveReload()
+		self.server = start_server(root, self.livereload, basepath="/site/", port=0)
+		self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		self.tmp.cleanup()
+
+	def get(self, path):
+		with urllib.request.urlopen(self.base + path, timeout=5) as resp:
+			return resp.read().decode("utf-8")
+
+	def test_html_gets_reload_script(self):
+		body = self.get("/site/blog/")
+		self.assertEqual(body, "<html><body>post" + LIVERELOAD_SCRIPT + "</body></html>")
+
+	def test_other_files_served_unchanged(self):
+		self.assertEqual(self.get("/site/index.css"), "body {}")
+
+	def test_event_stream_pushes_reload(self):
+		resp = urllib.request.urlopen(self.base + LIVERELOAD_PATH, timeout=5)
+		try:
+			self.assertEqual(resp.headers["Content-Type"], "text/event-stream")
+			threading.Timer(0.05, self.livereload.notify).start()
+			self.assertEqual(resp.readline(), b"data: reload\n")
+		finally:
+			resp.close()
+
+
+class TestRebuildChanged(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		root = Path(self.tmp.name)
+		self.content = root / "content"
+		self.static = root / "static"
+		self.docs = root / "docs"
+		self.template = root / "template.html"
+		self.content.mkdir()
+		self.static.mkdir()
+		(self.content / "a.md").write_text("# A", encoding="utf-8")
+		(self.content / "b.md").write_text("# B", encoding="utf-8")
+		self.template.write_text("{{ Content }}", encoding="utf-8")
+		self.manifest = BuildManifest.load(manifest_path_for(self.docs))
+		with redirect_stdout(StringIO()):
+			generate_pages_recursive(self.content, self.template, BuildOptions([BuildTarget(self.docs, "/", self.manifest)]))
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def rebuild(self, changed, removed=(), cache=None, writer=None):
+		build = BuildOptions([BuildTarget(self.docs, "/", self.manifest, writer)], cache=cache, static_dir=self.static)
+		with redirect_stdout(StringIO()) as out:
+			rebuild_changed([str(p) for p in changed], [str(p) for p in removed], self.content, self.template, build)
+		return out.getvalue()
+
+	def test_only_changed_page_rendered(self):
+		(self.content / "a.md").write_text("# A2", encoding="utf-8")
+		log = self.rebuild([self.content / "a.md"])
+		self.assertEqual(log.count("Generating page"), 1)
+		self.assertIn("A2", (self.docs / "a.html").read_text(encoding="utf-8"))
+
+	def test_records_hash_of_rendered_bytes(self):
+		path = self.content / "a.md"
+		path.write_text("# A2", encoding="utf-8")
+		read = main.read_markdown
+
+		def read_then_save(p):
+			result = read(p)
+			# an editor save lands between the render and the manifest update
+			path.write_text("# A3", encoding="utf-8")
+			return result
+
+		with mock.patch("main.read_markdown", read_then_save):
+			self.rebuild([path])
+		self.assertIn("A2", (self.docs / "a.html").read_text(encoding="utf-8"))
+		self.assertEqual(self.manifest.pages["a.md"]["hash"], hash_bytes(b"# A2"))
+
+	def test_uses_cache_and_writer(self):
+		cache = RenderCache(Path(self.tmp.name) / "cache")
+		path = self.content / "a.md"
+		for text in ("# A2", "# A3", "# A2"):
+			path.write_text(text, encoding="utf-8")
+			with OutputWriter(self.docs) as writer:
+				self.rebuild([path], cache=cache, writer=writer)
+		self.assertEqual((cache.hits, cache.misses), (1, 2))
+		self.assertEqual(writer.changes.changed, ["a.html"])
+		(self.content / "b.md").unlink()
+		with OutputWriter(self.docs) as writer:
+			self.rebuild([], [self.content / "b.md"], writer=writer)
+		self.assertEqual(writer.changes.deleted, ["b.html"])
+
+	def test_removed_page_output_deleted(self):
+		(self.content / "b.md").unlink()
+		self.rebuild([], [self.content / "b.md"])
+		self.assertFalse((self.docs / "b.html").exists())
+		self.assertNotIn("b.md", self.manifest.pages)
+
+	def test_template_change_renders_all(self):
+		self.template.write_text("<main>{{ Content }}</main>", encoding="utf-8")
+		log = self.rebuild([self.template])
+		self.assertEqual(log.count("Generating page"), 2)
+
+	def test_static_change_syncs(self):
+		(self.static / "x.css").write_text("x", encoding="utf-8")
+		self.rebuild([self.static / "x.css"])
+		self.assertTrue((self.docs / "x.css").exists())
+		self.assertEqual(self.manifest.static, ["x.css"])
+
+
+if __name__ == "__main__":
+	unittest.main()
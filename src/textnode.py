@@ -1,5 +1,7 @@
 from enum import Enum
-from htmlnode import LeafNode
+from functools import lru_cache
+from types import MappingProxyType
+from htmlnode import LeafNode, ParentNode
 
 class TextType(Enum):
 	TEXT = "text"
@@ -8,12 +10,18 @@ class TextType(Enum):
 	CODE = "code"
 	IMAGE = "image"
 	LINK = "link"
+	STRIKETHROUGH = "strikethrough"
 
 class TextNode:
-	def __init__(self,text,text_type,url=None):
+	# children holds nested inline nodes (e.g. bold inside a link); text is
+	# then the plain text of those children. Leaf spans keep children=None.
+	__slots__ = ("text", "text_type", "url", "children")
+
+	def __init__(self,text,text_type,url=None,children=None):
 		self.text = text
 		self.text_type = text_type
 		self.url = url
+		self.children = children
 
 	def __eq__(self,other):
 		if not isinstance(other,TextNode):
@@ -21,23 +29,48 @@ class TextNode:
 		return (
 			self.text == other.text and
 			self.text_type == other.text_type and
-			self.url == other.url
+			self.url == other.url and
+			self.children == other.children
 		)
 
 	def __repr__(self):
+		if self.children:
+			return f"TextNode({self.text}, {self.text_type}, {self.url}, {self.children})"
 		return f"TextNode({self.text}, {self.text_type}, {self.url})"
 
+@lru_cache(maxsize=4096)
+def _link_props(url):
+	# read-only and shared: every link to the same URL reuses one mapping
+	return MappingProxyType({"href": url})
+
+@lru_cache(maxsize=4096)
+def _image_props(url, alt):
+	return MappingProxyType({"src": url, "alt": alt})
+
+_NESTABLE_TAGS = {
+	TextType.BOLD: "b",
+	TextType.ITALIC: "i",
+	TextType.LINK: "a",
+	TextType.STRIKETHROUGH: "del",
+}
+
 def text_node_to_html_node(text_node):
+	if text_node.children and text_node.text_type in _NESTABLE_TAGS:
+		children = [text_node_to_html_node(child) for child in text_node.children]
+		props = _link_props(text_node.url) if text_node.text_type == TextType.LINK else None
+		return ParentNode(_NESTABLE_TAGS[text_node.text_type], children, props)
 	if text_node.text_type == TextType.TEXT:
 		return LeafNode(None, text_node.text)
 	if text_node.text_type == TextType.BOLD:
 		return LeafNode("b", text_node.text)
 	if text_node.text_type == TextType.ITALIC:
 		return LeafNode("i", text_node.text)
+	if text_node.text_type == TextType.STRIKETHROUGH:
+		return LeafNode("del", text_node.text)
 	if text_node.text_type == TextType.CODE:
 		return LeafNode("code", text_node.text)
 	if text_node.text_type == TextType.LINK:
-		return LeafNode("a", text_node.text, {"href": text_node.url})
+		return LeafNode("a", text_node.text, _link_props(text_node.url))
 	if text_node.text_type == TextType.IMAGE:
-		return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+		return LeafNode("img", "", _image_props(text_node.url, text_node.text))
 	raise ValueError(f"invalid text type: {text_node.text_type}")
@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+LIVERELOAD_PATH = "/__livereload"
+
+# injected before </body> of every HTML page served in watch mode
+LIVERELOAD_SCRIPT = (
+	"<script>new EventSource(\"" + LIVERELOAD_PATH + "\")"
+	".onmessage = function () { location.reload(); };</script>"
+)
+
+
+def snapshot(paths):
+	"""
+	Map every file under paths (files or directories) to (mtime_ns, size).
+	"""
+	state = {}
+	stack = [str(p) for p in paths]
+	while stack:
+		path = stack.pop()
+		try:
+			if os.path.isdir(path):
+				with os.scandir(path) as it:
+					for entry in it:
+						if entry.is_dir(follow_symlinks=False):
+							stack.append(entry.path)
+						else:
+							st = entry.stat()
+							state[entry.path] = (st.st_mtime_ns, st.st_size)
+			else:
+				st = os.stat(path)
+				state[path] = (st.st_mtime_ns, st.st_size)
+		except FileNotFoundError:
+			continue
+	return state
+
+
+def diff_snapshots(old, new):
+	"""
+	Return (changed_or_added, removed) path lists between two snapshots.
+	"""
+	changed = sorted(p for p, stamp in new.items() if old.get(p) != stamp)
+	removed = sorted(p for p in old if p not in new)
+	return changed, removed
+
+
+class LiveReload:
+	"""
+	Broadcast point for reload events: each notify() bumps a generation
+	number that waiting event streams compare against.
+	"""
+
+	def __init__(self):
+		self.generation = 0
+		self._cond = threading.Condition()
+
+	def notify(self):
+		with self._cond:
+			self.generation += 1
+			self._cond.notify_all()
+
+	def wait(self, seen, timeout):
+		with self._cond:
+			self._cond.wait_for(lambda: self.generation != seen, timeout)
+			return self.generation
+
+
+class WatchRequestHandler(SimpleHTTPRequestHandler):
+	"""
+	Static file handler that strips the site basepath, injects the reload
+	script into HTML pages and serves the server-sent event stream.
+	"""
+
+	livereload = None
+	basepath = "/"
+
+	def log_message(self, format, *args):
+		pass
+
+	def do_GET(self):
+		if self.path == LIVERELOAD_PATH:
+			self._event_stream()
+			return
+		if self.basepath != "/" and self.path.startswith(self.basepath):
+			self.path = "/" + self.path[len(self.basepath):]
+		fs_path = Path(self.translate_path(self.path))
+		if fs_path.is_dir() and self.path.endswith("/"):
+			fs_path = fs_path / "index.html"
+		if fs_path.suffix == ".html" and fs_path.is_file():
+			self._send_html(fs_path)
+			return
+		super().do_GET()
+
+	def _send_html(self, fs_path):
+		body = fs_path.read_bytes()
+		marker = body.rfind(b"</body>")
+		script = LIVERELOAD_SCRIPT.encode("utf-8")
+		body = body[:marker] + script + body[marker:] if marker != -1 else body + script
+		self.send_response(200)
+		self.send_header("Content-Type", "text/html; charset=utf-8")
+		self.send_header("Content-Length", str(len(body)))
+		self.send_header("Cache-Control", "no-store")
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _event_stream(self):
+		self.send_response(200)
+		self.send_header("Content-Type", "text/event-stream")
+		self.send_header("Cache-Control", "no-store")
+		self.end_headers()
+		seen = self.livereload.generation
+		try:
+			while True:
+				current = self.livereload.wait(seen, timeout=15)
+				if current != seen:
+					seen = current
+					self.wfile.write(b"data: reload\n\n")
+				else:
+					# keep-alive comment so dead clients are noticed
+					self.wfile.write(b": ping\n\n")
+				self.wfile.flush()
+		except (BrokenPipeError, ConnectionResetError):
+			pass
+
+
+def start_server(directory, livereload, basepath="/", host="127.0.0.1", port=8888):
+	"""
+	Serve directory on a background thread; returns the server.
+	"""
+	handler = type("Handler", (WatchRequestHandler,), {"livereload": livereload, "basepath": basepath})
+	server = ThreadingHTTPServer((host, port), partial(handler, directory=str(directory)))
+	server.daemon_threads = True
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	return server
+
+
+def watch(paths, rebuild, livereload, interval=0.1, stop=None):
+	"""
+	Poll paths every interval seconds; on any change call
+	rebuild(changed, removed) and then push a reload event.
+
+	paths may also be a callable returning them. It is called again after
+	every rebuild, so files that become inputs (a partial newly included
+	by the template, say) are watched from then on.
+
+	Polling keeps this stdlib-only and portable; a stat walk over a few
+	thousand files fits well inside the interval. Runs until stop (a
+	threading.Event) is set or the process is interrupted.
+	"""
+	current = paths if callable(paths) else lambda: paths
+	watched = current()
+	state = snapshot(watched)
+	while stop is None or not stop.is_set():
+		time.sleep(interval)
+		new_state = snapshot(watched)
+		changed, removed = diff_snapshots(state, new_state)
+		state = new_state
+		if not changed and not removed:
+			continue
+		start = time.perf_counter()
+		try:
+			rebuild(changed, removed)
+		except Exception as e:
+			print(f"rebuild failed: {type(e).__name__}: {e}")
+			continue
+		livereload.notify()
+		print(f"rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+		rewatched = current()
+		if rewatched != watched:
+			# known files keep their old stamps, so edits made during the
+			# rebuild still show up on the next poll
+			watched = rewatched
+			state = {p: state.get(p, stamp) for p, stamp in snapshot(watched).items()}